@@ -0,0 +1,282 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+
+# "memory" keeps buckets in this process; "sqlite:<path>" shares them
+# between workers on the same host
+ADMISSION_STORE = os.getenv("ADMISSION_STORE", "memory")
+RATE_LIMIT_PER_IP = float(os.getenv("RATE_LIMIT_PER_IP", "5"))
+RATE_LIMIT_BURST_PER_IP = float(os.getenv("RATE_LIMIT_BURST_PER_IP", "20"))
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+DEVICE_MAX_WAITING = int(os.getenv("DEVICE_MAX_WAITING", "2"))
+DEVICE_WAIT_TIMEOUT = float(os.getenv("DEVICE_WAIT_TIMEOUT", "15"))
+# Upstream quotas as "<requests>/<seconds>"; the NewsAPI developer plan
+# allows 100 requests a day and the OpenWeather free plan 60 a minute
+NEWS_API_QUOTA = os.getenv("NEWS_API_QUOTA", "100/86400")
+OPENWEATHER_QUOTA = os.getenv("OPENWEATHER_QUOTA", "60/60")
+
+# Requests per second and burst for all clients together, per route
+ROUTE_LIMITS = {
+    "/listen": (0.5, 2),
+    "/speak": (1, 5),
+    "/weather": (1, 5),
+    "/wikipedia": (1, 5),
+    "/screenshot": (0.5, 3),
+    "/email": (0.2, 5),
+    "/whatsapp": (0.2, 3),
+}
+# Never limited, so monitoring keeps working under load
+EXEMPT_PATHS = ("/", "/health", "/health/stream", "/ready")
+
+MEMORY_STORE_MAX_KEYS = 10000
+
+BUCKETS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class RateLimited(Exception):
+    """Raised when a request is not admitted; retry_after is in seconds"""
+    def __init__(self, retry_after, message="Too many requests"):
+        super().__init__(message)
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def _refill(tokens, updated_at, now, rate, capacity, cost):
+    """Token bucket step; returns (tokens left, seconds to wait or 0)"""
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate if rate > 0 else float("inf")
+
+
+class MemoryStore:
+    """Token buckets in a dict; buckets idle for an hour are dropped when it grows"""
+    # take() only holds a lock briefly, so it is called on the event loop
+    blocking = False
+
+    def __init__(self, max_keys=MEMORY_STORE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, rate, capacity, cost=1.0):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens, wait = _refill(tokens, updated_at, now, rate, capacity, cost)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # Parameters are per key, so only buckets idle for a long time can go
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at > 3600:
+                del self._buckets[key]
+
+
+class SQLiteStore:
+    """Token buckets in a SQLite file shared by every process that opens it"""
+    # take() may wait on another process's write lock for the busy timeout
+    blocking = True
+
+    def __init__(self, db_path):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(BUCKETS_SCHEMA)
+
+    def take(self, key, rate, capacity, cost=1.0):
+        # Wall-clock time, since the buckets outlive this process
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens, wait = _refill(tokens, updated_at, now, rate, capacity, cost)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now)
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+
+def open_store(spec=ADMISSION_STORE):
+    """Limiter storage for an ADMISSION_STORE value"""
+    if spec.startswith("sqlite:"):
+        return SQLiteStore(os.path.expanduser(spec[len("sqlite:"):]))
+    return MemoryStore()
+
+
+class TokenBucketLimiter:
+    """
+    Admission by token bucket: rate tokens a second up to capacity, one
+    token per request
+    """
+    def __init__(self, store, rate, capacity, prefix):
+        self.store = store
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+
+    def check(self, key=""):
+        """Take a token for key or raise RateLimited"""
+        wait = self.store.take(f"{self.prefix}:{key}", self.rate, self.capacity)
+        if wait:
+            raise RateLimited(wait)
+
+
+class UpstreamQuota:
+    """
+    Limiter for a third-party API with a fixed request quota
+
+    Requests are spread over the quota period with a token bucket. When
+    the upstream answers 429 anyway (a quota shared with other clients of
+    the same key), penalize() stops all calls until it says to retry.
+    """
+    def __init__(self, name, quota, store):
+        requests, seconds = (float(part) for part in quota.split("/"))
+        self.name = name
+        self.requests = requests
+        self.seconds = seconds
+        self.limiter = TokenBucketLimiter(store, requests / seconds, requests, f"upstream:{name}")
+        self._blocked_until = 0.0
+
+    def acquire(self):
+        """Take one call from the quota or raise RateLimited"""
+        remaining = self._blocked_until - time.monotonic()
+        if remaining > 0:
+            raise RateLimited(remaining, f"{self.name} quota exhausted")
+        try:
+            self.limiter.check()
+        except RateLimited as e:
+            raise RateLimited(e.retry_after, f"{self.name} quota exhausted") from None
+
+    def interval(self, calls=1):
+        """Seconds between batches of calls so that the quota is never exceeded"""
+        return self.seconds * calls / self.requests
+
+    def penalize(self, retry_after=60):
+        """Block calls after the upstream rejected one for rate limiting"""
+        try:
+            retry_after = float(retry_after)
+        except (TypeError, ValueError):
+            retry_after = 60
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+
+class DeviceSlot:
+    """
+    Single-slot semaphore for routes that hold a physical device
+
+    Up to max_waiting requests queue for the slot; beyond that, or after
+    waiting wait_timeout seconds, RateLimited is raised with an estimate
+    of when the device will be free.
+    """
+    def __init__(self, name, max_waiting=DEVICE_MAX_WAITING, wait_timeout=DEVICE_WAIT_TIMEOUT):
+        self.name = name
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._lock = None
+        # The holder plus everyone waiting
+        self._queued = 0
+        self._average_hold = 5.0
+        self._started = 0.0
+
+    def retry_after(self):
+        return self._average_hold * max(self._queued, 1)
+
+    @property
+    def busy(self):
+        """Whether a request holds the device; safe to read from any thread"""
+        return self._lock is not None and self._lock.locked()
+
+    async def acquire(self):
+        """
+        Take the device; the holder must call release() on the event loop,
+        which may be from a task's done callback
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._queued > self.max_waiting:
+            raise RateLimited(self.retry_after(), f"{self.name} is busy")
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._lock.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self._queued -= 1
+            raise RateLimited(self.retry_after(), f"{self.name} is busy") from None
+        except BaseException:
+            self._queued -= 1
+            raise
+        self._started = time.monotonic()
+
+    def release(self):
+        self._average_hold = 0.8 * self._average_hold + 0.2 * (time.monotonic() - self._started)
+        self._queued -= 1
+        self._lock.release()
+
+    @asynccontextmanager
+    async def hold(self):
+        """Hold the device for the body of an async with block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def client_ip(request):
+    """Address a request is limited by"""
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+store = open_store()
+ip_limiter = TokenBucketLimiter(store, RATE_LIMIT_PER_IP, RATE_LIMIT_BURST_PER_IP, "ip")
+route_limiters = {
+    path: TokenBucketLimiter(store, rate, burst, f"route:{path}")
+    for path, (rate, burst) in ROUTE_LIMITS.items()
+}
+news_quota = UpstreamQuota("NewsAPI", NEWS_API_QUOTA, store)
+weather_quota = UpstreamQuota("OpenWeather", OPENWEATHER_QUOTA, store)
+microphone = DeviceSlot("microphone")
+
+
+def admit(request):
+    """Apply the per-IP and per-route limits to a request or raise RateLimited"""
+    path = request.url.path
+    if path in EXEMPT_PATHS:
+        return
+    ip_limiter.check(client_ip(request))
+    limiter = route_limiters.get(path)
+    if limiter is not None:
+        limiter.check()
+
+
+async def admit_request(request):
+    """admit() for the event loop; a SQLite store is consulted on a worker thread"""
+    if store.blocking:
+        await asyncio.to_thread(admit, request)
+    else:
+        admit(request)
@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .tracing import span, record_error
+
+RECOGNITION_CACHE_SIZE = int(os.getenv("RECOGNITION_CACHE_SIZE", "256"))
+# Largest fraction of differing fingerprint bits still treated as the same utterance
+RECOGNITION_CACHE_MAX_DISTANCE = float(os.getenv("RECOGNITION_CACHE_MAX_DISTANCE", "0.2"))
+# Largest fraction in any short stretch (LOCAL_WINDOW segments, about a
+# tenth of the utterance). Commands sharing a carrier phrase ("weather in
+# paris" / "weather in london") are close overall but differ locally.
+RECOGNITION_CACHE_MAX_LOCAL_DISTANCE = float(os.getenv("RECOGNITION_CACHE_MAX_LOCAL_DISTANCE", "0.3"))
+LOCAL_WINDOW = 3
+
+SAMPLE_RATE = 16000
+FRAME = 400          # 25 ms analysis window at 16 kHz
+HOP = 160            # 10 ms step
+SEGMENTS = 32        # time resolution of the fingerprint
+BANDS = 17           # frequency bands
+SILENCE_DB = 25.0    # frames this far below the loudest one are trimmed from the ends
+MAX_LENGTH_RATIO = 1.3
+
+# Band edges over the FFT bins, log-spaced between 100 Hz and 4 kHz
+_BAND_EDGES = np.unique(np.round(
+    np.geomspace(100, 4000, BANDS + 1) / (SAMPLE_RATE / 2) * (FRAME // 2)
+).astype(int))
+_WINDOW = np.hanning(FRAME).astype(np.float32)
+# Bits per segment: neighbouring band comparisons plus one per band
+SEGMENT_BITS = 2 * (len(_BAND_EDGES) - 1) - 1
+
+
+class Fingerprint:
+    """Packed spectral hash of an utterance plus its voiced length in seconds"""
+    __slots__ = ("bits", "duration")
+
+    def __init__(self, bits, duration):
+        self.bits = bits
+        self.duration = duration
+
+
+def fingerprint_pcm(samples, sample_rate=SAMPLE_RATE):
+    """
+    Fingerprint 16-bit mono PCM samples
+
+    The signal is framed, leading and trailing silence is trimmed and log
+    band energies are averaged into a fixed number of time segments. Each
+    segment contributes one bit per pair of neighbouring bands (which is
+    louder) and one bit per band (louder than that band's median), so the
+    hash ignores overall gain. Returns None for audio too short to
+    fingerprint.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if sample_rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), sample_rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    if len(samples) < FRAME:
+        return None
+
+    count = 1 + (len(samples) - FRAME) // HOP
+    frames = np.lib.stride_tricks.as_strided(
+        samples, shape=(count, FRAME), strides=(samples.strides[0] * HOP, samples.strides[0])
+    )
+    power = np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) ** 2
+
+    loudness = 10 * np.log10(power.sum(axis=1) + 1e-9)
+    voiced = np.flatnonzero(loudness > loudness.max() - SILENCE_DB)
+    power = power[voiced[0]:voiced[-1] + 1]
+    if len(power) < SEGMENTS:
+        return None
+
+    bands = np.add.reduceat(power[:, :_BAND_EDGES[-1]], _BAND_EDGES[:-1], axis=1)
+    bands = np.log10(bands + 1e-9)
+    segments = np.array([chunk.mean(axis=0) for chunk in np.array_split(bands, SEGMENTS)])
+    bits = np.concatenate([
+        segments[:, :-1] > segments[:, 1:],
+        segments > np.median(segments, axis=0),
+    ], axis=1)
+    duration = len(power) * HOP / SAMPLE_RATE
+    return Fingerprint(np.packbits(bits.ravel()), duration)
+
+
+def fingerprint(audio):
+    """Fingerprint a speech_recognition AudioData"""
+    raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+    return fingerprint_pcm(np.frombuffer(raw, dtype=np.int16))
+
+
+class RecognitionCache:
+    """
+    LRU cache of transcripts keyed by audio fingerprint
+
+    Lookups compare a fingerprint with every cached one in a single
+    vectorized Hamming-distance pass, segment by segment, and accept the
+    closest if few enough bits differ overall and in every short stretch,
+    and the utterances are of similar length.
+    """
+    def __init__(self, max_entries=RECOGNITION_CACHE_SIZE, max_distance=RECOGNITION_CACHE_MAX_DISTANCE,
+                 max_local_distance=RECOGNITION_CACHE_MAX_LOCAL_DISTANCE):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_local_distance = max_local_distance
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._next_key = 0
+        self._matrix = None
+        self._keys = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _index(self):
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key][0].bits for key in self._keys])
+            self._durations = np.array([self._entries[key][0].duration for key in self._keys])
+        return self._keys, self._matrix, self._durations
+
+    def lookup(self, fp):
+        """Transcript of a near-identical earlier utterance, or None"""
+        if fp is None:
+            return None
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+            keys, matrix, durations = self._index()
+            differing = np.unpackbits(matrix ^ fp.bits, axis=1)[:, :SEGMENTS * SEGMENT_BITS]
+            per_segment = differing.reshape(len(keys), SEGMENTS, SEGMENT_BITS).mean(axis=2)
+            distances = per_segment.mean(axis=1)
+            local = np.lib.stride_tricks.sliding_window_view(per_segment, LOCAL_WINDOW, axis=1).mean(axis=2)
+            distances[local.max(axis=1) > self.max_local_distance] = 1.0
+            ratio = np.maximum(durations, fp.duration) / np.maximum(np.minimum(durations, fp.duration), 1e-3)
+            distances[ratio > MAX_LENGTH_RATIO] = 1.0
+            best = int(distances.argmin())
+            if distances[best] > self.max_distance:
+                self.misses += 1
+                return None
+            key = keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][1]
+
+    def store(self, fp, transcript):
+        """Remember the transcript for an utterance, evicting the least recently used"""
+        if fp is None or not transcript:
+            return
+        with self._lock:
+            self._entries[self._next_key] = (fp, transcript)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def recognize(self, audio, recognize, cacheable=None):
+        """
+        Transcribe AudioData with recognize(audio), answering repeats from
+        the cache; transcripts for which cacheable(transcript) is false are
+        never stored
+        """
+        with span("recognition_cache.lookup") as current:
+            try:
+                fp = fingerprint(audio)
+            except Exception as e:
+                record_error("Audio fingerprint", e)
+                fp = None
+            transcript = self.lookup(fp)
+            if current is not None:
+                current.attrs["hit"] = transcript is not None
+        if transcript is None:
+            transcript = recognize(audio)
+            if cacheable is None or cacheable(transcript):
+                self.store(fp, transcript)
+        return transcript
+
+
+recognition_cache = RecognitionCache()
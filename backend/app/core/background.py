@@ -0,0 +1,41 @@
+import threading
+
+from .tracing import tracer, record_error
+
+
+class PeriodicTask:
+    """
+    Run a function on a daemon thread every `interval` seconds
+    """
+    def __init__(self, name, func, interval, run_immediately=True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_immediately = run_immediately
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread if it is not already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the background thread to exit after the current run"""
+        self._stop.set()
+
+    def _run(self):
+        if not self.run_immediately and self._stop.wait(self.interval):
+            return
+        while True:
+            # Each run is a trace, so its errors and slow steps are logged like a request's
+            with tracer.trace(self.name):
+                try:
+                    self.func()
+                except Exception as e:
+                    record_error(self.name, e)
+            if self._stop.wait(self.interval):
+                return
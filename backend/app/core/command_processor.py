@@ -1,5 +1,8 @@
 import re
 from .utils import speak, get_time, get_date, get_weather
+from .fuzzy_intents import NGramIndex
+from .intents import FUZZY_INTENT_THRESHOLD
+from .tracing import span
 from ..functions.info_functions import (
     search_wikipedia, search_web, get_news,
     get_movie_info, ask_wolfram_alpha, get_joke
@@ -53,8 +56,29 @@ class CommandProcessor:
             r'set a reminder for (.+)(?: at (.+))?': lambda match: create_reminder(
                 match.group(1), match.group(2) if len(match.groups()) > 1 else None
             ),
-            
-            # General knowledge (Wolfram Alpha)
+        }
+        
+        # Typo-tolerant matching for parameterless commands, tried before
+        # anything is sent to Wolfram Alpha
+        self.fuzzy_commands = {
+            'time': get_time,
+            'date': get_date,
+            'news': get_news,
+            'joke': get_joke,
+            'screenshot': take_screenshot,
+            'system_info': get_system_info,
+        }
+        self.fuzzy_index = NGramIndex({
+            'time': ['what time is it', 'what is the time'],
+            'date': ['what is the date', 'what day is it'],
+            'news': ['tell me the news', 'what are the headlines'],
+            'joke': ['tell me a joke', 'make me laugh', 'say something funny'],
+            'screenshot': ['take a screenshot'],
+            'system_info': ['system information', 'computer specs'],
+        })
+        
+        # General knowledge (Wolfram Alpha)
+        self.knowledge_patterns = {
             r'(who|what|when|where|why|how) (.+)': lambda match: ask_wolfram_alpha(match.group(0)),
             r'calculate (.+)': lambda match: ask_wolfram_alpha(match.group(1)),
             r'compute (.+)': lambda match: ask_wolfram_alpha(match.group(1)),
@@ -111,8 +135,20 @@ class CommandProcessor:
         for pattern, handler in self.commands.items():
             match = re.search(pattern, query)
             if match:
-                result = handler(match)
-                return result
+                with span("command_processor.handler", pattern=pattern):
+                    return handler(match)
+        
+        # Close but misrecognized commands, e.g. "what tme is it"
+        intent, score, _ = self.fuzzy_index.match(query)
+        if score >= FUZZY_INTENT_THRESHOLD:
+            with span("command_processor.handler", intent=intent):
+                return self.fuzzy_commands[intent]()
+        
+        for pattern, handler in self.knowledge_patterns.items():
+            match = re.search(pattern, query)
+            if match:
+                with span("command_processor.handler", pattern=pattern):
+                    return handler(match)
         
         # If no pattern matches, try Wolfram Alpha as a fallback
         try:
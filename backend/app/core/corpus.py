@@ -0,0 +1,101 @@
+import os
+import random
+import threading
+from array import array
+
+from . import http
+from .background import PeriodicTask
+from .tracing import record_error
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+ADVICE_URL = "https://api.adviceslip.com/advice"
+ADVICE_REFRESH_INTERVAL = int(os.getenv("ADVICE_REFRESH_INTERVAL", "900"))
+
+
+class ShuffledPool:
+    """
+    A fixed set of strings sampled without repetition until the pool is exhausted
+
+    Items live in a list and the draw order is a shuffled array of indices,
+    so every sample is a single array lookup.
+    """
+    def __init__(self, items=()):
+        self._lock = threading.Lock()
+        self._items = []
+        self._seen = set()
+        self._order = array('I')
+        self._cursor = 0
+        self.extend(items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def extend(self, items):
+        """Add new unique items; they join the current round at a random position"""
+        added = 0
+        with self._lock:
+            for item in items:
+                item = item.strip()
+                if not item or item in self._seen:
+                    continue
+                self._seen.add(item)
+                self._items.append(item)
+                self._order.append(len(self._items) - 1)
+                # Swap the new index into the not-yet-drawn part of the round
+                swap = random.randint(self._cursor, len(self._order) - 1)
+                self._order[-1], self._order[swap] = self._order[swap], self._order[-1]
+                added += 1
+        return added
+
+    def sample(self):
+        """Return the next item, reshuffling once every item has been drawn"""
+        with self._lock:
+            if not self._items:
+                return None
+            if self._cursor >= len(self._order):
+                random.shuffle(self._order)
+                self._cursor = 0
+            item = self._items[self._order[self._cursor]]
+            self._cursor += 1
+            return item
+
+
+def _read_lines(filename):
+    """Read one entry per line from a bundled data file"""
+    path = os.path.join(DATA_DIR, filename)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError as e:
+        record_error("Corpus", e)
+        return []
+
+
+def _load_jokes():
+    """Load every pyjokes joke once, falling back to the bundled file"""
+    jokes = []
+    try:
+        import pyjokes
+        jokes = pyjokes.get_jokes(language="en", category="all")
+    except Exception as e:
+        record_error("Corpus", e)
+    return list(jokes) + _read_lines("jokes.txt")
+
+
+jokes = ShuffledPool(_load_jokes())
+advice = ShuffledPool(_read_lines("advice.txt"))
+
+
+def _refresh_advice():
+    """Pull a fresh slip from the advice API into the local pool"""
+    res = http.get(ADVICE_URL).json()
+    advice.extend([res['slip']['advice']])
+
+
+advice_refresher = PeriodicTask("advice-refresh", _refresh_advice, ADVICE_REFRESH_INTERVAL)
+
+
+def start_background_refresh():
+    """Start refreshing the advice pool from the remote API"""
+    advice_refresher.start()
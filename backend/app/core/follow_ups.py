@@ -0,0 +1,104 @@
+import re
+
+from .intents import match_intent
+from .plugins import Reply
+from .slots import cities
+
+WEATHER_CACHE_TTL = 600
+WIKIPEDIA_CHUNK = 2
+
+MORE_PATTERN = re.compile(r"^(tell me more|more|go on|continue|what else|and then)\b")
+REPEAT_PATTERN = re.compile(r"^(repeat( that)?|say (that|it) again|come again|pardon)\b")
+OTHER_CITY_PATTERN = re.compile(r"^(?:and |what about |how about )(?:in |the weather in )?([a-z][a-z .'-]+?)\??$")
+WEATHER_DETAIL_PATTERN = re.compile(r"\b(temperature|feel|feels|hot|cold|warm|weather|outside)\b")
+LATER_PATTERN = re.compile(r"\b(tomorrow|tonight|later|next week|weekend)\b")
+
+NOT_A_CITY = {"you", "me", "it", "that", "this", "how", "what", "why", "when", "there"}
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    return [s for s in SENTENCE_SPLIT.split(text.strip()) if s]
+
+
+def remember_weather(session, city, report):
+    """
+    Store a weather report so follow-ups can be answered from the session;
+    only successful lookups are stored
+    """
+    session.slots["last_city"] = city
+    session.cache_put(f"weather:{city.lower()}", report)
+
+
+def remember_wikipedia(session, topic, summary, shown):
+    """Store a Wikipedia summary and how many sentences have been read out"""
+    session.slots["last_topic"] = topic
+    session.cache_put(f"wikipedia:{topic.lower()}", {"sentences": split_sentences(summary), "shown": shown})
+
+
+def _other_city(query):
+    match = OTHER_CITY_PATTERN.match(query)
+    if match is None or LATER_PATTERN.search(query):
+        return None
+    city = match.group(1).strip()
+    if city.split()[0] in NOT_A_CITY or WEATHER_DETAIL_PATTERN.search(city):
+        return None
+    # "how about a joke" or "and open notepad" is a new command, not a city
+    if cities.find(city) is None and match_intent(query)[0] not in (None, "weather"):
+        return None
+    return city.title()
+
+
+def weather_sentence(city, report):
+    weather, temperature, feels_like = report
+    return f"The current temperature in {city} is {temperature}, but it feels like {feels_like}. The weather is {weather}."
+
+
+def resolve_follow_up(session, query, fetch_weather=None):
+    """
+    Answer a follow-up from session state. Returns (intent, response), or
+    None when the query is not a follow-up the session can answer.
+    fetch_weather(city) raises when the lookup fails.
+    """
+    query = query.lower().strip()
+    last_intent = session.slots.get("last_intent")
+
+    if REPEAT_PATTERN.match(query) and session.last_response():
+        return last_intent, session.last_response()
+
+    if last_intent == "wikipedia" and MORE_PATTERN.match(query):
+        topic = session.slots.get("last_topic", "")
+        entry = session.cache_get(f"wikipedia:{topic.lower()}")
+        if entry is None:
+            return None
+        sentences, shown = entry["sentences"], entry["shown"]
+        if shown >= len(sentences):
+            return "wikipedia", f"That's all I have on {topic}."
+        entry["shown"] = shown + WIKIPEDIA_CHUNK
+        return "wikipedia", " ".join(sentences[shown:shown + WIKIPEDIA_CHUNK])
+
+    if last_intent == "weather":
+        city = session.slots.get("last_city")
+        other_city = _other_city(query)
+        if other_city and fetch_weather is not None:
+            city = other_city
+            report = session.cache_get(f"weather:{city.lower()}", WEATHER_CACHE_TTL)
+            if report is None:
+                try:
+                    report = fetch_weather(city)
+                except Exception as e:
+                    # The last good report stays the one follow-ups refer to
+                    return "weather", Reply(str(e), data={"city": city}, success=False)
+            remember_weather(session, city, report)
+            return "weather", weather_sentence(city, report)
+        report = session.cache_get(f"weather:{(city or '').lower()}", WEATHER_CACHE_TTL)
+        if report is None:
+            return None
+        if LATER_PATTERN.search(query):
+            return "weather", f"I only have current conditions for {city}. {weather_sentence(city, report)}"
+        if ((WEATHER_DETAIL_PATTERN.search(query) or query.startswith("and"))
+                and match_intent(query)[0] in (None, "weather")):
+            return "weather", weather_sentence(city, report)
+
+    return None
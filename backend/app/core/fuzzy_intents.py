@@ -0,0 +1,67 @@
+import re
+from collections import defaultdict
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase and drop spaces and punctuation, so "whats app" and "whatsapp" agree"""
+    return NON_ALNUM.sub("", text.lower())
+
+
+def ngrams(text, n=3):
+    """Set of character n-grams of already-normalized text"""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NGramIndex:
+    """
+    Character n-gram inverted index over intent phrases
+
+    A phrase scores by how many of its n-grams appear in the query
+    (containment), so a phrase embedded in a longer utterance still scores
+    high and a typo only costs the few n-grams that touch it. The index is
+    built once; a lookup touches only the postings for the query's n-grams.
+    Phrases with fewer than `min_grams` n-grams are too short to match
+    fuzzily and are left to exact matching.
+    """
+    def __init__(self, phrases, n=3, min_grams=4):
+        self.n = n
+        self._phrases = []
+        self._sizes = []
+        self._postings = defaultdict(list)
+        for intent, intent_phrases in phrases.items():
+            for phrase in intent_phrases:
+                grams = ngrams(normalize(phrase), n)
+                if len(grams) < min_grams:
+                    continue
+                phrase_id = len(self._phrases)
+                self._phrases.append((intent, phrase))
+                self._sizes.append(len(grams))
+                for gram in grams:
+                    self._postings[gram].append(phrase_id)
+
+    def scores(self, query):
+        """Return {phrase_id: containment score} for phrases sharing any n-gram"""
+        overlap = defaultdict(int)
+        for gram in ngrams(normalize(query), self.n):
+            for phrase_id in self._postings.get(gram, ()):
+                overlap[phrase_id] += 1
+        return {phrase_id: count / self._sizes[phrase_id] for phrase_id, count in overlap.items()}
+
+    def match(self, query):
+        """
+        Best (intent, score, phrase) for a query, or (None, 0.0, None).
+        Ties go to the longer phrase, which carries more evidence.
+        """
+        best_id, best_key = None, (0.0, 0)
+        for phrase_id, score in self.scores(query).items():
+            key = (score, self._sizes[phrase_id])
+            if key > best_key:
+                best_id, best_key = phrase_id, key
+        if best_id is None:
+            return None, 0.0, None
+        intent, phrase = self._phrases[best_id]
+        return intent, best_key[0], phrase
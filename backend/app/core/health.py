@@ -0,0 +1,83 @@
+import asyncio
+import json
+import threading
+import time
+
+HEALTH_STREAM_INTERVAL = 1.0
+HEALTH_STREAM_HEARTBEAT = 15.0
+
+
+class HealthRegistry:
+    """
+    Named readiness checks that are cheap enough to run on every /health call
+
+    A check returns True/False or a (ok, detail) tuple. The service is ready
+    when every critical check passes; non-critical checks are reported but
+    never make it unready.
+    """
+    def __init__(self):
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, check, critical=True):
+        with self._lock:
+            self._checks[name] = (check, critical)
+
+    def snapshot(self):
+        """Run every check and return the readiness report"""
+        with self._lock:
+            checks = list(self._checks.items())
+        results = {}
+        ready = True
+        for name, (check, critical) in checks:
+            try:
+                outcome = check()
+            except Exception as e:
+                outcome = (False, str(e))
+            ok, detail = outcome if isinstance(outcome, tuple) else (bool(outcome), None)
+            results[name] = {"ok": ok, "critical": critical, "detail": detail}
+            if critical and not ok:
+                ready = False
+        return {"ready": ready, "checks": results}
+
+    async def stream(self):
+        """
+        Server-sent events: emit the report whenever it changes, with a
+        comment heartbeat in between so proxies keep the connection open
+        """
+        last = None
+        last_sent = 0.0
+        while True:
+            report = await asyncio.to_thread(self.snapshot)
+            encoded = json.dumps(report)
+            now = time.monotonic()
+            if encoded != last:
+                yield f"event: health\ndata: {encoded}\n\n"
+                last = encoded
+                last_sent = now
+            elif now - last_sent >= HEALTH_STREAM_HEARTBEAT:
+                yield ": ping\n\n"
+                last_sent = now
+            await asyncio.sleep(HEALTH_STREAM_INTERVAL)
+
+
+class CachedCheck:
+    """Wrap an expensive check so it runs at most once every `ttl` seconds"""
+    def __init__(self, check, ttl=60.0):
+        self.check = check
+        self.ttl = ttl
+        self._value = None
+        self._checked_at = None
+
+    def __call__(self):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.ttl:
+            try:
+                self._value = self.check()
+            except Exception as e:
+                self._value = (False, str(e))
+            self._checked_at = now
+        return self._value
+
+
+health = HealthRegistry()
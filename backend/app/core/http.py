@@ -0,0 +1,33 @@
+import os
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .tracing import span
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+
+# One shared session so connections to upstream APIs are pooled and reused
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
+
+def warm(urls):
+    """Open pooled connections (DNS, TCP and TLS) to upstream hosts ahead of use"""
+    for url in urls:
+        try:
+            session.head(url, timeout=HTTP_TIMEOUT, allow_redirects=False)
+        except requests.RequestException:
+            pass
+
+
+def get(url, **kwargs):
+    """GET through the shared session with a default timeout"""
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    with span("http.get", host=urlsplit(url).netloc) as current:
+        response = session.get(url, **kwargs)
+        if current is not None:
+            current.attrs["status"] = response.status_code
+        return response
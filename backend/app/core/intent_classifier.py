@@ -0,0 +1,190 @@
+"""
+Local intent classifier: hashed TF-IDF features and a linear softmax model.
+
+Train from the YAML of example utterances and save the model with
+
+    python -m app.core.intent_classifier train [intents.yaml] [model.npz]
+
+Scoring an utterance is one matrix-vector product; a batch is one
+matrix-matrix product.
+"""
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+
+from .tracing import record_error
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+INTENTS_YAML_PATH = os.getenv("INTENTS_YAML_PATH", os.path.join(DATA_DIR, "intents.yaml"))
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", os.path.join(DATA_DIR, "intent_model.npz"))
+
+FEATURE_DIM = 4096
+NO_INTENT = "none"
+BATCH_CHUNK = 512
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode("utf-8")) % FEATURE_DIM
+
+
+def feature_ids(text):
+    """
+    Hashed feature ids for an utterance: words, word bigrams and character
+    trigrams of each word, so small misspellings still share most features
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    ids = []
+    for i, word in enumerate(words):
+        ids.append(_hash("w:" + word))
+        if i:
+            ids.append(_hash("b:" + words[i - 1] + " " + word))
+        padded = f"<{word}>"
+        for j in range(len(padded) - 2):
+            ids.append(_hash("c:" + padded[j:j + 3]))
+    return ids
+
+
+def term_frequencies(texts):
+    """Sublinear term-frequency matrix, one row per text"""
+    matrix = np.zeros((len(texts), FEATURE_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        ids = feature_ids(text)
+        if ids:
+            np.add.at(matrix[row], ids, 1.0)
+    np.log1p(matrix, out=matrix)
+    return matrix
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=-1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class IntentClassifier:
+    """
+    Linear softmax model over hashed TF-IDF features
+    """
+    def __init__(self, labels, weights, bias, idf):
+        self.labels = list(labels)
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.idf = idf.astype(np.float32)
+
+    def vectorize(self, texts):
+        return _normalize_rows(term_frequencies(texts) * self.idf)
+
+    def predict_proba(self, texts):
+        """Class probabilities, one row per text"""
+        out = np.empty((len(texts), len(self.labels)), dtype=np.float32)
+        for start in range(0, len(texts), BATCH_CHUNK):
+            chunk = self.vectorize(texts[start:start + BATCH_CHUNK])
+            out[start:start + len(chunk)] = _softmax(chunk @ self.weights.T + self.bias)
+        return out
+
+    def classify(self, text):
+        """Return (intent, probability); intent is None for the no-intent class"""
+        features = self.vectorize([text])[0]
+        probs = _softmax(self.weights @ features + self.bias)
+        best = int(probs.argmax())
+        label = self.labels[best]
+        return (None if label == NO_INTENT else label), float(probs[best])
+
+    def classify_batch(self, texts):
+        """Classify many utterances at once; returns a list of (intent, probability)"""
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [
+            (None if self.labels[i] == NO_INTENT else self.labels[i], float(probs[row, i]))
+            for row, i in enumerate(best)
+        ]
+
+    @classmethod
+    def train(cls, examples, epochs=500, learning_rate=5.0, l2=1e-4):
+        """
+        Fit on {intent: [utterances]} with full-batch gradient descent
+        on the cross-entropy loss
+        """
+        labels = sorted(examples)
+        texts, targets = [], []
+        for index, label in enumerate(labels):
+            for utterance in examples[label]:
+                texts.append(utterance)
+                targets.append(index)
+        targets = np.array(targets)
+
+        tf = term_frequencies(texts)
+        document_frequency = (tf > 0).sum(axis=0)
+        idf = (np.log((1.0 + len(texts)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        features = _normalize_rows(tf * idf)
+
+        onehot = np.zeros((len(texts), len(labels)), dtype=np.float32)
+        onehot[np.arange(len(texts)), targets] = 1.0
+        weights = np.zeros((len(labels), FEATURE_DIM), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(epochs):
+            error = _softmax(features @ weights.T + bias) - onehot
+            weights -= learning_rate * (error.T @ features / len(texts) + l2 * weights)
+            bias -= learning_rate * error.mean(axis=0)
+        return cls(labels, weights, bias, idf)
+
+    def save(self, path):
+        """Write the model as a compressed .npz file"""
+        np.savez_compressed(path, labels=np.array(self.labels), weights=self.weights.astype(np.float16),
+                            bias=self.bias, idf=self.idf.astype(np.float16))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["labels"].tolist(), data["weights"], data["bias"], data["idf"])
+
+
+def load_examples(path=INTENTS_YAML_PATH):
+    """Read {intent: [utterances]} from the training YAML"""
+    import yaml
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def load_classifier(model_path=INTENT_MODEL_PATH, yaml_path=INTENTS_YAML_PATH):
+    """
+    Load the serialized model, retraining it first if it is missing or
+    older than the training YAML
+    """
+    if (not os.path.exists(model_path)
+            or os.path.getmtime(model_path) < os.path.getmtime(yaml_path)):
+        classifier = IntentClassifier.train(load_examples(yaml_path))
+        try:
+            classifier.save(model_path)
+        except OSError as e:
+            record_error("Intent model not saved", e)
+        return classifier
+    return IntentClassifier.load(model_path)
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "train":
+        print(__doc__)
+        return 1
+    yaml_path = argv[2] if len(argv) > 2 else INTENTS_YAML_PATH
+    model_path = argv[3] if len(argv) > 3 else INTENT_MODEL_PATH
+    classifier = IntentClassifier.train(load_examples(yaml_path))
+    classifier.save(model_path)
+    print(f"Saved {len(classifier.labels)} intents to {model_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,148 @@
+import os
+import threading
+
+from .fuzzy_intents import NGramIndex
+from .tracing import record_error
+
+FUZZY_INTENT_THRESHOLD = float(os.getenv("FUZZY_INTENT_THRESHOLD", "0.65"))
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.45"))
+USE_INTENT_CLASSIFIER = os.getenv("USE_INTENT_CLASSIFIER", "true").lower() in ("1", "true", "yes")
+
+# Single words that are a command only when they are the whole query, so
+# "how do i stop the kettle" or "my laptop is up to date" are not commands
+BARE_WORDS = {
+    "exit": "exit",
+    "stop": "exit",
+    "bye": "exit",
+    "goodbye": "exit",
+    "quit": "exit",
+    "joke": "joke",
+    "time": "time",
+    "date": "date",
+}
+
+# Exact keyword rules, checked in order. Each rule matches when every
+# substring of any one of its alternatives is in the query. Casual intents
+# need a phrase here; their bare words are in BARE_WORDS.
+KEYWORD_RULES = [
+    ("exit", [("goodbye",), ("bye bye",), ("stop listening",), ("exit talksy",), ("that's all for now",)]),
+    ("joke", [("a joke",), ("another joke",), ("something funny",), ("make me laugh",)]),
+    ("advice", [("advice",)]),
+    ("ip_address", [("ip address",)]),
+    ("wikipedia", [("wikipedia", "search")]),
+    ("youtube", [("youtube", "play")]),
+    ("google", [("search", "google")]),
+    ("whatsapp", [("whatsapp message",)]),
+    ("email", [("email",)]),
+    ("news", [("news",)]),
+    ("weather", [("weather",)]),
+    # Not "what time": "what time does the store close" asks about something else
+    ("time", [("time is it",), ("time it is",), ("the time",), ("current time",)]),
+    ("date", [("what date",), ("the date",), ("today's date",), ("todays date",), ("date today",), ("what day is it",)]),
+    ("open_notepad", [("open notepad",)]),
+    ("open_discord", [("open discord",)]),
+    ("open_cmd", [("open command prompt",), ("open cmd",)]),
+    ("open_camera", [("open camera",)]),
+    ("open_calculator", [("open calculator",)]),
+]
+
+# Catch-all rules, checked only after the fuzzy index had no confident match
+GENERIC_RULES = [
+    ("open_app", [("open ",), ("launch ",)]),
+]
+
+# Canonical phrases for the fuzzy index. Only phrases long enough to carry
+# several n-grams are indexed, so short keywords stay exact-only.
+INTENT_PHRASES = {
+    "exit": ["goodbye", "see you later", "that's all for now"],
+    "joke": ["tell me a joke", "make me laugh", "something funny"],
+    "advice": ["give me some advice", "any advice"],
+    "ip_address": ["ip address", "what is my ip"],
+    "wikipedia": ["search wikipedia", "wikipedia search"],
+    "youtube": ["play on youtube", "youtube play"],
+    "google": ["search google", "google search"],
+    "whatsapp": ["whatsapp message", "send a whatsapp message"],
+    "email": ["send an email", "email message"],
+    "news": ["latest news", "news headlines", "what are the headlines"],
+    "weather": ["weather report", "what's the weather"],
+    "time": ["what time is it", "current time"],
+    "date": ["what is the date", "today's date"],
+    "open_notepad": ["open notepad"],
+    "open_discord": ["open discord"],
+    "open_cmd": ["open command prompt", "open cmd", "open terminal"],
+    "open_camera": ["open camera"],
+    "open_calculator": ["open calculator"],
+}
+
+
+def match_keywords(query, rules=KEYWORD_RULES, words=BARE_WORDS):
+    """First intent whose bare word or keyword rule matches the query, or None"""
+    word = query.strip(" .,!?")
+    if word in words:
+        return words[word]
+    for intent, alternatives in rules:
+        for required in alternatives:
+            if all(keyword in query for keyword in required):
+                return intent
+    return None
+
+
+fuzzy_index = NGramIndex(INTENT_PHRASES)
+
+_classifier = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """Load the local intent classifier once; None if it is disabled or unavailable"""
+    global _classifier, _classifier_loaded
+    if not USE_INTENT_CLASSIFIER:
+        return None
+    with _classifier_lock:
+        if not _classifier_loaded:
+            try:
+                from .intent_classifier import load_classifier
+                _classifier = load_classifier()
+            except Exception as e:
+                record_error("Intent classifier unavailable", e)
+                _classifier = None
+            _classifier_loaded = True
+    return _classifier
+
+
+def match_rules(query, threshold=FUZZY_INTENT_THRESHOLD):
+    """
+    Resolve a query with the keyword rules, then the fuzzy index if it is
+    confident enough. Returns (intent, score); intent is None below threshold.
+    """
+    intent = match_keywords(query)
+    if intent is not None:
+        return intent, 1.0
+    intent, score, _ = fuzzy_index.match(query)
+    if score >= threshold:
+        return intent, score
+    generic = match_keywords(query, GENERIC_RULES, words={})
+    if generic is not None:
+        return generic, 1.0
+    return None, score
+
+
+def match_intent(query):
+    """
+    Resolve a lowercased query to (intent, score). A confident classifier
+    answer wins, including a confident "no command", so a word like "stop"
+    inside an unrelated sentence does not trigger exit. Otherwise the
+    keyword rules and fuzzy index decide.
+    """
+    classifier = get_classifier()
+    if classifier is not None:
+        intent, probability = classifier.classify(query)
+        if probability >= INTENT_CLASSIFIER_THRESHOLD:
+            if intent == "open_app":
+                # A misheard "open notpad" is still the dedicated notepad command
+                specific, score, _ = fuzzy_index.match(query)
+                if score >= FUZZY_INTENT_THRESHOLD and specific.startswith("open_"):
+                    return specific, score
+            return intent, probability
+    return match_rules(query)
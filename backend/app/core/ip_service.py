@@ -0,0 +1,98 @@
+import ipaddress
+import os
+import socket
+import threading
+import time
+
+from . import http
+from .background import PeriodicTask
+from .tracing import record_error
+
+IP_LOOKUP_URL = "https://api64.ipify.org?format=json"
+IP_CACHE_TTL = int(os.getenv("IP_CACHE_TTL", "1800"))
+# Report the local interface address only and never call the lookup service
+IP_LOOKUP_OFFLINE = os.getenv("IP_LOOKUP_OFFLINE", "false").lower() in ("1", "true", "yes")
+
+
+def local_ip():
+    """
+    Find the primary local interface address without touching the network
+    """
+    try:
+        import psutil
+        candidates = []
+        for name, addrs in psutil.net_if_addrs().items():
+            for addr in addrs:
+                if addr.family not in (socket.AF_INET, socket.AF_INET6):
+                    continue
+                try:
+                    ip = ipaddress.ip_address(addr.address.split('%')[0])
+                except ValueError:
+                    continue
+                if ip.is_loopback or ip.is_link_local:
+                    continue
+                candidates.append(ip)
+        # Prefer IPv4, then global addresses over private ones
+        candidates.sort(key=lambda ip: (ip.version != 4, not ip.is_global))
+        return str(candidates[0]) if candidates else None
+    except Exception as e:
+        record_error("Local IP", e)
+        return None
+
+
+class IPService:
+    """
+    Cache the external IP address and refresh it in the background
+    """
+    def __init__(self, ttl=IP_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ip = None
+        self._fetched_at = 0.0
+        self.last_error = None
+        self._refresher = PeriodicTask("ip-refresh", self.refresh, ttl)
+
+    def refresh(self):
+        """Resolve the external IP address and store it"""
+        try:
+            ip = http.get(IP_LOOKUP_URL).json()["ip"]
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        with self._lock:
+            self._ip = ip
+            self._fetched_at = time.monotonic()
+            self.last_error = None
+        return ip
+
+    def is_fresh(self):
+        """True while the cached address is younger than the TTL"""
+        with self._lock:
+            return self._ip is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    def get(self):
+        """
+        Return the cached external IP, resolving it again once it is older
+        than the TTL. When the lookup fails the last known address is
+        returned, or the local interface address if there is none.
+        """
+        if IP_LOOKUP_OFFLINE:
+            return local_ip()
+        if self.is_fresh():
+            with self._lock:
+                return self._ip
+        try:
+            return self.refresh()
+        except Exception:
+            with self._lock:
+                ip = self._ip
+            return ip if ip is not None else local_ip()
+
+    def start(self):
+        """Start refreshing the cached address every TTL seconds"""
+        if IP_LOOKUP_OFFLINE:
+            return
+        self._refresher.start()
+
+
+ip_service = IPService()
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from .background import PeriodicTask
+from .tracing import tracer, current_trace_id, record_error
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(os.path.expanduser("~"), ".talksy", "jobs.sqlite3"))
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+# Seconds finished jobs (and their idempotency keys) are kept before deletion
+JOBS_RETENTION = float(os.getenv("JOBS_RETENTION", str(7 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    idempotency_key TEXT UNIQUE,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at);
+"""
+
+COLUMNS = ("id", "kind", "payload", "status", "result", "error", "idempotency_key", "created_at", "updated_at")
+
+
+class JobQueue:
+    """
+    SQLite-backed queue for slow side-effect commands
+
+    Jobs are persisted before they are acknowledged and run on a small pool
+    of worker threads, so request handlers only insert a row and return.
+    Jobs still marked running after a restart are queued again. Succeeded
+    and failed jobs are deleted once they are older than `retention` seconds.
+    """
+    def __init__(self, db_path=JOBS_DB_PATH, workers=JOBS_WORKERS, retention=JOBS_RETENTION):
+        self.db_path = db_path
+        self.workers = workers
+        self.retention = retention
+        self._pruner = PeriodicTask("jobs-prune", self.prune, min(retention, 3600))
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def register(self, kind, handler):
+        """Register the function that runs jobs of a kind; it receives the payload dict"""
+        self._handlers[kind] = handler
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(zip(COLUMNS, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _select(self, where, params):
+        row = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE {where}", params
+        ).fetchone()
+        return self._row_to_job(row)
+
+    def submit(self, kind, payload, idempotency_key=None):
+        """
+        Queue a job and return it. A repeated idempotency key returns the
+        job created by the first submission instead of running it again.
+        The id of the submitting request's trace is kept in the payload.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        trace_id = current_trace_id()
+        if trace_id:
+            payload = {**payload, "trace_id": trace_id}
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            if idempotency_key:
+                existing = self._select("idempotency_key = ?", (idempotency_key,))
+                if existing is not None:
+                    return existing
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, idempotency_key, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), idempotency_key, now, now)
+            )
+            self._wakeup.notify()
+            return self._select("id = ?", (job_id,))
+
+    def get(self, job_id):
+        """Return a job by id, or None"""
+        with self._lock:
+            return self._select("id = ?", (job_id,))
+
+    def _claim(self):
+        """Wait for the oldest queued job and mark it running"""
+        with self._lock:
+            while True:
+                job = self._select("status = 'queued' ORDER BY created_at LIMIT 1", ())
+                if job is not None:
+                    self._connect().execute(
+                        "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                        (time.time(), job["id"])
+                    )
+                    return job
+                self._wakeup.wait()
+
+    def _complete(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+
+    def _worker(self):
+        while True:
+            job = self._claim()
+            handler = self._handlers.get(job["kind"])
+            with tracer.trace(f"job {job['kind']}") as trace:
+                trace.attrs["job_id"] = job["id"]
+                if job["payload"].get("trace_id"):
+                    trace.attrs["request_trace_id"] = job["payload"]["trace_id"]
+                try:
+                    if handler is None:
+                        raise ValueError(f"No handler for job kind: {job['kind']}")
+                    result = handler(job["payload"])
+                    self._complete(job["id"], "succeeded", result=result)
+                except Exception as e:
+                    record_error(f"Job ({job['kind']})", e)
+                    self._complete(job["id"], "failed", error=str(e))
+
+    def prune(self):
+        """Delete finished jobs older than the retention period; returns how many"""
+        with self._lock:
+            return self._connect().execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+                (time.time() - self.retention,)
+            ).rowcount
+
+    def running(self):
+        """True once the worker threads are up"""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Requeue interrupted jobs and start the worker threads"""
+        if self._threads:
+            return
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._pruner.start()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,257 @@
+import glob
+import os
+import platform
+import shlex
+import subprocess
+import threading
+
+from .background import PeriodicTask
+
+IS_WINDOWS = platform.system() == 'Windows'
+LAUNCHER_RESCAN_INTERVAL = int(os.getenv("LAUNCHER_RESCAN_INTERVAL", "30"))
+# Extra directories to index, separated like PATH
+LAUNCHER_APP_DIRS = [d for d in os.getenv("LAUNCHER_APP_DIRS", "").split(os.pathsep) if d]
+# PATH executables that may be opened by name. Other PATH programs are only
+# reachable through ALIASES, so "open shutdown" does not run /usr/sbin/shutdown.
+LAUNCHER_ALLOWED_COMMANDS = {c.strip().lower() for c in os.getenv("LAUNCHER_ALLOWED_COMMANDS", "").split(",")
+                             if c.strip()}
+
+# Spoken names mapped to the executables or desktop entries that provide them,
+# in order of preference
+ALIASES = {
+    "notepad": ["notepad", "gnome-text-editor", "gedit", "kate", "mousepad", "textedit"],
+    "text editor": ["notepad", "gnome-text-editor", "gedit", "kate", "mousepad", "textedit"],
+    "calculator": ["calc", "gnome-calculator", "kcalc", "galculator", "calculator"],
+    "calc": ["calc", "gnome-calculator", "kcalc", "galculator", "calculator"],
+    "cmd": ["cmd", "x-terminal-emulator", "gnome-terminal", "konsole", "xfce4-terminal", "xterm", "terminal"],
+    "command prompt": ["cmd", "x-terminal-emulator", "gnome-terminal", "konsole", "xfce4-terminal", "xterm", "terminal"],
+    "terminal": ["x-terminal-emulator", "gnome-terminal", "konsole", "xfce4-terminal", "xterm", "terminal", "cmd"],
+    "camera": ["microsoft.windows.camera:", "cheese", "guvcview", "snapshot", "photo booth"],
+    "discord": ["discord", "discord:"],
+    "chrome": ["chrome", "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "google chrome"],
+    "firefox": ["firefox"],
+    "word": ["winword", "libreoffice --writer", "microsoft word"],
+    "excel": ["excel", "libreoffice --calc", "microsoft excel"],
+    "powerpoint": ["powerpnt", "libreoffice --impress", "microsoft powerpoint"],
+    "paint": ["mspaint", "kolourpaint", "pinta", "gimp"],
+    "control panel": ["control", "gnome-control-center", "systemsettings"],
+    "task manager": ["taskmgr", "gnome-system-monitor", "plasma-systemmonitor", "ksysguard"],
+    "file explorer": ["explorer", "nautilus", "dolphin", "thunar", "nemo", "finder"],
+}
+
+# URI schemes and commands that are not files on disk
+WINDOWS_ENTRIES = {
+    "microsoft.windows.camera:": ("uri", "microsoft.windows.camera:"),
+    "discord:": ("uri", "discord:"),
+}
+LIBREOFFICE_ENTRIES = {
+    "libreoffice --writer": ("command", ["libreoffice", "--writer"]),
+    "libreoffice --calc": ("command", ["libreoffice", "--calc"]),
+    "libreoffice --impress": ("command", ["libreoffice", "--impress"]),
+}
+
+
+def _desktop_dirs():
+    data_home = os.getenv("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+    data_dirs = os.getenv("XDG_DATA_DIRS", "/usr/local/share:/usr/share").split(":")
+    dirs = [os.path.join(d, "applications") for d in [data_home] + data_dirs]
+    dirs.append("/var/lib/flatpak/exports/share/applications")
+    return dirs
+
+
+def _windows_dirs():
+    dirs = []
+    for var in ("ProgramData", "APPDATA"):
+        base = os.getenv(var)
+        if base:
+            dirs.append(os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"))
+    return dirs
+
+
+def _windows_globs():
+    local = os.getenv("LOCALAPPDATA")
+    if not local:
+        return []
+    return [os.path.join(local, "Discord", "app-*", "Discord.exe")]
+
+
+def _parse_desktop_file(path):
+    """Return (name, argv) for a launchable .desktop entry, or None"""
+    name, exec_line, hidden = None, None, False
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            in_entry = False
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    in_entry = line == "[Desktop Entry]"
+                elif in_entry and line.startswith("Name=") and name is None:
+                    name = line[5:]
+                elif in_entry and line.startswith("Exec="):
+                    exec_line = line[5:]
+                elif in_entry and line in ("NoDisplay=true", "Hidden=true"):
+                    hidden = True
+    except OSError:
+        return None
+    if not name or not exec_line or hidden:
+        return None
+    # Drop field codes such as %u and %F; nothing is passed to the app
+    argv = [arg for arg in shlex.split(exec_line) if not (len(arg) == 2 and arg.startswith("%"))]
+    return (name, argv) if argv else None
+
+
+class LauncherIndex:
+    """
+    Index of launchable applications built from desktop entries (Start
+    Menu shortcuts on Windows), configured directories and PATH
+
+    Applications are the desktop entries and configured directories. PATH
+    executables are kept apart: they are only launched as the target of an
+    alias or when listed in LAUNCHER_ALLOWED_COMMANDS.
+
+    The index is a plain dict, so resolving a name is a hash lookup. A
+    background task compares directory mtimes and rebuilds the index only
+    when something was installed or removed.
+    """
+    def __init__(self, extra_dirs=None, rescan_interval=LAUNCHER_RESCAN_INTERVAL,
+                 allowed_commands=None):
+        self.extra_dirs = extra_dirs if extra_dirs is not None else LAUNCHER_APP_DIRS
+        self.allowed_commands = allowed_commands if allowed_commands is not None else LAUNCHER_ALLOWED_COMMANDS
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._commands = {}
+        self._mtimes = None
+        self._watcher = PeriodicTask("launcher-rescan", self.refresh_if_changed, rescan_interval,
+                                     run_immediately=False)
+
+    def _path_dirs(self):
+        return [d for d in os.getenv("PATH", "").split(os.pathsep) if d]
+
+    def _watched_dirs(self):
+        dirs = self._path_dirs() + self.extra_dirs
+        dirs += _windows_dirs() if IS_WINDOWS else _desktop_dirs()
+        return dirs
+
+    def _snapshot(self):
+        mtimes = {}
+        for directory in self._watched_dirs():
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime
+            except OSError:
+                mtimes[directory] = None
+        return mtimes
+
+    def _scan_executables(self, directories, index):
+        executable_exts = (".exe", ".bat", ".cmd", ".com")
+        for directory in directories:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for filename in names:
+                path = os.path.join(directory, filename)
+                stem, ext = os.path.splitext(filename)
+                if IS_WINDOWS:
+                    if ext.lower() in executable_exts:
+                        index.setdefault(stem.lower(), ("command", [path]))
+                    elif ext.lower() == ".lnk":
+                        index.setdefault(stem.lower(), ("file", path))
+                elif os.access(path, os.X_OK) and not os.path.isdir(path):
+                    index.setdefault(filename.lower(), ("command", [path]))
+
+    def _scan(self):
+        """(applications, PATH commands)"""
+        entries = {}
+        commands = {}
+
+        def add(name, kind, target):
+            entries.setdefault(name.lower(), (kind, target))
+
+        self._scan_executables(self.extra_dirs, entries)
+        self._scan_executables(self._path_dirs(), commands)
+
+        if IS_WINDOWS:
+            for directory in _windows_dirs():
+                for path in glob.glob(os.path.join(directory, "**", "*.lnk"), recursive=True):
+                    add(os.path.splitext(os.path.basename(path))[0], "file", path)
+            for pattern in _windows_globs():
+                for path in sorted(glob.glob(pattern), reverse=True):
+                    add(os.path.splitext(os.path.basename(path))[0], "command", [path])
+        else:
+            for directory in _desktop_dirs():
+                for path in glob.glob(os.path.join(directory, "*.desktop")):
+                    parsed = _parse_desktop_file(path)
+                    if parsed:
+                        name, argv = parsed
+                        add(name, "command", argv)
+                        add(os.path.splitext(os.path.basename(path))[0], "command", argv)
+
+        builtins = dict(WINDOWS_ENTRIES) if IS_WINDOWS else {}
+        if "libreoffice" in entries or "libreoffice" in commands:
+            builtins.update(LIBREOFFICE_ENTRIES)
+        for name, entry in builtins.items():
+            add(name, *entry)
+        return entries, commands
+
+    def refresh(self):
+        """Rebuild the index from disk"""
+        mtimes = self._snapshot()
+        entries, commands = self._scan()
+        with self._lock:
+            self._entries = entries
+            self._commands = commands
+            self._mtimes = mtimes
+
+    def refresh_if_changed(self):
+        """Rebuild only when a watched directory has changed"""
+        if self._mtimes is None or self._snapshot() != self._mtimes:
+            self.refresh()
+
+    def resolve(self, name):
+        """Return (kind, target) for a spoken application name, or None"""
+        if self._mtimes is None:
+            self.refresh()
+        name = name.lower().strip()
+        with self._lock:
+            entries, commands = self._entries, self._commands
+        entry = entries.get(name)
+        if entry is None and name in self.allowed_commands:
+            entry = commands.get(name)
+        if entry is not None:
+            return entry
+        # Alias targets are a curated list, so they may be PATH programs
+        for candidate in ALIASES.get(name, []):
+            entry = entries.get(candidate) or commands.get(candidate)
+            if entry is not None:
+                return entry
+        return None
+
+    def launch(self, name):
+        """Start an application without waiting for it; True if it was found"""
+        entry = self.resolve(name)
+        if entry is None:
+            return False
+        kind, target = entry
+        if kind in ("uri", "file"):
+            if IS_WINDOWS:
+                os.startfile(target)
+            else:
+                opener = "open" if platform.system() == "Darwin" else "xdg-open"
+                subprocess.Popen([opener, target], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL, start_new_session=True)
+            return True
+        kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+        if IS_WINDOWS:
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        subprocess.Popen(target, **kwargs)
+        return True
+
+    def start(self):
+        """Build the index and start watching for changes"""
+        self.refresh()
+        self._watcher.start()
+
+
+launcher = LauncherIndex()
@@ -1,6 +1,8 @@
 import speech_recognition as sr
 import random
 from .utils import speak
+from .audio_cache import recognition_cache
+from .recognizers import get_backend
 
 class SpeechListener:
     def __init__(self):
@@ -28,7 +30,7 @@ class SpeechListener:
                 audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
                 print("Processing...")
                 
-                query = self.recognizer.recognize_google(audio, language='en-US')
+                query = recognition_cache.recognize(audio, get_backend().recognize)
                 query = query.lower()
                 print(f"User said: {query}")
                 
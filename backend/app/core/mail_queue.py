@@ -0,0 +1,314 @@
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from .tracing import tracer, span, current_trace_id, record_error
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+MAIL_SPOOL_DIR = os.getenv("MAIL_SPOOL_DIR", os.path.join(os.path.expanduser("~"), ".talksy", "mail_spool"))
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", "2"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "10"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_RETRY_BASE = float(os.getenv("MAIL_RETRY_BASE", "2"))
+# Finished jobs whose status (and idempotency key) stay in memory
+MAIL_STATUS_HISTORY = int(os.getenv("MAIL_STATUS_HISTORY", "1000"))
+
+STATUS_FIELDS = ("id", "to", "subject", "status", "attempts", "error")
+
+# Errors that retrying will not fix
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                    smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError)
+
+
+class SMTPConnectionPool:
+    """
+    A small pool of connected, authenticated SMTP sessions
+
+    Connections are checked with NOOP before reuse and replaced when the
+    server has dropped them.
+    """
+    def __init__(self, host, port, username=None, password=None, starttls=True,
+                 size=MAIL_POOL_SIZE, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    def acquire(self):
+        """Return an idle live connection, or open a new one"""
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except OSError:
+                # smtplib.SMTPException is an OSError too
+                pass
+            self.discard(server)
+
+    def release(self, server):
+        """Return a healthy connection to the pool"""
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self.discard(server)
+
+    def discard(self, server):
+        """Close a connection that should not be reused"""
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def close(self):
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class MailQueue:
+    """
+    Outbound email queue with an on-disk spool
+
+    Every job is written to the spool before it is acknowledged, so queued
+    mail survives a restart. Worker threads drain the queue in batches over
+    pooled SMTP connections and retry transient failures with exponential
+    backoff. Only pending jobs are held in full; the status of the last
+    `history` finished ones is kept for lookups and idempotent retries.
+    """
+    def __init__(self, pool, sender, spool_dir=MAIL_SPOOL_DIR, workers=MAIL_POOL_SIZE,
+                 batch_size=MAIL_BATCH_SIZE, max_attempts=MAIL_MAX_ATTEMPTS, retry_base=MAIL_RETRY_BASE,
+                 history=MAIL_STATUS_HISTORY):
+        self.pool = pool
+        self.sender = sender
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.history = history
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _spool_path(self, job_id):
+        return os.path.join(self.spool_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        tmp_path = self._spool_path(job["id"]) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self._spool_path(job["id"]))
+
+    def _remove(self, job_id):
+        try:
+            os.remove(self._spool_path(job_id))
+        except OSError:
+            pass
+
+    def enqueue(self, receiver_address, subject, message, idempotency_key=None):
+        """
+        Spool an email for delivery and return its job id. A repeated
+        idempotency key returns the first job's id instead of sending again.
+        """
+        job = {
+            "id": uuid.uuid4().hex,
+            "to": receiver_address,
+            "subject": subject,
+            "message": message,
+            "status": "queued",
+            "attempts": 0,
+            "error": None,
+            "idempotency_key": idempotency_key,
+            "trace_id": current_trace_id(),
+            "created_at": time.time(),
+        }
+        with self._lock:
+            if idempotency_key and idempotency_key in self._keys:
+                return self._keys[idempotency_key]
+            self._save(job)
+            self._jobs[job["id"]] = job
+            if idempotency_key:
+                self._keys[idempotency_key] = job["id"]
+        self._queue.put(job["id"])
+        return job["id"]
+
+    def status(self, job_id):
+        """Return the public state of a job, or None if it is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id) or self._finished.get(job_id)
+        if job is None:
+            try:
+                with open(self._spool_path(job_id), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return {key: job[key] for key in STATUS_FIELDS}
+
+    def _build(self, job):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = job["to"]
+        msg['Subject'] = job["subject"]
+        msg.attach(MIMEText(job["message"], 'plain'))
+        return msg.as_string()
+
+    def _next_batch(self):
+        """Block for one job, then take whatever else is already waiting"""
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _finish(self, job, status, error=None):
+        job["status"] = status
+        job["error"] = error
+        if status == "sent":
+            self._remove(job["id"])
+        else:
+            self._save(job)
+        with self._lock:
+            self._jobs.pop(job["id"], None)
+            self._remember(job)
+
+    def _remember(self, job):
+        """Keep a finished job's status, dropping the oldest beyond history; call with the lock held"""
+        self._finished[job["id"]] = {key: job[key] for key in STATUS_FIELDS}
+        self._finished[job["id"]]["idempotency_key"] = job.get("idempotency_key")
+        while len(self._finished) > self.history:
+            _, old = self._finished.popitem(last=False)
+            if old["idempotency_key"]:
+                self._keys.pop(old["idempotency_key"], None)
+
+    def _retry(self, job, error):
+        if job["attempts"] >= self.max_attempts:
+            self._finish(job, "failed", error)
+            return
+        job["status"] = "retrying"
+        job["error"] = error
+        self._save(job)
+        delay = self.retry_base ** job["attempts"]
+        timer = threading.Timer(delay, self._queue.put, [job["id"]])
+        timer.daemon = True
+        timer.start()
+
+    def _send_batch(self, batch):
+        with self._lock:
+            jobs = [self._jobs[job_id] for job_id in batch if job_id in self._jobs]
+        try:
+            with span("smtp.connect"):
+                server = self.pool.acquire()
+        except Exception as e:
+            record_error("SMTP", e)
+            for job in jobs:
+                job["attempts"] += 1
+                if isinstance(e, PERMANENT_ERRORS):
+                    self._finish(job, "failed", str(e))
+                else:
+                    self._retry(job, str(e))
+            return
+
+        healthy = True
+        for job in jobs:
+            job["attempts"] += 1
+            if not healthy:
+                self._retry(job, "SMTP connection lost")
+                continue
+            try:
+                with span("smtp.send", job_id=job["id"], request_trace_id=job.get("trace_id")):
+                    server.sendmail(self.sender, job["to"], self._build(job))
+                self._finish(job, "sent")
+            except PERMANENT_ERRORS as e:
+                self._finish(job, "failed", str(e))
+            except OSError as e:
+                record_error("SMTP", e)
+                # Protocol replies leave the session usable; socket errors do not
+                healthy = (isinstance(e, smtplib.SMTPException)
+                           and not isinstance(e, smtplib.SMTPServerDisconnected))
+                self._retry(job, str(e))
+
+        if healthy:
+            self.pool.release(server)
+        else:
+            self.pool.discard(server)
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            with tracer.trace("mail batch") as trace:
+                trace.attrs["emails"] = len(batch)
+                try:
+                    self._send_batch(batch)
+                except Exception as e:
+                    record_error("Email", e)
+
+    def _recover(self):
+        """Re-queue jobs left in the spool by a previous run"""
+        if not os.path.isdir(self.spool_dir):
+            return
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, name), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            with self._lock:
+                if job.get("idempotency_key"):
+                    self._keys[job["idempotency_key"]] = job["id"]
+                if job["status"] in ("queued", "retrying"):
+                    self._jobs[job["id"]] = job
+                else:
+                    self._remember(job)
+            if job["status"] in ("queued", "retrying"):
+                self._queue.put(job["id"])
+
+    def running(self):
+        """True once the worker threads are up"""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Recover spooled jobs and start the delivery workers"""
+        if self._threads:
+            return
+        self._recover()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"mail-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
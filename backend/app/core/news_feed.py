@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from . import http
+from .admission import RateLimited
+from .background import PeriodicTask
+
+NEWS_API_URL = "https://newsapi.org/v2/top-headlines"
+NEWS_COUNTRIES = [c.strip() for c in os.getenv("NEWS_COUNTRIES", "us").split(",") if c.strip()]
+NEWS_CATEGORIES = [c.strip() for c in os.getenv("NEWS_CATEGORIES", "general").split(",") if c.strip()]
+# Seconds between polls; never shorter than the NewsAPI quota allows, which
+# is also the default
+NEWS_POLL_INTERVAL = float(os.getenv("NEWS_POLL_INTERVAL", "0"))
+# Without a quota to go by
+DEFAULT_POLL_INTERVAL = 600
+NEWS_STORE_SIZE = int(os.getenv("NEWS_STORE_SIZE", "200"))
+
+
+def _normalize_title(title):
+    """Key used to deduplicate the same story across feeds"""
+    return " ".join(title.lower().split())
+
+
+class HeadlinePrefetcher:
+    """
+    Poll NewsAPI top headlines in the background and keep an ordered,
+    deduplicated headline store in memory
+
+    Each feed remembers its ETag/Last-Modified validators and a digest of
+    the last payload, so a feed that has not changed is never re-parsed
+    into the store.
+    """
+    def __init__(self, api_key, countries=None, categories=None,
+                 interval=NEWS_POLL_INTERVAL, max_size=NEWS_STORE_SIZE, quota=None):
+        self.api_key = api_key
+        self.quota = quota
+        self.countries = countries or NEWS_COUNTRIES
+        self.categories = categories or NEWS_CATEGORIES
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._store = OrderedDict()
+        self._ordered = []
+        self._validators = {}
+        self._digests = {}
+        self.last_error = None
+        self.polled = False
+        self._first_poll = threading.Event()
+        self.interval = self._poll_interval(interval)
+        self._poller = PeriodicTask("news-prefetch", self.poll, self.interval)
+
+    def _poll_interval(self, interval):
+        """Every poll costs one request per feed, so the quota sets the shortest interval"""
+        if self.quota is None:
+            return interval or DEFAULT_POLL_INTERVAL
+        return max(interval, self.quota.interval(len(list(self._feeds()))))
+
+    def _feeds(self):
+        for country in self.countries:
+            for category in self.categories:
+                yield country, category
+
+    def _fetch(self, country, category):
+        """Fetch one feed; returns its articles, or None when it is unchanged"""
+        feed = (country, category)
+        params = {"country": country, "apiKey": self.api_key}
+        if category:
+            params["category"] = category
+        headers = {}
+        etag, last_modified = self._validators.get(feed, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        if self.quota is not None:
+            self.quota.acquire()
+        response = http.get(NEWS_API_URL, params=params, headers=headers)
+        if response.status_code == 304:
+            return None
+        if response.status_code == 429 and self.quota is not None:
+            self.quota.penalize(response.headers.get("Retry-After", 3600))
+
+        # Cheap diff on the raw body before any JSON parsing
+        digest = hashlib.sha1(response.content).hexdigest()
+        if response.status_code == 200 and self._digests.get(feed) == digest:
+            return None
+
+        news = response.json()
+        if response.status_code != 200:
+            raise RuntimeError(news.get('message', 'Unknown error'))
+
+        self._validators[feed] = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        self._digests[feed] = digest
+        return news.get("articles", [])
+
+    def poll(self):
+        """Poll every configured feed and merge new headlines into the store"""
+        if not self.api_key:
+            self.last_error = "News API key is not configured."
+            self._first_poll.set()
+            return
+        changed = False
+        error = None
+        for country, category in self._feeds():
+            try:
+                articles = self._fetch(country, category)
+            except RateLimited as e:
+                # Out of quota: the remaining feeds would be refused too
+                error = f"{str(e)}, retry in {e.retry_after}s"
+                break
+            except Exception as e:
+                error = f"{country}/{category}: {str(e)}"
+                continue
+            if articles is not None:
+                changed = self._merge(articles, country, category) or changed
+        self.last_error = error
+        self.polled = True
+        self._first_poll.set()
+        if changed:
+            self._reorder()
+
+    def _merge(self, articles, country, category):
+        changed = False
+        with self._lock:
+            for article in articles:
+                title = (article.get("title") or "").strip()
+                if not title or title == "[Removed]":
+                    continue
+                key = _normalize_title(title)
+                if key in self._store:
+                    continue
+                self._store[key] = {
+                    "title": title,
+                    "source": (article.get("source") or {}).get("name"),
+                    "url": article.get("url"),
+                    "published_at": article.get("publishedAt") or "",
+                    "country": country,
+                    "category": category,
+                }
+                changed = True
+            while len(self._store) > self.max_size:
+                self._store.popitem(last=False)
+        return changed
+
+    def _reorder(self):
+        with self._lock:
+            ordered = sorted(self._store.values(), key=lambda h: h["published_at"], reverse=True)
+            self._ordered = ordered
+
+    def headlines(self, offset=0, limit=5, country=None, category=None):
+        """
+        Return a page of headlines, newest first, and the total count.
+        Only reads the store: before the first poll it is empty, and
+        last_error says why a poll failed.
+        """
+        with self._lock:
+            items = self._ordered
+        if country or category:
+            items = [h for h in items
+                     if (not country or h["country"] == country)
+                     and (not category or h["category"] == category)]
+        return items[offset:offset + limit], len(items)
+
+    def start(self):
+        """Start polling the configured feeds"""
+        self._poller.start()
+
+    def wait_until_polled(self, timeout=None):
+        """Block until the first poll has finished; False on timeout"""
+        return self._first_poll.wait(timeout)
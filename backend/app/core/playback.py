@@ -0,0 +1,407 @@
+"""
+Audio output mixer.
+
+Sounds are decoded into PCM buffers and played by a single mixer thread
+in short chunks, so playback can be cancelled or ducked between chunks
+instead of running to the end like engine.runAndWait(). Every sound
+belongs to a group (the sentences of one reply, say) played at a
+priority: groups at the same priority play one after another, and a
+higher-priority group plays over the lower ones, which are ducked
+meanwhile.
+
+While speech plays, a barge-in monitor watches the microphone with an
+energy VAD and stops the speech as soon as the user starts talking. It
+steps aside while a request holds the microphone.
+"""
+import os
+import threading
+import time
+import uuid
+import wave
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from .tracing import record_error
+
+# "mixer" renders server speech and plays it through the mixer, "engine"
+# lets the TTS engine speak directly (blocking, no barge-in)
+AUDIO_OUTPUT = os.getenv("AUDIO_OUTPUT", "mixer").lower()
+PLAYBACK_RATE = int(os.getenv("PLAYBACK_RATE", "22050"))
+PLAYBACK_CHUNK_MS = int(os.getenv("PLAYBACK_CHUNK_MS", "20"))
+# Gain applied to ducked sounds
+PLAYBACK_DUCK_GAIN = float(os.getenv("PLAYBACK_DUCK_GAIN", "0.2"))
+
+BARGE_IN = os.getenv("BARGE_IN", "true").lower() in ("1", "true", "yes")
+# How far above the noise floor (which includes our own echo) speech must be
+BARGE_IN_MARGIN_DB = float(os.getenv("BARGE_IN_MARGIN_DB", "12"))
+# How long it must last before playback is stopped
+BARGE_IN_MIN_MS = int(os.getenv("BARGE_IN_MIN_MS", "200"))
+
+# Speech < alerts. Barge-in stops everything below alerts.
+PRIORITY_SPEECH = 1
+PRIORITY_ALERT = 2
+
+VAD_RATE = 16000
+VAD_FRAME_MS = 20
+VAD_CALIBRATION_MS = 300
+
+
+def read_wav(path):
+    """Mono float32 samples in [-1, 1] and the sample rate of a PCM WAV file"""
+    with wave.open(path, "rb") as f:
+        width, channels, rate = f.getsampwidth(), f.getnchannels(), f.getframerate()
+        raw = f.readframes(f.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, "<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(raw, "<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def resample(samples, rate, target):
+    if rate == target or len(samples) == 0:
+        return samples.astype(np.float32)
+    positions = np.arange(0, len(samples), rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class PlaybackGroup:
+    """Sounds queued together and cancelled as one, such as the sentences of a reply"""
+    def __init__(self, priority):
+        self.id = uuid.uuid4().hex
+        self.priority = priority
+        self.cancelled = False
+        self.closed = False
+
+
+class Playback:
+    """One sound on the mixer; status is queued, playing, done or cancelled"""
+    def __init__(self, samples, group):
+        self.id = uuid.uuid4().hex
+        self.samples = samples
+        self.group = group
+        self.position = 0
+        self.status = "queued"
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Wait until the sound has finished or was cancelled"""
+        return self._done.wait(timeout)
+
+
+class AudioMixer:
+    """
+    Plays PCM buffers through one output stream
+
+    The output is a PyAudio stream opened by start(); anything with a
+    write(bytes) method taking 16-bit mono PCM at `rate` can be passed
+    instead.
+    """
+    def __init__(self, rate=PLAYBACK_RATE, chunk_ms=PLAYBACK_CHUNK_MS, duck_gain=PLAYBACK_DUCK_GAIN, output=None):
+        self.rate = rate
+        self.chunk = rate * chunk_ms // 1000
+        self.duck_gain = duck_gain
+        self.output = output
+        self.last_error = None
+        self.barge_ins = 0
+        # Set from the first chunk of speech (anything barge-in may stop)
+        # until no more is queued or being rendered
+        self.speaking = threading.Event()
+        # Whether the last chunk written had speech in it
+        self.audible = False
+        self._cond = threading.Condition()
+        self._channels = {}
+        self._groups = set()
+        self._ducks = 0
+        self._thread = None
+
+    def start(self):
+        """Open the output device and start the mixer thread"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            if self.output is None:
+                import pyaudio
+                audio = pyaudio.PyAudio()
+                self.output = audio.open(format=pyaudio.paInt16, channels=1, rate=self.rate, output=True,
+                                         frames_per_buffer=self.chunk)
+            self._thread = threading.Thread(target=self._run, name="audio-mixer", daemon=True)
+            self._thread.start()
+
+    @property
+    def started(self):
+        return self._thread is not None
+
+    def open_group(self, priority=PRIORITY_SPEECH):
+        """Start a group of sounds; close_group() once the last one is queued"""
+        group = PlaybackGroup(priority)
+        with self._cond:
+            self._groups.add(group)
+            self._update_speaking()
+        return group
+
+    def close_group(self, group):
+        with self._cond:
+            group.closed = True
+            self._groups.discard(group)
+            self._update_speaking()
+
+    def play(self, samples, rate, priority=PRIORITY_SPEECH, group=None):
+        """Queue mono float samples; returns the Playback"""
+        if group is None:
+            group = PlaybackGroup(priority)
+            group.closed = True
+        playback = Playback(resample(np.asarray(samples, dtype=np.float32), rate, self.rate), group)
+        with self._cond:
+            if group.cancelled:
+                self._finish(playback, "cancelled")
+                return playback
+            self._channels.setdefault(group.priority, deque()).append(playback)
+            self._update_speaking()
+            self._cond.notify()
+        return playback
+
+    def cancel(self, group=None, below=None):
+        """
+        Stop one group, the groups below a priority, or everything; queued
+        sounds are dropped and the playing ones stop within a chunk.
+        Returns the number of sounds stopped.
+        """
+        def matches(candidate):
+            if group is not None:
+                return candidate is group
+            return below is None or candidate.priority < below
+
+        stopped = 0
+        with self._cond:
+            for candidate in self._groups:
+                if matches(candidate):
+                    candidate.cancelled = True
+            for queue in self._channels.values():
+                for playback in list(queue):
+                    if matches(playback.group):
+                        playback.group.cancelled = True
+                        queue.remove(playback)
+                        self._finish(playback, "cancelled")
+                        stopped += 1
+            self._update_speaking()
+        return stopped
+
+    def barge_in(self):
+        """The user started talking: stop everything below alerts"""
+        stopped = self.cancel(below=PRIORITY_ALERT)
+        if stopped:
+            self.barge_ins += 1
+        return stopped
+
+    def duck(self):
+        """Lower the volume of everything until unduck()"""
+        with self._cond:
+            self._ducks += 1
+
+    def unduck(self):
+        with self._cond:
+            self._ducks = max(0, self._ducks - 1)
+
+    @contextmanager
+    def ducked(self):
+        self.duck()
+        try:
+            yield
+        finally:
+            self.unduck()
+
+    def status(self):
+        with self._cond:
+            playing = [queue[0] for queue in self._channels.values() if queue]
+            return {
+                "started": self.started,
+                "playing": [{"id": playback.id, "priority": playback.group.priority,
+                             "position": round(playback.position / self.rate, 2),
+                             "seconds": round(len(playback.samples) / self.rate, 2)}
+                            for playback in playing],
+                "queued": sum(len(queue) for queue in self._channels.values()) - len(playing),
+                "ducked": self._ducks > 0,
+                "barge_ins": self.barge_ins,
+                "error": self.last_error,
+            }
+
+    def _finish(self, playback, status):
+        playback.status = status
+        playback._done.set()
+
+    def _update_speaking(self):
+        """Clear speaking once no speech is left; _mix sets it"""
+        busy = any(queue for priority, queue in self._channels.items() if priority < PRIORITY_ALERT)
+        busy = busy or any(not group.cancelled and group.priority < PRIORITY_ALERT for group in self._groups)
+        if not busy:
+            self.speaking.clear()
+
+    def _mix(self):
+        """
+        Next output chunk, summed over the head sound of every priority:
+        the highest plays at full volume and the rest ducked
+        """
+        out = np.zeros(self.chunk, np.float32)
+        priorities = sorted((priority for priority, queue in self._channels.items() if queue), reverse=True)
+        self.audible = any(priority < PRIORITY_ALERT for priority in priorities)
+        if self.audible:
+            self.speaking.set()
+        for priority in priorities:
+            queue = self._channels[priority]
+            playback = queue[0]
+            playback.status = "playing"
+            part = playback.samples[playback.position:playback.position + self.chunk]
+            gain = 1.0 if priority == priorities[0] and not self._ducks else self.duck_gain
+            out[:len(part)] += part * gain
+            playback.position += len(part)
+            if playback.position >= len(playback.samples):
+                queue.popleft()
+                self._finish(playback, "done")
+        self._update_speaking()
+        return np.clip(out, -1.0, 1.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not any(self._channels.values()):
+                    self.audible = False
+                    self._cond.wait()
+                chunk = self._mix()
+            try:
+                self.output.write((chunk * 32767).astype(np.int16).tobytes())
+                self.last_error = None
+            except Exception as e:
+                record_error("Playback", e)
+                self.last_error = str(e)
+                self.cancel()
+
+
+class EnergyVAD:
+    """
+    Energy voice activity detector over 16-bit PCM frames
+
+    Only frames recorded while speech is audible count: the first of them
+    set the noise floor, which therefore includes the assistant's own echo
+    in the microphone, so only speech clearly louder than the echo counts.
+    Speech is a run of frames more than margin_db above the floor lasting
+    min_ms; quieter frames slowly pull the floor along.
+    """
+    def __init__(self, margin_db=BARGE_IN_MARGIN_DB, min_ms=BARGE_IN_MIN_MS, frame_ms=VAD_FRAME_MS,
+                 calibration_ms=VAD_CALIBRATION_MS):
+        self.margin_db = margin_db
+        self.min_frames = max(1, min_ms // frame_ms)
+        self.calibration_frames = max(1, calibration_ms // frame_ms)
+        self.floor = None
+        self._calibration = []
+        self._voiced = 0
+
+    @staticmethod
+    def level(samples):
+        """Frame level in dBFS"""
+        samples = np.asarray(samples, dtype=np.float32) / 32768
+        return 10 * np.log10(np.mean(samples * samples) + 1e-10)
+
+    def update(self, samples, active=True):
+        """
+        Feed one frame, recorded while playback was audible or not (active);
+        returns "silence", "onset" on the first loud frame, "speech" once
+        the run is long enough and "voiced" after
+        """
+        if not active:
+            # Between sentences there is no echo to measure against
+            self._voiced = 0
+            return "silence"
+        level = self.level(samples)
+        if self.floor is None:
+            self._calibration.append(level)
+            if len(self._calibration) >= self.calibration_frames:
+                self.floor = float(np.median(self._calibration))
+            return "silence"
+        if level < self.floor + self.margin_db:
+            self.floor = 0.95 * self.floor + 0.05 * level
+            self._voiced = 0
+            return "silence"
+        self._voiced += 1
+        if self._voiced == 1:
+            return "onset"
+        if self._voiced == self.min_frames:
+            return "speech"
+        return "voiced"
+
+
+class BargeInMonitor:
+    """
+    Listens on the microphone while speech plays and stops it when the
+    user starts talking. Playback is ducked from the first loud frame,
+    so a cough only dips the volume while real speech stops it.
+
+    While the device slot (see admission.DeviceSlot) is held, a request is
+    recording from the microphone, so the monitor closes its stream and
+    waits.
+    """
+    def __init__(self, mixer, device=None, margin_db=BARGE_IN_MARGIN_DB, min_ms=BARGE_IN_MIN_MS):
+        self.mixer = mixer
+        self.device = device
+        self.margin_db = margin_db
+        self.min_ms = min_ms
+        self.last_error = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+            self._thread.start()
+
+    def _paused(self):
+        return self.device is not None and self.device.busy
+
+    def _run(self):
+        while True:
+            self.mixer.speaking.wait()
+            if self._paused():
+                time.sleep(0.1)
+                continue
+            try:
+                self._watch()
+                self.last_error = None
+            except Exception as e:
+                record_error("Barge-in", e)
+                self.last_error = str(e)
+                # Not retried until the next reply
+                while self.mixer.speaking.is_set():
+                    time.sleep(0.5)
+
+    def _watch(self):
+        import pyaudio
+        frame = VAD_RATE * VAD_FRAME_MS // 1000
+        audio = pyaudio.PyAudio()
+        stream = audio.open(format=pyaudio.paInt16, channels=1, rate=VAD_RATE, input=True, frames_per_buffer=frame)
+        detector = EnergyVAD(self.margin_db, self.min_ms)
+        ducked = False
+        try:
+            while self.mixer.speaking.is_set() and not self._paused():
+                samples = np.frombuffer(stream.read(frame, exception_on_overflow=False), np.int16)
+                state = detector.update(samples, self.mixer.audible)
+                if state == "onset":
+                    self.mixer.duck()
+                    ducked = True
+                elif state == "speech":
+                    self.mixer.barge_in()
+                elif state == "silence" and ducked:
+                    self.mixer.unduck()
+                    ducked = False
+        finally:
+            if ducked:
+                self.mixer.unduck()
+            stream.stop_stream()
+            stream.close()
+            audio.terminate()
@@ -0,0 +1,325 @@
+"""
+Integration plugins.
+
+A plugin is a module plus a manifest describing it: the intents it
+handles, the configuration it reads from the environment, how long its
+results may be cached and how many of its calls may run at once. The
+manifests are cheap to import; the plugin module itself is imported the
+first time one of its intents fires (or one of its jobs runs).
+
+Built-in manifests live in app.plugins. Other packages can add plugins
+by exposing a PluginManifest through the "talksy.plugins" entry point
+group, e.g. in their pyproject.toml:
+
+    [project.entry-points."talksy.plugins"]
+    calendar = "talksy_calendar.manifest:MANIFEST"
+
+A plugin module may define:
+
+    HANDLERS = {intent: handler(query, slots, session)} returning a string or Reply
+    JOBS = {kind: handler(payload)}
+    setup(context)   called once on import with the PluginContext
+    start()          start background work
+    health()         (ok, detail) for /health
+    warm_up()        extra startup work when the plugin is preloaded
+"""
+import importlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .tracing import span, record_error
+
+PLUGIN_GROUP = "talksy.plugins"
+# Comma-separated plugin names to enable, or "all"
+TALKSY_PLUGINS = os.getenv("TALKSY_PLUGINS", "all")
+# Plugins imported during startup warm-up instead of on first use
+PLUGIN_PRELOAD = [name.strip() for name in os.getenv("PLUGIN_PRELOAD", "news,email").split(",") if name.strip()]
+# Seconds a call waits for a free slot under the plugin's concurrency limit
+PLUGIN_BUSY_TIMEOUT = float(os.getenv("PLUGIN_BUSY_TIMEOUT", "5"))
+
+
+class PluginError(Exception):
+    """A plugin cannot be loaded or is not configured"""
+
+
+class Reply:
+    """
+    A handler's answer: text to display, optionally different text to speak
+    and structured data for clients that render it themselves; success is
+    False when the text reports a failure
+    """
+    def __init__(self, text, data=None, speech_text=None, success=True):
+        self.text = text
+        self.data = data
+        self.speech_text = speech_text if speech_text is not None else text
+        self.success = success
+
+
+def as_reply(result):
+    return result if isinstance(result, Reply) else Reply(result)
+
+
+class ConfigOption:
+    """One configuration value, read from an environment variable"""
+    def __init__(self, name, env, required=False, default=None, cast=str, secret=False):
+        self.name = name
+        self.env = env
+        self.required = required
+        self.default = default
+        self.cast = cast
+        self.secret = secret
+
+    def resolve(self):
+        raw = os.getenv(self.env)
+        if raw is None or raw == "":
+            if self.required:
+                raise PluginError(f"set {self.env}")
+            return self.default
+        try:
+            return self.cast(raw)
+        except ValueError:
+            raise PluginError(f"{self.env} is not a valid value") from None
+
+    def describe(self):
+        return {"env": self.env, "required": self.required, "secret": self.secret,
+                "default": None if self.secret else self.default}
+
+
+class CachePolicy:
+    """Results kept for ttl seconds, at most max_entries of them"""
+    def __init__(self, ttl, max_entries=128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+
+class PluginManifest:
+    def __init__(self, name, module, intents=(), jobs=(), config=(), cache=None, concurrency=None,
+                 description=""):
+        self.name = name
+        self.module = module
+        self.intents = tuple(intents)
+        self.jobs = tuple(jobs)
+        self.config = tuple(config)
+        self.cache = cache
+        self.concurrency = concurrency
+        self.description = description
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after ttl seconds"""
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+class PluginContext:
+    """What a plugin gets at setup: its resolved config and its cache"""
+    def __init__(self, manifest, config):
+        self.manifest = manifest
+        self.config = config
+        self.cache = TTLCache(manifest.cache.ttl, manifest.cache.max_entries) if manifest.cache else None
+
+    def cached(self, key, compute):
+        """compute() through the plugin's cache policy, if it has one"""
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(key, compute)
+
+
+class Plugin:
+    """
+    A loaded plugin. Its concurrency limit applies to intent handlers and
+    to jobs separately, so a long job does not block the handler that
+    queues the next one.
+    """
+    def __init__(self, manifest, module, context):
+        self.manifest = manifest
+        self.module = module
+        self.context = context
+        limit = manifest.concurrency
+        self._handler_slots = threading.BoundedSemaphore(limit) if limit else None
+        self._job_slots = threading.BoundedSemaphore(limit) if limit else None
+
+    def call(self, func, *args):
+        """Run an intent handler; waits up to PLUGIN_BUSY_TIMEOUT for a free slot"""
+        if self._handler_slots is None:
+            return func(*args)
+        if not self._handler_slots.acquire(timeout=PLUGIN_BUSY_TIMEOUT):
+            raise PluginError(f"{self.manifest.name} is busy")
+        try:
+            return func(*args)
+        finally:
+            self._handler_slots.release()
+
+    def run_job(self, func, payload):
+        """Run a job on a job worker, waiting as long as it takes for a slot"""
+        if self._job_slots is None:
+            return func(payload)
+        with self._job_slots:
+            return func(payload)
+
+
+class PluginManager:
+    """
+    Registry of plugin manifests; imports and sets up each plugin on first use
+    """
+    def __init__(self, enabled=TALKSY_PLUGINS):
+        self.enabled = None if enabled.strip() == "all" else {name.strip() for name in enabled.split(",")}
+        # Reentrant: a plugin's setup may load another plugin
+        self._lock = threading.RLock()
+        self._discovered = False
+        self._manifests = {}
+        self._intents = {}
+        self._jobs = {}
+        self._loaded = {}
+        self._errors = {}
+
+    def register(self, manifest):
+        """Add a manifest, unless TALKSY_PLUGINS leaves it out"""
+        if self.enabled is not None and manifest.name not in self.enabled:
+            return
+        self._manifests[manifest.name] = manifest
+        for intent in manifest.intents:
+            self._intents[intent] = manifest.name
+        for kind in manifest.jobs:
+            self._jobs[kind] = manifest.name
+
+    def discover(self, builtins=None):
+        """Register the built-in manifests and any installed through entry points"""
+        if builtins is None:
+            from ..plugins import BUILTIN_PLUGINS as builtins
+        self._discovered = True
+        for manifest in builtins:
+            self.register(manifest)
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points(group=PLUGIN_GROUP)
+        except Exception as e:
+            record_error("Plugin discovery", e)
+            return
+        for entry_point in found:
+            try:
+                self.register(entry_point.load())
+            except Exception as e:
+                record_error(f"Plugin ({entry_point.name})", e)
+
+    def _ensure_discovered(self):
+        if not self._discovered:
+            with self._lock:
+                if not self._discovered:
+                    self.discover()
+
+    def manifests(self):
+        self._ensure_discovered()
+        return list(self._manifests.values())
+
+    def handles(self, intent):
+        self._ensure_discovered()
+        return intent in self._intents
+
+    def job_kinds(self):
+        self._ensure_discovered()
+        return list(self._jobs)
+
+    def load(self, name):
+        """The loaded plugin, importing and setting it up on first use; raises PluginError"""
+        self._ensure_discovered()
+        plugin = self._loaded.get(name)
+        if plugin is not None:
+            return plugin
+        with self._lock:
+            plugin = self._loaded.get(name)
+            if plugin is not None:
+                return plugin
+            manifest = self._manifests.get(name)
+            if manifest is None:
+                raise PluginError(f"{name} is not enabled")
+            try:
+                config = {option.name: option.resolve() for option in manifest.config}
+            except PluginError as e:
+                self._errors[name] = f"{name} is not configured: {str(e)}"
+                raise PluginError(self._errors[name]) from None
+            try:
+                with span("plugin.load", plugin=name):
+                    module = importlib.import_module(manifest.module)
+                    context = PluginContext(manifest, config)
+                    if hasattr(module, "setup"):
+                        module.setup(context)
+                    if hasattr(module, "start"):
+                        module.start()
+            except Exception as e:
+                record_error(f"Plugin ({name})", e)
+                self._errors[name] = f"{name} failed to load: {str(e)}"
+                raise PluginError(self._errors[name]) from e
+            plugin = Plugin(manifest, module, context)
+            self._loaded[name] = plugin
+            self._errors.pop(name, None)
+            return plugin
+
+    def module(self, name):
+        """The imported module of a plugin"""
+        return self.load(name).module
+
+    def handle(self, intent, query, slots, session):
+        """Run the handler for an intent"""
+        plugin = self.load(self._intents[intent])
+        return plugin.call(plugin.module.HANDLERS[intent], query, slots, session)
+
+    def call(self, name, func, *args):
+        """Call a function of a plugin's module, within its handler concurrency limit"""
+        plugin = self.load(name)
+        return plugin.call(getattr(plugin.module, func), *args)
+
+    def run_job(self, kind, payload):
+        plugin = self.load(self._jobs[kind])
+        return plugin.run_job(plugin.module.JOBS[kind], payload)
+
+    def health(self, name):
+        """(ok, detail) for one plugin; plugins not loaded yet are fine"""
+        if name in self._errors:
+            return (False, self._errors[name])
+        plugin = self._loaded.get(name)
+        if plugin is None:
+            return (True, "not loaded")
+        if hasattr(plugin.module, "health"):
+            return plugin.module.health()
+        return (True, "loaded")
+
+    def status(self):
+        """Manifests and load state of every enabled plugin"""
+        return {
+            manifest.name: {
+                "description": manifest.description,
+                "intents": list(manifest.intents),
+                "jobs": list(manifest.jobs),
+                "config": {option.name: option.describe() for option in manifest.config},
+                "cache": {"ttl": manifest.cache.ttl, "max_entries": manifest.cache.max_entries}
+                         if manifest.cache else None,
+                "concurrency": manifest.concurrency,
+                "loaded": manifest.name in self._loaded,
+                "error": self._errors.get(manifest.name),
+            }
+            for manifest in self._manifests.values()
+        }
+
+
+plugins = PluginManager()
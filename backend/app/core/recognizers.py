@@ -0,0 +1,264 @@
+"""
+Speech recognizer backends.
+
+"google" sends audio to the Google Web Speech API through
+speech_recognition. "vosk" decodes locally on the CPU with a Vosk model,
+so listening keeps working offline. Pick one with SPEECH_BACKEND.
+"""
+import audioop
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import speech_recognition as sr
+
+from .tracing import span
+
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "google").lower()
+SPEECH_LANGUAGE = os.getenv("SPEECH_LANGUAGE", "en-US")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", os.path.join(os.path.expanduser("~"), ".talksy", "vosk-model"))
+RECOGNIZER_WORKERS = int(os.getenv("RECOGNIZER_WORKERS", str(os.cpu_count() or 1)))
+
+SAMPLE_RATE = 16000
+# Audio fed to the decoder per step; a partial transcript follows each step
+CHUNK_SECONDS = 0.25
+
+
+class Transcription:
+    """A transcript with its timing; rtf is processing time over audio length"""
+    __slots__ = ("text", "backend", "audio_seconds", "seconds", "rtf")
+
+    def __init__(self, text, backend, audio_seconds, seconds):
+        self.text = text
+        self.backend = backend
+        self.audio_seconds = audio_seconds
+        self.seconds = seconds
+        self.rtf = seconds / audio_seconds if audio_seconds else 0.0
+
+
+def _pcm(audio):
+    """16 kHz 16-bit mono PCM bytes of an AudioData"""
+    return audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+
+
+class RecognizerBackend(ABC):
+    """
+    Base class: subclasses implement _decode(audio, pcm, on_partial)
+    returning the transcript text
+    """
+    name = "base"
+
+    def __init__(self):
+        self.last = None
+
+    def warm_up(self):
+        """Load models ahead of the first utterance"""
+
+    def stream(self, on_partial=None):
+        """
+        A decoder fed from the capture loop, so decoding keeps pace with
+        the microphone; None when the backend only takes whole utterances
+        """
+        return None
+
+    def transcribe(self, audio, on_partial=None):
+        """
+        Transcribe AudioData; on_partial(text) is called with interim
+        transcripts where the backend decodes incrementally. Raises
+        sr.UnknownValueError when nothing was recognized, like
+        speech_recognition does.
+        """
+        pcm = _pcm(audio)
+        with span(f"recognize.{self.name}") as current:
+            started = time.perf_counter()
+            text = self._decode(audio, pcm, on_partial)
+            result = Transcription(text, self.name, len(pcm) / (2 * SAMPLE_RATE), time.perf_counter() - started)
+            if current is not None:
+                current.attrs.update(audio_seconds=round(result.audio_seconds, 2), rtf=round(result.rtf, 3))
+        self.last = result
+        if not text:
+            raise sr.UnknownValueError()
+        return result
+
+    def recognize(self, audio, on_partial=None):
+        """Transcript text of AudioData"""
+        return self.transcribe(audio, on_partial).text
+
+    @abstractmethod
+    def _decode(self, audio, pcm, on_partial):
+        """
+        Transcript text of one utterance, given both as AudioData and as
+        16 kHz 16-bit mono PCM bytes; "" when nothing was recognized
+        """
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API; needs a network connection"""
+    name = "google"
+
+    def __init__(self, language=SPEECH_LANGUAGE):
+        super().__init__()
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def _decode(self, audio, pcm, on_partial):
+        return self._recognizer.recognize_google(audio, language=self.language)
+
+
+class VoskBackend(RecognizerBackend):
+    """
+    Local Vosk decoding
+
+    The model is loaded once and shared. Decoders are created up front,
+    one per worker, and reused, so an utterance never waits for a model
+    load and at most `workers` utterances decode at once.
+    """
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL_PATH, workers=RECOGNIZER_WORKERS):
+        super().__init__()
+        self.model_path = model_path
+        self.workers = max(1, workers)
+        self._model = None
+        self._decoders = queue.Queue()
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        with self._lock:
+            if self._model is not None:
+                return
+            import vosk
+            vosk.SetLogLevel(-1)
+            if not os.path.isdir(self.model_path):
+                raise RuntimeError(f"Vosk model not found at {self.model_path}")
+            self._model = vosk.Model(self.model_path)
+            for _ in range(self.workers):
+                self._decoders.put(vosk.KaldiRecognizer(self._model, SAMPLE_RATE))
+
+    def stream(self, on_partial=None):
+        self.warm_up()
+        return VoskStream(self, self._decoders.get(), on_partial)
+
+    def _decode(self, audio, pcm, on_partial):
+        stream = self.stream(on_partial)
+        try:
+            step = int(CHUNK_SECONDS * SAMPLE_RATE) * 2
+            for start in range(0, len(pcm), step):
+                stream.feed(pcm[start:start + step])
+        finally:
+            text = stream.close()
+        return text
+
+
+class VoskStream:
+    """
+    One utterance on a borrowed Vosk decoder
+
+    feed() takes 16 kHz 16-bit PCM as it is captured and reports partial
+    transcripts; finish() returns the transcript and close() hands the
+    decoder back. Both can be called more than once.
+    """
+    def __init__(self, backend, decoder, on_partial=None):
+        self.backend = backend
+        self.on_partial = on_partial
+        self._decoder = decoder
+        self._segments = []
+        self._bytes = 0
+        self._seconds = 0.0
+        self._text = None
+
+    def feed(self, pcm):
+        if self._decoder is None:
+            return
+        started = time.perf_counter()
+        if self._decoder.AcceptWaveform(pcm):
+            self._segments.append(json.loads(self._decoder.Result()).get("text", ""))
+        elif self.on_partial is not None:
+            partial = json.loads(self._decoder.PartialResult()).get("partial", "")
+            if partial:
+                self.on_partial(" ".join(self._segments + [partial]).strip())
+        self._bytes += len(pcm)
+        self._seconds += time.perf_counter() - started
+
+    def close(self):
+        """Final transcript; returns the decoder to the backend"""
+        if self._decoder is not None:
+            decoder, self._decoder = self._decoder, None
+            try:
+                self._segments.append(json.loads(decoder.FinalResult()).get("text", ""))
+            finally:
+                # FinalResult leaves the decoder reset for the next utterance
+                self.backend._decoders.put(decoder)
+            self._text = " ".join(segment for segment in self._segments if segment)
+        return self._text
+
+    def finish(self):
+        """Transcript of the captured audio, timed like RecognizerBackend.transcribe"""
+        with span(f"recognize.{self.backend.name}") as current:
+            started = time.perf_counter()
+            text = self.close()
+            result = Transcription(text, self.backend.name, self._bytes / (2 * SAMPLE_RATE),
+                                   self._seconds + time.perf_counter() - started)
+            if current is not None:
+                current.attrs.update(audio_seconds=round(result.audio_seconds, 2), rtf=round(result.rtf, 3))
+        self.backend.last = result
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class CaptureTee:
+    """
+    Stands in for a Microphone's stream and passes each buffer that
+    Recognizer.listen reads to feed() as well, as 16 kHz 16-bit PCM
+    """
+    def __init__(self, source, feed):
+        self.stream = source.stream
+        self.feed = feed
+        self.sample_rate = source.SAMPLE_RATE
+        self.sample_width = source.SAMPLE_WIDTH
+        self._state = None
+
+    def read(self, size):
+        buffer = self.stream.read(size)
+        if buffer:
+            pcm = buffer
+            if self.sample_width != 2:
+                pcm = audioop.lin2lin(pcm, self.sample_width, 2)
+            if self.sample_rate != SAMPLE_RATE:
+                pcm, self._state = audioop.ratecv(pcm, 2, 1, self.sample_rate, SAMPLE_RATE, self._state)
+            self.feed(pcm)
+        return buffer
+
+    def close(self):
+        self.stream.close()
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The configured recognizer backend, created and warmed up once"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if SPEECH_BACKEND not in BACKENDS:
+                raise ValueError(f"Unknown SPEECH_BACKEND: {SPEECH_BACKEND}")
+            backend = BACKENDS[SPEECH_BACKEND]()
+            backend.warm_up()
+            _backend = backend
+    return _backend
+
+
+def current_backend():
+    """The recognizer backend if it has been created, without creating it; else None"""
+    return _backend
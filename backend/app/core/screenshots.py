@@ -0,0 +1,170 @@
+import datetime
+import hmac
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from urllib.parse import urlparse
+
+SCREENSHOT_DIR = os.getenv("SCREENSHOT_DIR", os.path.join(os.path.expanduser("~"), ".talksy", "screenshots"))
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "png").lower()
+SCREENSHOT_SCALE = float(os.getenv("SCREENSHOT_SCALE", "1.0"))
+# zlib level for PNG: 1 is fastest, 9 smallest
+SCREENSHOT_PNG_COMPRESSION = int(os.getenv("SCREENSHOT_PNG_COMPRESSION", "1"))
+SCREENSHOT_JPEG_QUALITY = int(os.getenv("SCREENSHOT_JPEG_QUALITY", "85"))
+SCREENSHOT_MAX_BYTES = int(os.getenv("SCREENSHOT_MAX_MB", "200")) * 1024 * 1024
+SCREENSHOT_MAX_AGE = float(os.getenv("SCREENSHOT_MAX_AGE_DAYS", "14")) * 86400
+# "true" starts Xvfb when there is no display on Linux; meant for CI only,
+# a real session without DISPLAY would otherwise capture a blank screen
+SCREENSHOT_XVFB = os.getenv("SCREENSHOT_XVFB", "false").lower() in ("1", "true", "yes")
+XVFB_DISPLAY = os.getenv("XVFB_DISPLAY", ":99")
+# Screenshots are served to clients sending this in X-Talksy-Token, and
+# otherwise only to pages served from this machine
+SCREENSHOT_TOKEN = os.getenv("SCREENSHOT_TOKEN", "")
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "jpg": ".jpg", "webp": ".webp"}
+
+
+def is_trusted_client(client_host, origin, fetch_site, token):
+    """
+    Whether a client may take, list or download screenshots: it has the
+    token, or it connects from this machine and is not a page from another
+    site (judged by the Origin and Sec-Fetch-Site headers browsers send)
+    """
+    if SCREENSHOT_TOKEN and token and hmac.compare_digest(token, SCREENSHOT_TOKEN):
+        return True
+    if client_host not in LOCAL_HOSTS:
+        return False
+    if fetch_site == "cross-site":
+        return False
+    if origin is not None and urlparse(origin).hostname not in LOCAL_HOSTS:
+        return False
+    return True
+
+
+class ScreenshotService:
+    """
+    Capture, compress and store screenshots under a retention policy
+
+    Capturing is blocking work, so it runs on job workers and other threads,
+    never on the event loop.
+    """
+    def __init__(self, directory=SCREENSHOT_DIR, max_bytes=SCREENSHOT_MAX_BYTES, max_age=SCREENSHOT_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._xvfb = None
+
+    def ensure_display(self):
+        """Start a virtual X server for headless Linux boxes such as CI, if enabled"""
+        if platform.system() != "Linux" or os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY"):
+            return
+        if not SCREENSHOT_XVFB:
+            raise RuntimeError("No display to capture (set SCREENSHOT_XVFB=true on headless CI)")
+        if self._xvfb is None:
+            if not shutil.which("Xvfb"):
+                raise RuntimeError("No display available and Xvfb is not installed")
+            self._xvfb = subprocess.Popen(
+                ["Xvfb", XVFB_DISPLAY, "-screen", "0", "1280x720x24", "-nolisten", "tcp"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            time.sleep(0.5)
+        os.environ["DISPLAY"] = XVFB_DISPLAY
+
+    def _grab(self):
+        self.ensure_display()
+        # Imported lazily: pyautogui connects to the display on import
+        try:
+            import pyautogui
+            return pyautogui.screenshot()
+        except Exception:
+            from PIL import ImageGrab
+            return ImageGrab.grab()
+
+    def capture(self, scale=None, fmt=None):
+        """Take a screenshot, save it and return its metadata"""
+        scale = SCREENSHOT_SCALE if scale is None else scale
+        fmt = (fmt or SCREENSHOT_FORMAT).lower()
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"Unsupported screenshot format: {fmt}")
+        if not 0 < scale <= 1:
+            raise ValueError("Scale must be between 0 and 1")
+
+        image = self._grab()
+        if scale < 1:
+            from PIL import Image
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            image = image.resize(size, Image.BILINEAR)
+
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filepath = os.path.join(self.directory, f"screenshot_{timestamp}{EXTENSIONS[fmt]}")
+        if fmt == "png":
+            image.save(filepath, format="PNG", compress_level=SCREENSHOT_PNG_COMPRESSION)
+        elif fmt in ("jpeg", "jpg"):
+            image.convert("RGB").save(filepath, format="JPEG", quality=SCREENSHOT_JPEG_QUALITY)
+        else:
+            image.save(filepath, format="WEBP", quality=SCREENSHOT_JPEG_QUALITY, method=0)
+
+        self.enforce_retention()
+        return self._describe(filepath, image.width, image.height)
+
+    def _describe(self, path, width=None, height=None):
+        stat = os.stat(path)
+        info = {
+            "name": os.path.basename(path),
+            "path": path,
+            "size": stat.st_size,
+            "created_at": stat.st_mtime,
+        }
+        if width is not None:
+            info["width"], info["height"] = width, height
+        return info
+
+    def list_screenshots(self):
+        """Stored screenshots, newest first"""
+        try:
+            names = [name for name in os.listdir(self.directory)
+                     if name.startswith("screenshot_") and os.path.splitext(name)[1] in EXTENSIONS.values()]
+        except OSError:
+            return []
+        items = []
+        for name in names:
+            try:
+                items.append(self._describe(os.path.join(self.directory, name)))
+            except OSError:
+                continue
+        items.sort(key=lambda item: item["created_at"], reverse=True)
+        return items
+
+    def path_for(self, name):
+        """Absolute path of a stored screenshot, or None; rejects path traversal"""
+        if os.path.basename(name) != name:
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def enforce_retention(self):
+        """Delete screenshots older than max_age, then the oldest until under max_bytes"""
+        with self._lock:
+            now = time.time()
+            total = 0
+            over_budget = False
+            for item in self.list_screenshots():
+                too_old = self.max_age and now - item["created_at"] > self.max_age
+                if self.max_bytes and total + item["size"] > self.max_bytes:
+                    over_budget = True
+                if too_old or over_budget:
+                    try:
+                        os.remove(item["path"])
+                    except OSError:
+                        pass
+                    continue
+                total += item["size"]
+
+
+screenshot_service = ScreenshotService()
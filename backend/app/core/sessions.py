@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_TTL = int(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "10"))
+SESSION_MAX_CACHE = int(os.getenv("SESSION_MAX_CACHE", "8"))
+SESSION_MAX_TEXT = 2000
+
+
+class Session:
+    """
+    Conversation state for one client: recent turns, resolved slots
+    (last intent, city, topic, ...) and a few cached upstream results
+    """
+    __slots__ = ("id", "turns", "slots", "cache", "last_seen")
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.turns = deque(maxlen=SESSION_MAX_TURNS)
+        self.slots = {}
+        self.cache = OrderedDict()
+        self.last_seen = time.monotonic()
+
+    def add_turn(self, query, response, intent=None):
+        """Record a turn, truncating long text so a session stays small"""
+        self.turns.append((query[:SESSION_MAX_TEXT], str(response)[:SESSION_MAX_TEXT], intent))
+        self.slots["last_intent"] = intent
+
+    def last_response(self):
+        return self.turns[-1][1] if self.turns else None
+
+    def cache_put(self, key, value):
+        """Cache an upstream result; the oldest entry goes when the cache is full"""
+        self.cache[key] = (value, time.monotonic())
+        self.cache.move_to_end(key)
+        while len(self.cache) > SESSION_MAX_CACHE:
+            self.cache.popitem(last=False)
+
+    def cache_get(self, key, max_age=None):
+        """Return a cached value, or None if it is missing or older than max_age"""
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if max_age is not None and time.monotonic() - stored_at > max_age:
+            del self.cache[key]
+            return None
+        return value
+
+
+class SessionStore:
+    """
+    Sessions keyed by client session id, with LRU eviction and an idle TTL
+    """
+    def __init__(self, max_sessions=SESSION_MAX_SESSIONS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        # Least recently used sessions sit at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - session.last_seen <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id=None):
+        """Return the session for an id, creating a new one (and id) when needed"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None and now - session.last_seen > self.ttl:
+                del self._sessions[session_id]
+                session = None
+            if session is None:
+                session = Session(session_id or uuid.uuid4().hex)
+                self._sessions[session.id] = session
+            session.last_seen = now
+            self._sessions.move_to_end(session.id)
+            self._evict(now)
+            return session
+
+    def drop(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+sessions = SessionStore()
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+
+from .tracing import record_error
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CITIES_PATH = os.getenv("CITIES_PATH", os.path.join(DATA_DIR, "cities.txt"))
+# Optional JSON address book: {"mom": {"email": "...", "phone": "..."}}
+CONTACTS_PATH = os.getenv("CONTACTS_PATH", os.path.join(os.path.expanduser("~"), ".talksy", "contacts.json"))
+
+WORD = re.compile(r"[a-z0-9']+")
+EMAIL_ADDRESS = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_NUMBER = re.compile(r"\+?\d[\d\s-]{6,}\d")
+
+# Precompiled patterns per intent, tried in order; named groups become slots
+PATTERNS = {
+    "weather": [
+        re.compile(r"weather (?:like )?(?:in|at|for) (?P<city>[a-z .'-]+?)(?: today| now| right now)?\??$"),
+        re.compile(r"(?:how hot|how cold|temperature) (?:is it )?(?:in|at) (?P<city>[a-z .'-]+?)\??$"),
+    ],
+    "wikipedia": [
+        re.compile(r"search (?:for )?(?P<query>.+?) on wikipedia$"),
+        re.compile(r"(?:look up|find) (?P<query>.+?) on wikipedia$"),
+        re.compile(r"what does wikipedia say about (?P<query>.+?)\??$"),
+        re.compile(r"(?:tell me about|read about|what is|who is|who was) (?P<query>.+?) (?:on|from) wikipedia\??$"),
+        re.compile(r"(?:search |check )?wikipedia (?:search )?(?:for |about )?(?P<query>.+)$"),
+    ],
+    "youtube": [
+        re.compile(r"play (?P<query>.+?) on youtube$"),
+        re.compile(r"youtube play (?P<query>.+)$"),
+        re.compile(r"play (?P<query>.+)$"),
+    ],
+    "google": [
+        re.compile(r"search (?:for )?(?P<query>.+?) on (?:google|the web)$"),
+        re.compile(r"(?:search|look up) (?:google|the web|online) for (?P<query>.+)$"),
+        re.compile(r"(?:look up|search for) (?P<query>.+?) (?:on google|online)$"),
+        re.compile(r"google (?:search )?(?:for )?(?P<query>.+)$"),
+    ],
+    "email": [
+        re.compile(r"(?:e-?mail|mail) (?:to )?(?P<recipient>[\w.@+-]+)"
+                   r"(?: (?:about|with subject|subject) (?P<subject>.+?))?"
+                   r"(?: (?:saying|that says|with message|message) (?P<message>.+))?$"),
+    ],
+    "whatsapp": [
+        re.compile(r"(?:whats ?app|message|text) (?:message )?(?:to )?(?P<recipient>\+?[\d][\d\s-]{6,}\d|[a-z]+)"
+                   r"(?: on whats ?app)?(?: (?:saying|that says|with message|message) (?P<message>.+))?$"),
+    ],
+    "open_app": [
+        re.compile(r"(?:open|launch|start) (?:the )?(?P<app>.+?)(?: app| application)?(?: please)?$"),
+    ],
+}
+
+# Words the recipient patterns can catch that are not a recipient, as in
+# "send a whatsapp message"
+NOT_A_RECIPIENT = {"message", "text", "msg", "mail", "email", "whatsapp", "a", "an", "the", "to", "on", "my"}
+
+REQUIRED_SLOTS = {
+    "weather": ("city",),
+    "wikipedia": ("query",),
+    "youtube": ("query",),
+    "google": ("query",),
+    "email": ("recipient", "message"),
+    "whatsapp": ("recipient", "message"),
+    "open_app": ("app",),
+}
+
+
+class Gazetteer:
+    """
+    Set of known multi-word names, matched against the longest word
+    n-grams of a text first
+    """
+    def __init__(self, names):
+        self.names = {" ".join(WORD.findall(name.lower())) for name in names}
+        self.names.discard("")
+        self.max_words = max((name.count(" ") + 1 for name in self.names), default=0)
+
+    def find(self, text):
+        """Longest known name in the text, or None"""
+        words = WORD.findall(text.lower())
+        for size in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                candidate = " ".join(words[start:start + size])
+                if candidate in self.names:
+                    return candidate
+        return None
+
+
+def _load_lines(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError as e:
+        record_error("Gazetteer", e)
+        return []
+
+
+def _load_contacts(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {name.lower(): entry for name, entry in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+cities = Gazetteer(_load_lines(CITIES_PATH))
+contacts = _load_contacts(CONTACTS_PATH)
+
+
+def _resolve_recipient(recipient, kind):
+    """Turn a contact name into an email address or phone number when known"""
+    entry = contacts.get(recipient.lower())
+    if entry and entry.get(kind):
+        return entry[kind]
+    return recipient
+
+
+def extract_slots(intent, text):
+    """Pull the parameters for an intent out of free text"""
+    text = text.lower().strip()
+    slots = {}
+    for pattern in PATTERNS.get(intent, ()):
+        match = pattern.search(text)
+        if match:
+            slots = {name: value.strip() for name, value in match.groupdict().items() if value}
+            break
+    if slots.get("recipient") in NOT_A_RECIPIENT:
+        del slots["recipient"]
+
+    if intent == "weather":
+        city = cities.find(slots.get("city", text))
+        if city:
+            slots["city"] = city
+        if "city" in slots:
+            slots["city"] = slots["city"].title()
+    elif intent == "email":
+        address = EMAIL_ADDRESS.search(text)
+        if address:
+            slots["recipient"] = address.group(0)
+        elif "recipient" in slots:
+            slots["recipient"] = _resolve_recipient(slots["recipient"], "email")
+    elif intent == "whatsapp":
+        number = PHONE_NUMBER.search(text)
+        if number:
+            slots["recipient"] = re.sub(r"[\s-]", "", number.group(0))
+        elif "recipient" in slots:
+            slots["recipient"] = _resolve_recipient(slots["recipient"], "phone")
+    return slots
+
+
+def slot_value(intent, name, text):
+    """Value of one slot from a bare answer to its prompt, such as "london" after "Which city?" """
+    text = text.lower().strip().strip(" .!?")
+    if name == "city":
+        return (cities.find(text) or text).title()
+    if name == "recipient" and intent == "email":
+        address = EMAIL_ADDRESS.search(text)
+        return address.group(0) if address else _resolve_recipient(text, "email")
+    if name == "recipient" and intent == "whatsapp":
+        number = PHONE_NUMBER.search(text)
+        return re.sub(r"[\s-]", "", number.group(0)) if number else _resolve_recipient(text, "phone")
+    return text
+
+
+def missing_slots(intent, slots):
+    """Required slots the text did not provide"""
+    return [name for name in REQUIRED_SLOTS.get(intent, ()) if not slots.get(name)]
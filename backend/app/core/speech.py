@@ -0,0 +1,176 @@
+import contextvars
+import os
+import queue
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+
+from .playback import PRIORITY_SPEECH, read_wav
+from .tracing import span, record_error
+
+# "none" returns text only, "server" speaks on the server's speakers and
+# "stream" returns a URL the client fetches the rendered audio from
+AUDIO_MODES = ("none", "server", "stream")
+DEFAULT_AUDIO_MODE = os.getenv("DEFAULT_AUDIO_MODE", "server").lower()
+SPEECH_DIR = os.getenv("SPEECH_DIR", os.path.join(tempfile.gettempdir(), "talksy-speech"))
+SPEECH_MAX_PENDING = int(os.getenv("SPEECH_MAX_PENDING", "256"))
+
+# Server speech is rendered and queued a sentence (or line) at a time, so
+# playback starts after the first one
+UTTERANCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class SpeechRenderer:
+    """
+    Renders speech only when a client asks for it
+
+    Replies in "stream" mode register their text and get an id back;
+    the audio is synthesized the first time that id is fetched. Fixed
+    phrases can be pre-rendered at startup and are then reused. The
+    pyttsx3 engine is not thread-safe, so all synthesis is serialized.
+
+    With a started AudioMixer, "server" speech is rendered to WAV on a
+    worker thread and played through the mixer, so speak() returns at
+    once and the speech can be cancelled or interrupted. Without one it
+    is spoken by the engine directly and speak() blocks until done.
+    Each utterance is rendered in the context of the request that spoke
+    it, so its tts.render spans land in that request's trace.
+    """
+    def __init__(self, engine, mixer=None, directory=SPEECH_DIR, max_pending=SPEECH_MAX_PENDING):
+        self.engine = engine
+        self.mixer = mixer
+        self.directory = directory
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._engine_lock = threading.Lock()
+        self._pending = OrderedDict()
+        # Pre-rendered phrases, never evicted: text -> id
+        self._kept = {}
+        self._utterances = queue.Queue()
+        self._worker = None
+
+    def speak(self, text, priority=PRIORITY_SPEECH):
+        """Say the text on the server's audio output"""
+        if self.engine is None:
+            return text
+        if self.mixer is not None and self.mixer.started:
+            group = self.mixer.open_group(priority)
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._play_utterances, name="speech", daemon=True)
+                    self._worker.start()
+            self._utterances.put((text, group, contextvars.copy_context()))
+            return text
+        try:
+            with span("tts.speak", chars=len(text)):
+                with self._engine_lock:
+                    self.engine.say(text)
+                    self.engine.runAndWait()
+        except Exception as e:
+            record_error("TTS", e)
+        return text
+
+    def _play_utterances(self):
+        while True:
+            text, group, context = self._utterances.get()
+            context.run(self._play, text, group)
+
+    def _play(self, text, group):
+        try:
+            for part in UTTERANCE_SPLIT.split(text.strip()):
+                if group.cancelled:
+                    break
+                if part:
+                    samples, rate = self._samples(part)
+                    self.mixer.play(samples, rate, group=group)
+        except Exception as e:
+            record_error("TTS", e)
+        finally:
+            self.mixer.close_group(group)
+
+    def _samples(self, text):
+        """Rendered samples of text, reusing a pre-rendered phrase"""
+        with self._lock:
+            speech_id = self._kept.get(text)
+        if speech_id is not None:
+            return read_wav(self.render(speech_id))
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"say-{uuid.uuid4().hex}.wav")
+        try:
+            self._synthesize(text, path)
+            return read_wav(path)
+        finally:
+            self._remove(path)
+
+    def _synthesize(self, text, path):
+        with span("tts.render", chars=len(text)), self._engine_lock:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+
+    def register(self, text, keep=False):
+        """Remember text for later synthesis and return its id"""
+        with self._lock:
+            if text in self._kept:
+                return self._kept[text]
+            speech_id = uuid.uuid4().hex
+            self._pending[speech_id] = {"text": text, "path": None}
+            if keep:
+                self._kept[text] = speech_id
+            else:
+                self._evict()
+        return speech_id
+
+    def _evict(self):
+        kept = set(self._kept.values())
+        for speech_id in list(self._pending):
+            if len(self._pending) - len(kept) <= self.max_pending:
+                break
+            if speech_id not in kept:
+                self._remove(self._pending.pop(speech_id)["path"])
+
+    def load_voices(self):
+        """Touch the voice list so the TTS driver finishes loading"""
+        if self.engine is None:
+            raise RuntimeError("TTS engine is not available")
+        with self._engine_lock:
+            return self.engine.getProperty("voices")
+
+    def prerender(self, texts):
+        """Synthesize fixed phrases ahead of time so the first reply using them is instant"""
+        for text in texts:
+            self.render(self.register(text, keep=True))
+
+    def render(self, speech_id):
+        """Path of the WAV file for a registered id, synthesizing it on first use; None if unknown"""
+        with self._lock:
+            entry = self._pending.get(speech_id)
+        if entry is None:
+            return None
+        if entry["path"] is None:
+            if self.engine is None:
+                raise RuntimeError("TTS engine is not available")
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{speech_id}.wav")
+            self._synthesize(entry["text"], path)
+            entry["path"] = path
+        return entry["path"]
+
+    def deliver(self, text, mode):
+        """
+        Render speech for a reply according to the audio mode; returns the
+        "spoken" and "audio_url" fields of the response
+        """
+        if mode == "server":
+            return {"spoken": self.speak(text), "audio_url": None}
+        if mode == "stream":
+            return {"spoken": None, "audio_url": f"/audio/{self.register(text)}"}
+        return {"spoken": None, "audio_url": None}
+
+    def _remove(self, path):
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
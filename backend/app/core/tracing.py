@@ -0,0 +1,219 @@
+"""
+Request-scoped tracing.
+
+A trace is started per request (or background job) and carried in a
+context variable, so it follows the request through asyncio.to_thread
+into the command handlers, integrations and TTS. Jobs and queued mail
+run in traces of their own that record the id of the request trace that
+queued them (request_trace_id). Code marks the steps
+worth timing with
+
+    with span("wikipedia.search", topic=topic):
+        ...
+
+and reports failures with record_error() instead of printing them.
+Traces slower than TRACE_SLOW_MS, or with errors, are appended to a
+rotating JSONL log; recent traces are kept in memory for /debug/traces.
+"""
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", os.path.join(os.path.expanduser("~"), ".talksy", "traces.jsonl"))
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_MB", "10")) * 1024 * 1024
+TRACE_LOG_BACKUPS = int(os.getenv("TRACE_LOG_BACKUPS", "3"))
+TRACE_RECENT = int(os.getenv("TRACE_RECENT", "500"))
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "parent", "start", "end", "attrs", "errors")
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+        self.errors = []
+
+
+class Trace:
+    def __init__(self, name, trace_id=None):
+        self.id = trace_id or uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+        self.errors = []
+        self.attrs = {}
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def summary(self):
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "spans": len(self.spans),
+            "errors": len(self.errors),
+            **self.attrs,
+        }
+
+    def to_dict(self):
+        spans = []
+        for span in self.spans:
+            end = span.end if span.end is not None else time.perf_counter()
+            spans.append({
+                "name": span.name,
+                "parent": span.parent.name if span.parent is not None else None,
+                "offset_ms": round((span.start - self.start) * 1000, 2),
+                "duration_ms": round((end - span.start) * 1000, 2),
+                **({"attrs": span.attrs} if span.attrs else {}),
+                **({"errors": span.errors} if span.errors else {}),
+            })
+        return {**self.summary(), "error_messages": self.errors, "spans": spans}
+
+
+class Tracer:
+    """Starts traces, keeps the recent ones and logs the slow or failed ones"""
+    def __init__(self, slow_ms=TRACE_SLOW_MS, log_path=TRACE_LOG_PATH, recent=TRACE_RECENT):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.recent = recent
+        self._lock = threading.Lock()
+        self._traces = OrderedDict()
+        self._log = None
+
+    @contextmanager
+    def trace(self, name, trace_id=None):
+        """Run the body inside a new trace"""
+        trace = Trace(name, trace_id)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            yield trace
+        except Exception as e:
+            trace.errors.append(f"{type(e).__name__}: {str(e)}")
+            raise
+        finally:
+            trace.end = time.perf_counter()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._finish(trace)
+
+    def _finish(self, trace):
+        with self._lock:
+            self._traces[trace.id] = trace
+            self._traces.move_to_end(trace.id)
+            while len(self._traces) > self.recent:
+                self._traces.popitem(last=False)
+        if trace.duration_ms >= self.slow_ms or trace.errors:
+            self._write(trace)
+
+    def _write(self, trace):
+        try:
+            if self._log is None:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    self.log_path, maxBytes=TRACE_LOG_MAX_BYTES, backupCount=TRACE_LOG_BACKUPS, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                log = logging.getLogger("talksy.traces")
+                log.propagate = False
+                log.setLevel(logging.INFO)
+                log.addHandler(handler)
+                self._log = log
+            self._log.info(json.dumps(trace.to_dict(), default=str))
+        except OSError as e:
+            print(f"Trace log Error: {str(e)}")
+
+    def slowest(self, limit=20, min_ms=0.0):
+        """Summaries of the slowest recent traces"""
+        with self._lock:
+            traces = list(self._traces.values())
+        traces = [trace for trace in traces if trace.end is not None and trace.duration_ms >= min_ms]
+        traces.sort(key=lambda trace: trace.duration_ms, reverse=True)
+        return [trace.summary() for trace in traces[:limit]]
+
+    def get(self, trace_id):
+        with self._lock:
+            trace = self._traces.get(trace_id)
+        return trace.to_dict() if trace is not None else None
+
+
+tracer = Tracer()
+
+
+def current_trace_id():
+    """Id of the current trace, or None outside one"""
+    trace = _current_trace.get()
+    return trace.id if trace is not None else None
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time the body as a span of the current trace; a no-op outside one.
+    Yields the span so attributes can be added once known.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(name, _current_span.get(), attrs)
+    trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.errors.append(f"{type(e).__name__}: {str(e)}")
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_error(source, error):
+    """
+    Attach an error to the current span, which also gets its trace
+    written to the log; printed when there is no trace
+    """
+    message = f"{source} Error: {str(error)}"
+    trace = _current_trace.get()
+    if trace is None:
+        print(message)
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.errors.append(message)
+    trace.errors.append(message)
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+
+from .tracing import tracer, record_error
+
+# How long a request waits for the critical subsystems before getting a 503
+WARMUP_QUEUE_TIMEOUT = float(os.getenv("WARMUP_QUEUE_TIMEOUT", "10"))
+# A failed critical step is retried this many times, waiting 1, 2, 4... seconds
+WARMUP_RETRIES = int(os.getenv("WARMUP_RETRIES", "3"))
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", "1"))
+
+
+class WarmupRegistry:
+    """
+    Subsystems to initialize at startup, all in parallel
+
+    Each step is a blocking function run on a worker thread. The readiness
+    map records its state (pending, warming, retrying, ready or failed),
+    attempts and how long it took; the service is ready once every critical
+    step is. A critical step is retried with backoff, and once it has
+    failed for good requests are refused at once instead of waiting.
+    """
+    def __init__(self, retries=WARMUP_RETRIES, retry_delay=WARMUP_RETRY_DELAY):
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._steps = {}
+        self._state = {}
+        self._settled = None
+
+    def add(self, name, func, critical=False):
+        self._steps[name] = (func, critical)
+        self._state[name] = {"status": "pending", "critical": critical, "attempts": 0, "seconds": None, "error": None}
+
+    def readiness(self):
+        """Per-subsystem readiness map"""
+        return {"ready": self.ready(), "failed": self.failed(),
+                "subsystems": {name: dict(state) for name, state in self._state.items()}}
+
+    def ready(self):
+        return all(state["status"] == "ready" for state in self._state.values() if state["critical"])
+
+    def failed(self):
+        """Critical steps that failed every attempt; the service will not become ready"""
+        return [name for name, state in self._state.items() if state["critical"] and state["status"] == "failed"]
+
+    async def _run_step(self, name, func, critical):
+        state = self._state[name]
+        started = time.perf_counter()
+        attempts = 1 + (self.retries if critical else 0)
+        for attempt in range(attempts):
+            state["status"] = "warming"
+            state["attempts"] = attempt + 1
+            try:
+                with tracer.trace(f"warmup {name}"):
+                    await asyncio.to_thread(func)
+                state["status"] = "ready"
+                state["error"] = None
+                break
+            except Exception as e:
+                record_error(f"Warm-up ({name}, attempt {attempt + 1})", e)
+                state["error"] = str(e)
+                if attempt + 1 == attempts:
+                    state["status"] = "failed"
+                else:
+                    state["status"] = "retrying"
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        state["seconds"] = round(time.perf_counter() - started, 3)
+        if self.ready() or self.failed():
+            self._settled_event().set()
+
+    def _settled_event(self):
+        """Set once the service is ready or can no longer become ready"""
+        if self._settled is None:
+            self._settled = asyncio.Event()
+            if self.ready() or self.failed():
+                self._settled.set()
+        return self._settled
+
+    async def run(self):
+        """Warm every subsystem concurrently"""
+        self._settled_event()
+        await asyncio.gather(*(self._run_step(name, func, critical)
+                               for name, (func, critical) in self._steps.items()))
+
+    async def wait_ready(self, timeout=WARMUP_QUEUE_TIMEOUT):
+        """
+        Wait for the critical subsystems; False if they are not ready in
+        time, or at once if one of them has failed
+        """
+        if self.ready():
+            return True
+        if self.failed():
+            return False
+        try:
+            await asyncio.wait_for(self._settled_event().wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.ready()
+
+
+warmup = WarmupRegistry()
@@ -4,18 +4,20 @@ import wikipedia
 import pywhatkit as kit
 import json
 import wolframalpha
-import pyjokes
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
+from ..core import corpus
+from ..core.tracing import traced
+from ..core.plugins import plugins, PluginError
 
 # Load environment variables
 load_dotenv()
 
 # API Keys
 WOLFRAM_ID = os.getenv("WOLFRAM_ALPHA_ID")
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
 
+@traced("wikipedia.search")
 def search_wikipedia(query):
     """
     Search for a topic on Wikipedia and return a summary
@@ -27,6 +29,7 @@ def search_wikipedia(query):
     except Exception as e:
         return f"An error occurred while searching Wikipedia: {str(e)}"
 
+@traced("web.search")
 def search_web(query):
     """
     Perform a web search using PyWhatKit
@@ -40,34 +43,27 @@ def search_web(query):
 
 def get_news():
     """
-    Get the latest news headlines
+    Get the latest news headlines from the prefetched headline store
     """
-    api_key = NEWS_API_KEY
-    if not api_key:
-        return "News API key is not configured."
-    
     try:
-        url = f"https://newsapi.org/v2/top-headlines?country=us&apiKey={api_key}"
-        response = requests.get(url)
-        news = response.json()
-        
-        if response.status_code != 200:
-            return f"Error fetching news: {news.get('message', 'Unknown error')}"
-        
-        articles = news.get("articles", [])
-        
-        if not articles:
-            return "No news articles found."
-        
-        headlines = []
-        for i, article in enumerate(articles[:5], 1):
-            headlines.append(f"{i}. {article['title']}")
-        
-        return "Here are the top headlines:\n" + "\n".join(headlines)
+        news_feed = plugins.module("news").news_feed
+    except PluginError as e:
+        return f"News is unavailable: {str(e)}"
     
-    except Exception as e:
-        return f"An error occurred while getting the news: {str(e)}"
+    articles, _ = news_feed.headlines(limit=5)
+    
+    if not articles:
+        if news_feed.last_error:
+            return f"Error fetching news: {news_feed.last_error}"
+        return "No news articles found."
+    
+    headlines = []
+    for i, article in enumerate(articles, 1):
+        headlines.append(f"{i}. {article['title']}")
+    
+    return "Here are the top headlines:\n" + "\n".join(headlines)
 
+@traced("tmdb.movie")
 def get_movie_info(movie_name):
     """
     Get information about a movie
@@ -100,6 +96,7 @@ def get_movie_info(movie_name):
     except Exception as e:
         return f"An error occurred while getting movie information: {str(e)}"
 
+@traced("wolfram.query")
 def ask_wolfram_alpha(query):
     """
     Query Wolfram Alpha for computational knowledge
@@ -123,10 +120,6 @@ def ask_wolfram_alpha(query):
 
 def get_joke():
     """
-    Get a random joke
+    Get a random joke from the local joke pool
     """
-    try:
-        joke = pyjokes.get_joke()
-        return joke
-    except Exception as e:
-        return f"I couldn't tell a joke right now: {str(e)}" 
\ No newline at end of file
+    return corpus.jokes.sample() or "I couldn't tell a joke right now." 
\ No newline at end of file
@@ -1,41 +1,19 @@
-import os
-import subprocess
 import psutil
-import datetime
-import pyautogui
 import platform
 import webbrowser
+from ..core.launcher import launcher
+from ..core.screenshots import screenshot_service
 
 def open_application(app_name):
     """
-    Open an application
+    Open an application through the launcher index
     """
-    app_name = app_name.lower()
-    
-    # Dictionary of common apps
-    app_paths = {
-        "notepad": "notepad.exe",
-        "calculator": "calc.exe",
-        "chrome": "chrome.exe",
-        "firefox": "firefox.exe",
-        "word": "winword.exe",
-        "excel": "excel.exe",
-        "powerpoint": "powerpnt.exe",
-        "paint": "mspaint.exe",
-        "cmd": "cmd.exe",
-        "control panel": "control.exe",
-        "task manager": "taskmgr.exe",
-        "file explorer": "explorer.exe",
-    }
+    app_name = app_name.lower().strip()
     
     try:
-        if app_name in app_paths:
-            os.startfile(app_paths[app_name])
+        if launcher.launch(app_name):
             return f"Opening {app_name}"
-        else:
-            # Try to open directly if not in the dictionary
-            os.startfile(app_name)
-            return f"Attempting to open {app_name}"
+        return f"I couldn't find {app_name} on this computer"
     except Exception as e:
         return f"I couldn't open {app_name}: {str(e)}"
 
@@ -59,21 +37,13 @@ def close_application(app_name):
     except Exception as e:
         return f"Error closing {app_name}: {str(e)}"
 
-def take_screenshot():
+def take_screenshot(scale=None, fmt=None):
     """
-    Take a screenshot and save it to the desktop
+    Take a screenshot and save it to the screenshot directory
     """
     try:
-        # Get desktop path
-        desktop = os.path.join(os.path.join(os.environ['USERPROFILE']), 'Desktop')
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = os.path.join(desktop, f"screenshot_{timestamp}.png")
-        
-        # Take screenshot
-        screenshot = pyautogui.screenshot()
-        screenshot.save(filepath)
-        
-        return f"Screenshot saved to {filepath}"
+        info = screenshot_service.capture(scale=scale, fmt=fmt)
+        return f"Screenshot saved to {info['path']}"
     
     except Exception as e:
         return f"Error taking screenshot: {str(e)}"
@@ -1,25 +1,94 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from typing import Optional
+from contextlib import asynccontextmanager
 import pyttsx3
 import speech_recognition as sr
 import os
+import json
+import asyncio
+import functools
 import uvicorn
 from datetime import datetime
 from random import choice
 
 # Import functionality
 from .utils import opening_text, USERNAME, BOTNAME, get_time, get_date
-from .functions.online_ops import (
-    find_my_ip, get_latest_news, get_random_advice, get_random_joke,
-    get_weather_report, play_on_youtube, search_on_google, search_on_wikipedia,
-    send_email, send_whatsapp_message
-)
-from .functions.os_ops import (
-    open_calculator, open_camera, open_cmd, open_notepad, open_discord
-)
+from .functions.online_ops import find_my_ip, get_random_advice, get_random_joke
+from .core import corpus, http
+from .core.jobs import job_queue
+from .core.launcher import launcher
+from .core.screenshots import screenshot_service, is_trusted_client
+from .core.ip_service import ip_service
+from .core.health import health, CachedCheck
+from .core.sessions import sessions
+from .core.speech import SpeechRenderer, AUDIO_MODES, DEFAULT_AUDIO_MODE
+from .core.playback import AudioMixer, BargeInMonitor, AUDIO_OUTPUT, BARGE_IN, PRIORITY_ALERT
+from .core.admission import admit_request, microphone, RateLimited
+from .core.audio_cache import recognition_cache
+from .core.recognizers import get_backend as get_recognizer_backend, current_backend, CaptureTee
+from .core.tracing import tracer, span, record_error
+from .core.warmup import warmup
+from .core.plugins import plugins, Reply, as_reply, PluginError, PLUGIN_PRELOAD
+from .core.intents import match_intent, get_classifier
+from .core.slots import extract_slots, missing_slots, slot_value
+from .core.follow_ups import resolve_follow_up
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm the subsystems in the background while the server starts accepting requests"""
+    warming = asyncio.create_task(warmup.run())
+    yield
+    warming.cancel()
+
+app = FastAPI(title="Talksy API", description="API for the Talksy virtual assistant", lifespan=lifespan)
 
-app = FastAPI(title="Talksy API", description="API for the Talksy virtual assistant")
+# Until the critical subsystems are warm, requests wait briefly and then get
+# 503; health and readiness endpoints always answer
+WARMUP_EXEMPT_PATHS = ("/", "/health", "/health/stream", "/ready", "/debug/traces")
+
+@app.middleware("http")
+async def warmup_gate(request: Request, call_next):
+    if request.url.path not in WARMUP_EXEMPT_PATHS and not await warmup.wait_ready():
+        if warmup.failed():
+            detail = f"Talksy failed to start: {', '.join(warmup.failed())}"
+            return JSONResponse(status_code=503, content={"detail": detail, **warmup.readiness()})
+        return JSONResponse(status_code=503, content={"detail": "Talksy is still starting up", **warmup.readiness()},
+                            headers={"Retry-After": "5"})
+    return await call_next(request)
+
+# Admission control: token buckets per client IP and per route. Registered
+# before CORS so that 429 responses still carry the CORS headers.
+def rate_limited_response(e):
+    return JSONResponse(status_code=429, content={"detail": str(e), "retry_after": e.retry_after},
+                        headers={"Retry-After": str(e.retry_after)})
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    try:
+        await admit_request(request)
+    except RateLimited as e:
+        return rate_limited_response(e)
+    return await call_next(request)
+
+# Every request runs in a trace; the id is returned in X-Trace-Id
+@app.middleware("http")
+async def request_tracing(request: Request, call_next):
+    trace_id = request.headers.get("x-trace-id")
+    if trace_id and not (len(trace_id) <= 32 and trace_id.isalnum()):
+        trace_id = None
+    with tracer.trace(f"{request.method} {request.url.path}", trace_id) as trace:
+        response = await call_next(request)
+        trace.attrs["status"] = response.status_code
+    response.headers["X-Trace-Id"] = trace.id
+    return response
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, e: RateLimited):
+    return rate_limited_response(e)
 
 # Allow CORS
 app.add_middleware(
@@ -31,11 +100,24 @@ app.add_middleware(
 )
 
 # Initialize text-to-speech engine
-engine = pyttsx3.init('sapi5')
-voices = engine.getProperty('voices')
-engine.setProperty('voice', voices[1].id)  # Default to female voice
-engine.setProperty('rate', 190)  # Speed of speech
-engine.setProperty('volume', 1.0)  # Volume
+try:
+    engine = pyttsx3.init('sapi5')
+    voices = engine.getProperty('voices')
+    engine.setProperty('voice', voices[1].id)  # Default to female voice
+    engine.setProperty('rate', 190)  # Speed of speech
+    engine.setProperty('volume', 1.0)  # Volume
+except Exception as e:
+    record_error("TTS", e)
+    engine = None
+
+# Server speech plays through the mixer once it is started, so it can be
+# cancelled and the user can talk over it
+mixer = AudioMixer()
+# Barge-in steps aside while /listen holds the microphone
+barge_in = BargeInMonitor(mixer, device=microphone)
+
+# Speech is rendered only for clients that ask for it
+speech = SpeechRenderer(engine, mixer)
 
 # Initialize Speech Recognition
 recognizer = sr.Recognizer()
@@ -45,9 +127,11 @@ recognizer.energy_threshold = 300  # Minimum audio energy to consider for record
 # Model classes
 class TextCommand(BaseModel):
     command: str
+    session_id: Optional[str] = None
 
 class ListenRequest(BaseModel):
     timeout: int = 5
+    session_id: Optional[str] = None
 
 class SpeakRequest(BaseModel):
     text: str
@@ -63,6 +147,7 @@ class WhatsAppRequest(BaseModel):
 
 class WikipediaRequest(BaseModel):
     query: str
+    session_id: Optional[str] = None
 
 class YoutubeRequest(BaseModel):
     query: str
@@ -70,31 +155,139 @@ class YoutubeRequest(BaseModel):
 class GoogleRequest(BaseModel):
     query: str
 
+class ScreenshotRequest(BaseModel):
+    scale: Optional[float] = None
+    format: Optional[str] = None
+
 class WeatherRequest(BaseModel):
     city: str
+    session_id: Optional[str] = None
 
-# Text to Speech
-def speak(text):
-    """Convert text to speech"""
-    try:
-        engine.say(text)
-        engine.runAndWait()
-        return text
-    except Exception as e:
-        print(f"TTS Error: {str(e)}")
-        return text
+# Response models. display_text is what a screen shows, speech_text what is
+# spoken; response repeats display_text for older clients.
+class AssistantReply(BaseModel):
+    success: bool = True
+    intent: Optional[str] = None
+    data: Optional[dict] = None
+    display_text: str = ""
+    speech_text: str = ""
+    response: str = ""
+    session_id: Optional[str] = None
+    spoken: Optional[str] = None
+    audio_url: Optional[str] = None
+
+class ListenReply(AssistantReply):
+    command: Optional[str] = None
+
+# /weather and /wikipedia also keep their original top-level fields
+class WeatherReply(AssistantReply):
+    weather: Optional[str] = None
+    temperature: Optional[str] = None
+    feels_like: Optional[str] = None
+
+class WikipediaReply(AssistantReply):
+    result: Optional[str] = None
+
+class JobAccepted(BaseModel):
+    success: bool = True
+    job_id: str
+    status: str
+    message: str
+    spoken: Optional[str] = None
+    audio_url: Optional[str] = None
+
+class SpeakReply(BaseModel):
+    success: bool = True
+    text: str
+    spoken: Optional[str] = None
+    audio_url: Optional[str] = None
+
+def audio_mode(audio: Optional[str] = None):
+    """The audio=none|server|stream query parameter"""
+    mode = (audio or DEFAULT_AUDIO_MODE).lower()
+    if mode not in AUDIO_MODES:
+        raise HTTPException(status_code=422, detail=f"audio must be one of: {', '.join(AUDIO_MODES)}")
+    return mode
+
+# Readiness checks reported by /health
+def _microphone_check():
+    names = sr.Microphone.list_microphone_names()
+    return (bool(names), f"{len(names)} input device(s)")
+
+def _speech_backend_check():
+    # Only report on the backend warm-up (or the first utterance) created;
+    # building it here would load a model inside /health
+    backend = current_backend()
+    if backend is None:
+        return (True, "not loaded")
+    if backend.last is None:
+        return (True, backend.name)
+    return (True, f"{backend.name}, last real-time factor {backend.last.rtf:.2f}")
+
+health.register("tts", lambda: (engine is not None, None if engine else "TTS engine failed to initialize"), critical=False)
+if AUDIO_OUTPUT == "mixer":
+    health.register("audio_output", lambda: (mixer.started and mixer.last_error is None,
+                                             mixer.last_error or barge_in.last_error), critical=False)
+health.register("recognizer", CachedCheck(_microphone_check), critical=False)
+health.register("speech_backend", CachedCheck(_speech_backend_check, ttl=10), critical=False)
+health.register("warmup", lambda: (warmup.ready(), None if warmup.ready() else
+                                   f"failed: {', '.join(warmup.failed())}" if warmup.failed() else "warming up"),
+                critical=True)
+health.register("jobs", lambda: job_queue.running(), critical=True)
+health.register("upstream:ip", lambda: (ip_service.last_error is None, ip_service.last_error), critical=False)
+for manifest in plugins.manifests():
+    health.register(f"plugin:{manifest.name}", functools.partial(plugins.health, manifest.name), critical=False)
+
+# Background jobs for slow side effects; plugin jobs load their plugin when they run
+for kind in plugins.job_kinds():
+    job_queue.register(kind, functools.partial(plugins.run_job, kind))
+job_queue.register("screenshot", lambda payload: screenshot_service.capture(payload.get("scale"), payload.get("format")))
+
+def job_response(job, message, audio):
+    """Common response body for a queued job"""
+    return JobAccepted(
+        success=job["status"] != "failed",
+        job_id=job["id"],
+        status=job["status"],
+        message=message,
+        **speech.deliver(message, audio)
+    )
+
+# Commands that send a message: a wrong cache hit would send an old message
+# again, so their transcripts are always recognized afresh
+UNCACHED_INTENTS = ("email", "whatsapp")
+
+def cacheable_command(transcript):
+    return match_intent(transcript.lower().strip())[0] not in UNCACHED_INTENTS
 
 # Listen for voice
-def listen_for_command(timeout=5):
-    """Listen for a voice command"""
+def listen_for_command(timeout=5, on_partial=None):
+    """Listen for a voice command; on_partial receives interim transcripts"""
+    decoding = None
     try:
-        with sr.Microphone() as source:
+        # Talking to the assistant interrupts whatever it is still saying
+        mixer.cancel(below=PRIORITY_ALERT)
+        with mixer.ducked(), sr.Microphone() as source:
             print("Listening...")
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=5)
+            with span("listen.calibrate"):
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            
+            # A streaming backend decodes each buffer as it is captured, so
+            # partials arrive while the user is still talking
+            backend = get_recognizer_backend()
+            decoding = backend.stream(on_partial)
+            if decoding is not None:
+                source.stream = CaptureTee(source, decoding.feed)
+                decode = lambda audio: decoding.finish()
+            else:
+                decode = lambda audio: backend.recognize(audio, on_partial)
+            with span("listen.capture"):
+                audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=5)
             print("Processing...")
             
-            command = recognizer.recognize_google(audio, language='en-US')
+            # Repeats of a recent utterance are answered without a recognition round trip
+            with span("listen.recognize"):
+                command = recognition_cache.recognize(audio, decode, cacheable=cacheable_command)
             command = command.lower()
             print(f"User said: {command}")
             return command
@@ -106,6 +299,9 @@ def listen_for_command(timeout=5):
         return f"Could not request results; {e}"
     except Exception as e:
         return f"An error occurred: {str(e)}"
+    finally:
+        if decoding is not None:
+            decoding.close()
 
 # Greet user
 def greet_user():
@@ -122,209 +318,534 @@ def greet_user():
     
     return f"{greeting}. I am {BOTNAME}. How may I assist you?"
 
+def build_reply(intent, result, audio, session=None, model=AssistantReply, **fields):
+    """Response model for a handler result, with speech rendered per the audio mode"""
+    reply = as_reply(result)
+    return model(
+        success=reply.success,
+        intent=intent,
+        data=reply.data,
+        display_text=reply.text,
+        speech_text=reply.speech_text,
+        response=reply.text,
+        session_id=session.id if session is not None else None,
+        **speech.deliver(reply.speech_text, audio),
+        **fields
+    )
+
+# Command handlers, keyed by intent. Each gets the query, the slots
+# extracted from it and the conversation session (None outside a session).
+# They return a string or a Reply. Intents not listed here belong to plugins.
+def exit_reply(query, slots, session):
+    hour = datetime.now().hour
+    if hour >= 21 or hour < 6:
+        return "Good night! Take care!"
+    return "Have a good day!"
+
+def ip_command(query, slots, session):
+    ip = find_my_ip()
+    return Reply(f'Your IP Address is {ip}', data={"ip": ip})
+
+SLOT_PROMPTS = {
+    "city": "Which city would you like the weather for?",
+    "query": "What would you like me to look for?",
+    "recipient": "Who should I send it to?",
+    "message": "What should the message say?",
+    "app": "Which application should I open?",
+}
+
+COMMAND_HANDLERS = {
+    "exit": exit_reply,
+    "joke": lambda query, slots, session: get_random_joke(),
+    "advice": lambda query, slots, session: get_random_advice(),
+    "ip_address": ip_command,
+    "time": lambda query, slots, session: get_time(),
+    "date": lambda query, slots, session: get_date(),
+}
+
+def run_handler(intent, query, slots, session):
+    """Run a core handler, or the plugin that handles the intent"""
+    if intent in COMMAND_HANDLERS:
+        return COMMAND_HANDLERS[intent](query, slots, session)
+    if not plugins.handles(intent):
+        return "That feature is not enabled."
+    try:
+        return plugins.handle(intent, query, slots, session)
+    except PluginError as e:
+        return f"Sorry, I can't do that right now: {str(e)}."
+
+def fetch_weather(city):
+    """
+    Weather report for follow-ups, through the weather plugin and its
+    concurrency limit; raises with the text to reply when the lookup fails
+    """
+    try:
+        return plugins.call("weather", "lookup_weather", city)
+    except PluginError as e:
+        raise RuntimeError(f"Error getting weather data: {str(e)}") from e
+    except Exception as e:
+        raise RuntimeError(plugins.module("weather").failure_text(e)) from e
+
 # Process command
-def process_command(query):
-    """Process user command and execute appropriate action"""
+def classify_and_process(query, session=None):
+    """Process user command and return (intent, response)"""
     if not query or query.isspace():
-        return "I didn't receive a command."
+        return None, "I didn't receive a command."
     
     query = query.lower().strip()
-    response = ""
-    
-    # Check for exit commands
-    if 'exit' in query or 'stop' in query or 'bye' in query or 'goodbye' in query:
-        hour = datetime.now().hour
-        if hour >= 21 or hour < 6:
-            response = "Good night! Take care!"
-        else:
-            response = "Have a good day!"
-        return response
-    
-    # Process commands - first check for exact matches, then partial ones
-    
-    # Joke commands - prioritized for better joke recognition
-    if any(word in query for word in ['joke', 'funny', 'laugh', 'humor', 'comedy']):
-        response = get_random_joke()
-    
-    elif 'advice' in query:
-        response = get_random_advice()
-    
-    elif 'ip address' in query:
-        ip_address = find_my_ip()
-        response = f'Your IP Address is {ip_address}'
-    
-    elif 'wikipedia' in query and 'search' in query:
-        # This will be processed in a separate endpoint
-        response = "Please use the specific Wikipedia search endpoint."
-    
-    elif 'youtube' in query and 'play' in query:
-        # This will be processed in a separate endpoint
-        response = "Please use the specific YouTube play endpoint."
-    
-    elif 'search' in query and 'google' in query:
-        # This will be processed in a separate endpoint
-        response = "Please use the specific Google search endpoint."
-    
-    elif 'whatsapp message' in query:
-        # This will be processed in a separate endpoint
-        response = "Please use the specific WhatsApp message endpoint."
-    
-    elif 'email' in query:
-        # This will be processed in a separate endpoint
-        response = "Please use the specific email endpoint."
-    
-    elif 'news' in query:
-        news = get_latest_news()
-        response = "\n".join(news)
-    
-    elif 'weather' in query:
-        # This will be processed in a separate endpoint
-        response = "Please use the specific weather endpoint."
-    
-    elif 'time' in query:
-        response = get_time()
-    
-    elif 'date' in query:
-        response = get_date()
     
-    elif 'open notepad' in query:
-        response = open_notepad()
-    
-    elif 'open discord' in query:
-        response = open_discord()
-    
-    elif 'open command prompt' in query or 'open cmd' in query:
-        response = open_cmd()
-    
-    elif 'open camera' in query:
-        response = open_camera()
+    # Exact keyword rules first, then the typo-tolerant n-gram index
+    with span("intent.match") as current:
+        intent, score = match_intent(query)
+        if current is not None:
+            current.attrs.update(intent=intent, score=round(score, 3))
+    if intent is None:
+        # If no specific command matches
+        return None, "I'm not sure how to help with that. Can you be more specific?"
     
-    elif 'open calculator' in query:
-        response = open_calculator()
+    # Parameterized commands run in this request once their slots are filled
+    with span("slots.extract"):
+        slots = extract_slots(intent, query)
+    return run_command(intent, query, slots, session)
+
+def run_command(intent, query, slots, session):
+    """
+    Run the handler, or ask for the first missing slot; in a session the
+    half-filled command is kept so the next turn can answer the prompt
+    """
+    missing = missing_slots(intent, slots)
+    if missing:
+        if session is not None:
+            session.slots["pending"] = {"intent": intent, "slots": slots, "slot": missing[0]}
+        return intent, SLOT_PROMPTS[missing[0]]
     
+    with span(f"handler.{intent}"):
+        return intent, run_handler(intent, query, slots, session)
+
+CANCEL_PHRASES = ("cancel", "never mind", "nevermind", "forget it", "stop")
+# Slots whose answer is free text, never taken for a new command
+FREE_TEXT_SLOTS = ("message", "query")
+
+def resume_pending(session, query):
+    """
+    Fill the slot the assistant just asked for from this turn and run the
+    command; None when there is nothing pending or the turn is a new command
+    """
+    pending = session.slots.pop("pending", None)
+    if pending is None:
+        return None
+    query = query.lower().strip()
+    intent, name = pending["intent"], pending["slot"]
+    if query.strip(" .!") in CANCEL_PHRASES:
+        return intent, "Okay, never mind."
+    slots = dict(pending["slots"])
+    if name not in FREE_TEXT_SLOTS:
+        matched, _ = match_intent(query)
+        if matched is not None and matched != intent:
+            return None
+        if matched == intent:
+            slots.update(extract_slots(intent, query))
+    if not slots.get(name):
+        slots[name] = slot_value(intent, name, query)
+    return run_command(intent, query, slots, session)
+
+# Startup: the lifespan runs these in parallel; jobs and the intent index
+# are critical, the rest only degrade their own features while warming
+UPSTREAM_URLS = [
+    "https://newsapi.org/",
+    "http://api.openweathermap.org/",
+    "https://api.adviceslip.com/",
+]
+
+def start_background_services():
+    corpus.start_background_refresh()
+    ip_service.start()
+
+def preload_plugin(name):
+    """Load a plugin at startup, so its background work starts without waiting for its first use"""
+    module = plugins.module(name)
+    if hasattr(module, "warm_up"):
+        module.warm_up()
+
+def start_audio_output():
+    mixer.start()
+    if BARGE_IN:
+        barge_in.start()
+
+def warm_intent_index():
+    get_classifier()
+    match_intent("warm up")
+
+warmup.add("jobs", job_queue.start, critical=True)
+warmup.add("intent_index", warm_intent_index, critical=True)
+warmup.add("background_services", start_background_services)
+warmup.add("voices", speech.load_voices)
+if AUDIO_OUTPUT == "mixer":
+    warmup.add("audio_output", start_audio_output)
+warmup.add("phrase_audio", lambda: speech.prerender(opening_text + list(SLOT_PROMPTS.values())))
+warmup.add("http_pools", lambda: http.warm(UPSTREAM_URLS))
+for name in PLUGIN_PRELOAD:
+    warmup.add(f"plugin:{name}", functools.partial(preload_plugin, name))
+warmup.add("launcher", launcher.start)
+warmup.add("recognizer", get_recognizer_backend)
+
+# Conversation sessions
+def get_session(body_session_id, header_session_id):
+    """Session for the id in the request body or X-Session-Id header"""
+    return sessions.get(body_session_id or header_session_id)
+
+def respond_in_session(session, query):
+    """
+    Answer a prompt for a missing slot or a follow-up from the session, or
+    process the command afresh; returns (intent, Reply)
+    """
+    with span("follow_up"):
+        follow_up = resume_pending(session, query)
+        if follow_up is None:
+            follow_up = resolve_follow_up(session, query,
+                                          fetch_weather=fetch_weather if plugins.handles("weather") else None)
+    if follow_up is not None:
+        intent, result = follow_up
     else:
-        # If no specific command matches
-        response = "I'm not sure how to help with that. Can you be more specific?"
-    
-    return response
+        intent, result = classify_and_process(query, session)
+    reply = as_reply(result)
+    session.add_turn(query, reply.text, intent)
+    return intent, reply
+
+def plugin_module(name):
+    """A plugin's module for its endpoints; 503 when it is disabled or not configured"""
+    try:
+        return plugins.module(name)
+    except PluginError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def plugin_handler(intent, query, slots, session):
+    """
+    Run a plugin's intent handler for its endpoint, within the plugin's
+    concurrency limit; 503 when it is disabled, not configured or busy
+    """
+    if not plugins.handles(intent):
+        raise HTTPException(status_code=503, detail=f"{intent} is not enabled")
+    try:
+        return plugins.handle(intent, query, slots, session)
+    except PluginError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def require_job_kind(kind):
+    """503 when the plugin running a job kind is disabled"""
+    if kind not in plugins.job_kinds():
+        raise HTTPException(status_code=503, detail=f"{kind} is not enabled")
+
+def screenshot_client(request: Request, x_talksy_token: str = Header(None)):
+    """Screenshots show the user's screen: 403 unless the client is trusted"""
+    if not is_trusted_client(request.client.host if request.client else None, request.headers.get("origin"),
+                             request.headers.get("sec-fetch-site"), x_talksy_token):
+        raise HTTPException(status_code=403,
+                            detail="Screenshots are only available from this machine or with X-Talksy-Token")
 
 # API Endpoints
 @app.get("/")
 async def root():
     return {"message": "Welcome to Talksy API. A virtual assistant that respects your privacy."}
 
+@app.get("/health")
+def health_check():
+    """Readiness of the TTS engine, recognizer, workers and upstream services"""
+    return health.snapshot()
+
+@app.get("/health/stream")
+async def health_stream():
+    """Server-sent readiness events, pushed whenever the report changes"""
+    return StreamingResponse(
+        health.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.get("/ready")
+def readiness():
+    """Per-subsystem warm-up state; 503 until the critical subsystems are ready"""
+    report = warmup.readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.get("/plugins")
+def plugin_status():
+    """Enabled plugins with their manifests and whether they are loaded"""
+    return {"success": True, "plugins": plugins.status()}
+
 @app.get("/greet")
-async def greet():
+async def greet(audio: str = Depends(audio_mode)):
     """Get a greeting based on the time of day"""
     greeting = greet_user()
-    return {"message": greeting, "spoken": speak(greeting)}
+    return {"message": greeting, **speech.deliver(greeting, audio)}
 
-@app.post("/process-text")
-async def process_text_command(command: TextCommand):
-    """Process a text command"""
+@app.post("/process-text", response_model=AssistantReply)
+async def process_text_command(command: TextCommand, x_session_id: str = Header(None),
+                               audio: str = Depends(audio_mode)):
+    """Process a text command, resolving follow-ups against the session"""
     try:
-        result = process_command(command.command)
-        return {"response": result, "spoken": speak(result)}
+        session = get_session(command.session_id, x_session_id)
+        # Handlers block on upstream calls and plugin slots, so they run off the event loop
+        return await asyncio.to_thread(answer_text_command, session, command.command, audio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/listen")
-async def listen_command(request: ListenRequest = None):
+def answer_text_command(session, command, audio):
+    intent, reply = respond_in_session(session, command)
+    return build_reply(intent, reply, audio, session)
+
+def answer_spoken_command(session, command, audio):
+    """Reply to a transcribed voice command, or report why there is none"""
+    if not command or "error" in command.lower() or "timeout" in command.lower():
+        return ListenReply(success=False, command=command, session_id=session.id)
+    
+    # Acknowledge with random phrase
+    if audio == "server":
+        speech.speak(choice(opening_text))
+    
+    intent, reply = respond_in_session(session, command)
+    return build_reply(intent, reply, audio, session, model=ListenReply, command=command)
+
+@app.post("/listen", response_model=ListenReply)
+async def listen_command(request: ListenRequest = None, x_session_id: str = Header(None),
+                         audio: str = Depends(audio_mode)):
     """Listen for a voice command"""
     try:
         if request is None:
             request = ListenRequest()
-            
-        command = listen_for_command(timeout=request.timeout)
-        
-        if not command or "error" in command.lower() or "timeout" in command.lower():
-            return {"success": False, "command": command}
+        session = get_session(request.session_id, x_session_id)
         
-        # Acknowledge with random phrase
-        acknowledgement = choice(opening_text)
-        speak(acknowledgement)
+        # One listener at a time holds the microphone; others queue briefly or get 429
+        async with microphone.hold():
+            command = await asyncio.to_thread(listen_for_command, request.timeout)
         
-        result = process_command(command)
-        return {
-            "success": True,
-            "command": command,
-            "response": result,
-            "spoken": speak(result)
-        }
+        return await asyncio.to_thread(answer_spoken_command, session, command, audio)
+    except RateLimited:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/speak")
-async def text_to_speech(request: SpeakRequest):
+@app.get("/listen/stream")
+async def listen_stream(timeout: int = 5, session_id: str = None, x_session_id: str = Header(None),
+                        audio: str = Depends(audio_mode)):
+    """
+    Listen for a voice command as server-sent events: "partial" events carry
+    interim transcripts while decoding, then a "result" event the reply
+    """
+    session = get_session(session_id, x_session_id)
+    # Taken before the response starts, so a busy microphone is still a 429
+    await microphone.acquire()
+    loop = asyncio.get_running_loop()
+    partials = asyncio.Queue()
+    
+    def on_partial(text):
+        loop.call_soon_threadsafe(partials.put_nowait, text)
+    
+    # Listening starts now and frees the microphone when the capture ends,
+    # whether or not the client reads the stream or is still connected
+    task = asyncio.ensure_future(asyncio.to_thread(listen_for_command, timeout, on_partial))
+    task.add_done_callback(lambda _: microphone.release())
+    
+    async def events():
+        while True:
+            partial = asyncio.ensure_future(partials.get())
+            done, _ = await asyncio.wait({partial, task}, return_when=asyncio.FIRST_COMPLETED)
+            if partial not in done:
+                partial.cancel()
+                break
+            yield f"event: partial\ndata: {json.dumps({'text': partial.result()})}\n\n"
+        while not partials.empty():
+            yield f"event: partial\ndata: {json.dumps({'text': partials.get_nowait()})}\n\n"
+        result = await asyncio.to_thread(answer_spoken_command, session, task.result(), audio)
+        yield f"event: result\ndata: {json.dumps(jsonable_encoder(result))}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/news")
+async def news_headlines(page: int = 1, page_size: int = 5, country: str = None, category: str = None):
+    """Get a page of prefetched news headlines"""
+    news_feed = plugin_module("news").news_feed
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), 50)
+    headlines, total = news_feed.headlines(
+        offset=(page - 1) * page_size, limit=page_size, country=country, category=category
+    )
+    # Served from the store only; until the first poll it is empty
+    return {"success": news_feed.last_error is None, "page": page, "page_size": page_size, "total": total,
+            "headlines": headlines, "polled": news_feed.polled, "error": news_feed.last_error}
+
+@app.get("/playback")
+def playback_status():
+    """What the server's audio output is playing"""
+    return {"success": True, **mixer.status()}
+
+@app.post("/playback/cancel")
+def cancel_playback():
+    """Stop whatever the server is saying"""
+    return {"success": True, "stopped": mixer.cancel()}
+
+@app.post("/speak", response_model=SpeakReply)
+async def text_to_speech(request: SpeakRequest, audio: str = Depends(audio_mode)):
     """Convert text to speech"""
     try:
-        spoken = speak(request.text)
-        return {"success": True, "text": spoken}
+        return SpeakReply(text=request.text, **speech.deliver(request.text, audio))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/wikipedia")
-async def wikipedia_search(request: WikipediaRequest):
-    """Search for a topic on Wikipedia"""
+@app.get("/audio/{speech_id}")
+def speech_audio(speech_id: str):
+    """Synthesize (on first fetch) and return the audio for a reply made with audio=stream"""
     try:
-        result = search_on_wikipedia(request.query)
-        return {"success": True, "result": result, "spoken": speak(f"According to Wikipedia, {result}")}
+        path = speech.render(speech_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired audio")
+    return FileResponse(path, media_type="audio/wav")
+
+@app.post("/wikipedia", response_model=WikipediaReply)
+async def wikipedia_search(request: WikipediaRequest, x_session_id: str = Header(None),
+                           audio: str = Depends(audio_mode)):
+    """Search for a topic on Wikipedia, keeping the rest of the summary for follow-ups"""
+    try:
+        session = get_session(request.session_id, x_session_id)
+        reply = await asyncio.to_thread(plugin_handler, "wikipedia", request.query, {"query": request.query}, session)
+        session.add_turn(request.query, reply.text, "wikipedia")
+        return build_reply("wikipedia", reply, audio, session, model=WikipediaReply, result=reply.text)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/youtube")
-async def youtube_play(request: YoutubeRequest):
-    """Play a video on YouTube"""
+@app.post("/youtube", status_code=202, response_model=JobAccepted)
+async def youtube_play(request: YoutubeRequest, idempotency_key: str = Header(None),
+                       audio: str = Depends(audio_mode)):
+    """Queue playing a video on YouTube"""
+    require_job_kind("youtube")
     try:
-        result = play_on_youtube(request.query)
-        return {"success": True, "result": result, "spoken": speak(f"Playing {request.query} on YouTube")}
+        job = job_queue.submit("youtube", {"query": request.query}, idempotency_key)
+        return job_response(job, f"Playing {request.query} on YouTube", audio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/google")
-async def google_search(request: GoogleRequest):
-    """Search on Google"""
+@app.post("/google", status_code=202, response_model=JobAccepted)
+async def google_search(request: GoogleRequest, idempotency_key: str = Header(None),
+                        audio: str = Depends(audio_mode)):
+    """Queue a Google search"""
+    require_job_kind("google")
     try:
-        result = search_on_google(request.query)
-        return {"success": True, "result": result, "spoken": speak(f"Searching for {request.query} on Google")}
+        job = job_queue.submit("google", {"query": request.query}, idempotency_key)
+        return job_response(job, f"Searching for {request.query} on Google", audio)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/screenshot", status_code=202, response_model=JobAccepted, dependencies=[Depends(screenshot_client)])
+async def screenshot(request: ScreenshotRequest = None, idempotency_key: str = Header(None),
+                     audio: str = Depends(audio_mode)):
+    """Queue taking a screenshot; the job result describes the saved file"""
+    try:
+        if request is None:
+            request = ScreenshotRequest()
+        job = job_queue.submit("screenshot", {"scale": request.scale, "format": request.format}, idempotency_key)
+        return job_response(job, "Taking a screenshot", audio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/weather")
-async def weather_report(request: WeatherRequest):
-    """Get weather report for a city"""
+@app.post("/weather", response_model=WeatherReply)
+async def weather_report(request: WeatherRequest, x_session_id: str = Header(None),
+                         audio: str = Depends(audio_mode)):
+    """Get weather report for a city; the readings are in data"""
     try:
-        weather, temperature, feels_like = get_weather_report(request.city)
-        response = f"The current temperature in {request.city} is {temperature}, but it feels like {feels_like}. The weather is {weather}."
-        return {"success": True, "weather": weather, "temperature": temperature, "feels_like": feels_like, "spoken": speak(response)}
+        session = get_session(request.session_id, x_session_id)
+        reply = await asyncio.to_thread(plugin_handler, "weather", request.city, {"city": request.city}, session)
+        session.add_turn(request.city, reply.text, "weather")
+        return build_reply("weather", reply, audio, session, model=WeatherReply, weather=reply.data["weather"],
+                           temperature=reply.data["temperature"], feels_like=reply.data["feels_like"])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/email")
-async def send_email_endpoint(request: EmailRequest):
-    """Send an email"""
+@app.post("/email", status_code=202, response_model=JobAccepted)
+async def send_email_endpoint(request: EmailRequest, idempotency_key: str = Header(None),
+                              audio: str = Depends(audio_mode)):
+    """Queue an email and return its job id straight away"""
+    mail = plugin_module("email")
     try:
-        success = send_email(request.receiver_address, request.subject, request.message)
-        if success:
-            response = "Email sent successfully"
-        else:
-            response = "Failed to send email"
-        return {"success": success, "message": response, "spoken": speak(response)}
+        job_id = mail.send_email(request.receiver_address, request.subject, request.message, idempotency_key)
+        # A retried request reports the state of the email it already queued
+        status = mail.get_email_status(job_id) or {"id": job_id, "status": "queued"}
+        return job_response(status, "Email queued for sending", audio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/whatsapp")
-async def send_whatsapp_endpoint(request: WhatsAppRequest):
-    """Send a WhatsApp message"""
+@app.get("/email/{job_id}")
+async def email_status(job_id: str):
+    """Get the delivery status of a queued email"""
+    status = plugin_module("email").get_email_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown email job")
+    return {"success": True, **status}
+
+@app.post("/whatsapp", status_code=202, response_model=JobAccepted)
+async def send_whatsapp_endpoint(request: WhatsAppRequest, idempotency_key: str = Header(None),
+                                 audio: str = Depends(audio_mode)):
+    """Queue a WhatsApp message"""
+    require_job_kind("whatsapp")
     try:
-        success = send_whatsapp_message(request.number, request.message)
-        if success:
-            response = "WhatsApp message sent successfully"
-        else:
-            response = "Failed to send WhatsApp message"
-        return {"success": success, "message": response, "spoken": speak(response)}
+        job = job_queue.submit("whatsapp", {"number": request.number, "message": request.message}, idempotency_key)
+        return job_response(job, "Sending WhatsApp message", audio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/screenshots", dependencies=[Depends(screenshot_client)])
+def list_screenshots():
+    """List stored screenshots, newest first"""
+    return {"success": True, "screenshots": [
+        {key: item[key] for key in ("name", "size", "created_at")}
+        for item in screenshot_service.list_screenshots()
+    ]}
+
+@app.get("/screenshots/{name}", dependencies=[Depends(screenshot_client)])
+def get_screenshot(name: str):
+    """Fetch a stored screenshot"""
+    path = screenshot_service.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown screenshot")
+    return FileResponse(path)
+
+@app.get("/debug/traces")
+def slowest_traces(limit: int = 20, min_ms: float = 0.0):
+    """The slowest recent requests and jobs"""
+    return {"success": True, "traces": tracer.slowest(min(max(limit, 1), 200), min_ms)}
+
+@app.get("/debug/traces/{trace_id}")
+def trace_detail(trace_id: str):
+    """Spans and errors of one recent trace"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace")
+    return {"success": True, **trace}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Get the status of a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return {"success": True, "job_id": job["id"], "kind": job["kind"], "status": job["status"],
+            "created_at": job["created_at"], "updated_at": job["updated_at"]}
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """Get the result of a finished background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job["status"] in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}")
+    return {"success": job["status"] == "succeeded", "job_id": job["id"], "status": job["status"],
+            "result": job["result"], "error": job["error"]}
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
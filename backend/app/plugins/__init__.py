@@ -0,0 +1,63 @@
+"""
+Built-in plugin manifests. The plugin modules next to this file are only
+imported when one of their intents (or jobs) is first used.
+"""
+from ..core.plugins import PluginManifest, ConfigOption, CachePolicy
+
+BUILTIN_PLUGINS = [
+    PluginManifest(
+        "weather", "app.plugins.weather",
+        intents=["weather"],
+        config=[
+            ConfigOption("api_key", "OPENWEATHER_APP_ID", required=True, secret=True),
+            ConfigOption("units", "WEATHER_UNITS", default="metric"),
+        ],
+        cache=CachePolicy(ttl=600, max_entries=256),
+        concurrency=4,
+        description="Current weather from OpenWeatherMap",
+    ),
+    PluginManifest(
+        "news", "app.plugins.news",
+        intents=["news"],
+        config=[ConfigOption("api_key", "NEWS_API_KEY", required=True, secret=True)],
+        concurrency=2,
+        description="Top headlines from NewsAPI, prefetched in the background",
+    ),
+    PluginManifest(
+        "wiki", "app.plugins.wiki",
+        intents=["wikipedia"],
+        config=[ConfigOption("sentences", "WIKIPEDIA_SENTENCES", default=2, cast=int)],
+        cache=CachePolicy(ttl=3600, max_entries=256),
+        concurrency=4,
+        description="Wikipedia summaries",
+    ),
+    PluginManifest(
+        "email", "app.plugins.mail",
+        intents=["email"],
+        config=[
+            ConfigOption("address", "EMAIL", required=True),
+            ConfigOption("password", "PASSWORD", required=True, secret=True),
+        ],
+        concurrency=2,
+        description="Outgoing email through a spooled SMTP queue",
+    ),
+    PluginManifest(
+        "whatsapp", "app.plugins.whatsapp",
+        intents=["whatsapp"],
+        jobs=["whatsapp"],
+        concurrency=1,
+        description="WhatsApp messages sent through WhatsApp Web",
+    ),
+    PluginManifest(
+        "web", "app.plugins.web",
+        intents=["youtube", "google"],
+        jobs=["youtube", "google"],
+        concurrency=2,
+        description="YouTube playback and Google searches in the browser",
+    ),
+    PluginManifest(
+        "apps", "app.plugins.apps",
+        intents=["open_notepad", "open_discord", "open_cmd", "open_camera", "open_calculator", "open_app"],
+        description="Opening desktop applications",
+    ),
+]
@@ -0,0 +1,11 @@
+from ..functions.os_ops import open_calculator, open_camera, open_cmd, open_notepad, open_discord
+from ..functions.system_functions import open_application
+
+HANDLERS = {
+    "open_notepad": lambda query, slots, session: open_notepad(),
+    "open_discord": lambda query, slots, session: open_discord(),
+    "open_cmd": lambda query, slots, session: open_cmd(),
+    "open_camera": lambda query, slots, session: open_camera(),
+    "open_calculator": lambda query, slots, session: open_calculator(),
+    "open_app": lambda query, slots, session: open_application(slots["app"]),
+}
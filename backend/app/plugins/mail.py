@@ -0,0 +1,43 @@
+from ..core.mail_queue import MailQueue, SMTPConnectionPool, SMTP_HOST, SMTP_PORT, SMTP_STARTTLS
+from ..core.plugins import Reply
+from ..utils import USERNAME
+
+# Outgoing mail is spooled and delivered over pooled SMTP connections
+mail_queue = None
+
+
+def setup(context):
+    global mail_queue
+    address = context.config["address"]
+    mail_queue = MailQueue(
+        SMTPConnectionPool(SMTP_HOST, SMTP_PORT, address, context.config["password"], starttls=SMTP_STARTTLS),
+        sender=address
+    )
+
+
+def start():
+    mail_queue.start()
+
+
+def health():
+    return mail_queue.running()
+
+
+def send_email(receiver_address, subject, message, idempotency_key=None):
+    """Queue an email for delivery and return its job id"""
+    return mail_queue.enqueue(receiver_address, subject, message, idempotency_key)
+
+
+def get_email_status(job_id):
+    """Get the delivery status of a queued email"""
+    return mail_queue.status(job_id)
+
+
+def email_command(query, slots, session):
+    if "@" not in slots["recipient"]:
+        return f"I don't have an email address for {slots['recipient']}."
+    job_id = send_email(slots["recipient"], slots.get("subject", f"Message from {USERNAME}"), slots["message"])
+    return Reply(f"Email to {slots['recipient']} queued for sending", data={"job_id": job_id})
+
+
+HANDLERS = {"email": email_command}
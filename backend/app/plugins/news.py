@@ -0,0 +1,49 @@
+from ..core.admission import news_quota
+from ..core.news_feed import HeadlinePrefetcher
+from ..core.plugins import Reply
+
+# How long preloading waits for the first poll
+HEADLINES_WARMUP_TIMEOUT = 15
+
+# Headlines are prefetched in the background and served from memory
+news_feed = None
+
+
+def setup(context):
+    global news_feed
+    news_feed = HeadlinePrefetcher(context.config["api_key"], quota=news_quota)
+
+
+def start():
+    news_feed.start()
+
+
+def warm_up():
+    if not news_feed.wait_until_polled(HEADLINES_WARMUP_TIMEOUT):
+        raise RuntimeError("First headline poll did not finish in time")
+
+
+def health():
+    return (news_feed.last_error is None, news_feed.last_error)
+
+
+def get_latest_news():
+    """Get the latest news headlines from the prefetched headline store"""
+    headlines, _ = news_feed.headlines(limit=5)
+    if not headlines:
+        if news_feed.last_error:
+            return [f"Error fetching news: {news_feed.last_error}"]
+        if not news_feed.polled:
+            return ["The headlines are still loading, ask me again in a moment."]
+        return ["No news articles found."]
+    
+    return [headline['title'] for headline in headlines]
+
+
+def news_command(query, slots, session):
+    headlines = get_latest_news()
+    found = bool(news_feed.headlines(limit=1)[0])
+    return Reply("\n".join(headlines), data={"headlines": headlines}, success=found)
+
+
+HANDLERS = {"news": news_command}
@@ -0,0 +1,65 @@
+from ..core import http
+from ..core.admission import weather_quota, RateLimited
+from ..core.follow_ups import remember_weather, weather_sentence
+from ..core.plugins import Reply
+from ..core.tracing import traced
+
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+UNIT_SUFFIXES = {"metric": "°C", "imperial": "°F", "standard": "K"}
+
+context = None
+
+
+def setup(plugin_context):
+    global context
+    context = plugin_context
+
+
+def _fetch(city):
+    weather_quota.acquire()
+    params = {
+        "q": city,
+        "appid": context.config["api_key"],
+        "units": context.config["units"]
+    }
+    response = http.get(WEATHER_URL, params=params)
+    if response.status_code == 429:
+        weather_quota.penalize(response.headers.get("Retry-After", 60))
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    data = response.json()
+    suffix = UNIT_SUFFIXES.get(context.config["units"], "")
+    return (data["weather"][0]["description"], f"{data['main']['temp']}{suffix}",
+            f"{data['main']['feels_like']}{suffix}")
+
+
+@traced("weather.lookup")
+def lookup_weather(city):
+    """(description, temperature, feels_like) for a city; raises when the lookup fails"""
+    # Failed lookups raise, so only real reports are cached
+    return context.cached(f"weather:{city.lower()}", lambda: _fetch(city))
+
+
+def failure_text(e):
+    if isinstance(e, RateLimited):
+        return f"Weather lookups are paused ({str(e)}), try again in {e.retry_after} seconds"
+    return f"Error getting weather data: {str(e)}"
+
+
+def weather_command(query, slots, session):
+    city = slots["city"]
+    try:
+        report = lookup_weather(city)
+    except Exception as e:
+        text = failure_text(e)
+        return Reply(text, data={"city": city, "weather": text, "temperature": "N/A", "feels_like": "N/A"},
+                     success=False)
+    if session is not None:
+        remember_weather(session, city, report)
+    weather, temperature, feels_like = report
+    return Reply(weather_sentence(city, report), data={
+        "city": city, "weather": weather, "temperature": temperature, "feels_like": feels_like
+    })
+
+
+HANDLERS = {"weather": weather_command}
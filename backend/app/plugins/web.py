@@ -0,0 +1,53 @@
+import pywhatkit as kit
+
+from ..core.jobs import job_queue
+from ..core.plugins import Reply
+from ..core.tracing import traced, record_error
+
+
+@traced("youtube.play")
+def play_on_youtube(video):
+    """Play a video on YouTube"""
+    try:
+        kit.playonyt(video)
+        return True
+    except Exception as e:
+        record_error("YouTube", e)
+        return False
+
+
+@traced("google.search")
+def search_on_google(query):
+    """Search on Google"""
+    try:
+        kit.search(query)
+        return True
+    except Exception as e:
+        record_error("Google", e)
+        return False
+
+
+def youtube_job(payload):
+    if not play_on_youtube(payload["query"]):
+        raise RuntimeError("Failed to play on YouTube")
+    return f"Playing {payload['query']} on YouTube"
+
+
+def google_job(payload):
+    if not search_on_google(payload["query"]):
+        raise RuntimeError("Failed to search the web")
+    return f"Searching for {payload['query']} on Google"
+
+
+def youtube_command(query, slots, session):
+    job = job_queue.submit("youtube", {"query": slots["query"]})
+    return Reply(f"Playing {slots['query']} on YouTube", data={"job_id": job["id"]})
+
+
+def google_command(query, slots, session):
+    job = job_queue.submit("google", {"query": slots["query"]})
+    return Reply(f"Searching for {slots['query']} on Google", data={"job_id": job["id"]})
+
+
+HANDLERS = {"youtube": youtube_command, "google": google_command}
+JOBS = {"youtube": youtube_job, "google": google_job}
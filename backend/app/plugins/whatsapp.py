@@ -0,0 +1,34 @@
+import pywhatkit as kit
+
+from ..core.jobs import job_queue
+from ..core.plugins import Reply
+from ..core.tracing import traced, record_error
+
+
+@traced("whatsapp.send")
+def send_whatsapp_message(number, message):
+    """Send a WhatsApp message"""
+    try:
+        kit.sendwhatmsg_instantly(f"+{number}", message)
+        return True
+    except Exception as e:
+        record_error("WhatsApp", e)
+        return False
+
+
+def whatsapp_job(payload):
+    if not send_whatsapp_message(payload["number"], payload["message"]):
+        raise RuntimeError("Failed to send WhatsApp message")
+    return "WhatsApp message sent successfully"
+
+
+def whatsapp_command(query, slots, session):
+    number = slots["recipient"].lstrip("+")
+    if not number.isdigit():
+        return f"I don't have a phone number for {slots['recipient']}."
+    job = job_queue.submit("whatsapp", {"number": number, "message": slots["message"]})
+    return Reply(f"Sending WhatsApp message to +{number}", data={"job_id": job["id"]})
+
+
+HANDLERS = {"whatsapp": whatsapp_command}
+JOBS = {"whatsapp": whatsapp_job}
@@ -0,0 +1,38 @@
+import wikipedia
+
+from ..core.follow_ups import remember_wikipedia, WIKIPEDIA_CHUNK
+from ..core.plugins import Reply
+from ..core.tracing import traced
+
+context = None
+
+
+def setup(plugin_context):
+    global context
+    context = plugin_context
+
+
+@traced("wikipedia.search")
+def summarize(query, sentences=None):
+    """Wikipedia summary of a topic; raises when the search fails"""
+    if sentences is None:
+        sentences = context.config["sentences"]
+    # Errors raise out of the cache, so only summaries are kept
+    return context.cached((query.lower(), sentences), lambda: wikipedia.summary(query, sentences=sentences))
+
+
+def wikipedia_command(query, slots, session):
+    topic = slots["query"]
+    try:
+        if session is None:
+            result = summarize(topic)
+        else:
+            summary = summarize(topic, sentences=3 * WIKIPEDIA_CHUNK)
+            remember_wikipedia(session, topic, summary, shown=WIKIPEDIA_CHUNK)
+            result = " ".join(session.cache_get(f"wikipedia:{topic.lower()}")["sentences"][:WIKIPEDIA_CHUNK])
+    except Exception as e:
+        return Reply(f"An error occurred while searching Wikipedia: {str(e)}", data={"topic": topic}, success=False)
+    return Reply(result, data={"topic": topic}, speech_text=f"According to Wikipedia, {result}")
+
+
+HANDLERS = {"wikipedia": wikipedia_command}
@@ -0,0 +1,79 @@
+"""
+Accuracy and latency of intent matching on noisy transcripts.
+
+Compares the exact keyword rules alone, keyword rules plus the fuzzy
+n-gram index, and the local classifier in front of both, then measures
+batch classification throughput. Run from the backend directory:
+
+    python -m benchmarks.intent_benchmark [transcripts.tsv]
+"""
+import os
+import sys
+import time
+
+from app.core.intents import get_classifier, match_intent, match_keywords, match_rules
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "noisy_transcripts.tsv")
+
+
+def load_corpus(path):
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            transcript, _, expected = line.partition("\t")
+            samples.append((transcript.lower().strip(), expected.strip() or None))
+    return samples
+
+
+def evaluate(name, matcher, samples, repeat=200):
+    correct = 0
+    misses = []
+    for transcript, expected in samples:
+        predicted = matcher(transcript)
+        if predicted == expected:
+            correct += 1
+        else:
+            misses.append((transcript, expected, predicted))
+
+    timings = []
+    for transcript, _ in samples:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            matcher(transcript)
+        timings.append((time.perf_counter() - start) / repeat * 1e6)
+    timings.sort()
+
+    print(f"{name}")
+    print(f"  accuracy: {correct}/{len(samples)} ({100.0 * correct / len(samples):.1f}%)")
+    print(f"  latency:  p50 {timings[len(timings) // 2]:.1f} us, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1]:.1f} us, max {timings[-1]:.1f} us")
+    for transcript, expected, predicted in misses:
+        print(f"  miss: {transcript!r} expected {expected} got {predicted}")
+    return correct
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS
+    samples = load_corpus(path)
+    evaluate("keyword rules", match_keywords, samples)
+    evaluate("keyword rules + fuzzy index", lambda q: match_rules(q)[0], samples)
+
+    classifier = get_classifier()
+    if classifier is None:
+        print("classifier unavailable, skipping")
+        return
+    evaluate("classifier + keyword rules + fuzzy index", lambda q: match_intent(q)[0], samples)
+
+    batch = [transcript for transcript, _ in samples] * (10000 // len(samples) + 1)
+    start = time.perf_counter()
+    classifier.classify_batch(batch)
+    elapsed = time.perf_counter() - start
+    print(f"batch classification: {len(batch)} utterances in {elapsed * 1000:.0f} ms "
+          f"({len(batch) / elapsed:.0f} per second)")
+
+
+if __name__ == "__main__":
+    main()
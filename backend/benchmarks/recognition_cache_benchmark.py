@@ -0,0 +1,133 @@
+"""
+Hit rate, false hits and overhead of the recognition cache on replayed audio.
+
+With a fixtures directory of 16-bit mono WAV files and a transcripts.tsv
+(file name, tab, transcript), each file is replayed several times with
+random gain, offset and noise. Without one, synthetic vowel-like
+utterances stand in for recorded commands. Some of them share a carrier
+phrase and differ only in a short ending, like "weather in paris" and
+"weather in london". Commands are drawn with a skewed distribution, as in
+real use, and a share of one-off utterances (half of them a known carrier
+with a new ending) checks that new speech is never answered from the
+cache. Run from the backend directory:
+
+    python -m benchmarks.recognition_cache_benchmark [fixtures_dir]
+"""
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+from app.core.audio_cache import RecognitionCache, fingerprint_pcm, SAMPLE_RATE
+
+REQUESTS = 400
+ONE_OFF_SHARE = 0.2
+# Typical round trip of a cloud recognizer, used to estimate time saved
+ASSUMED_RECOGNITION_SECONDS = 0.6
+
+
+def load_fixtures(directory):
+    fixtures = []
+    with open(os.path.join(directory, "transcripts.tsv"), encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            name, _, transcript = line.partition("\t")
+            with wave.open(os.path.join(directory, name), "rb") as wav:
+                if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                    raise ValueError(f"{name}: expected 16-bit mono audio")
+                samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+                rate = wav.getframerate()
+            if rate != SAMPLE_RATE:
+                positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+                samples = np.interp(positions, np.arange(len(samples)), samples)
+            fixtures.append((transcript, samples.astype(np.float32) / 32768))
+    return fixtures
+
+
+def synthetic_utterance(seed, seconds=1.2):
+    """Syllables of harmonics shaped by two random formants"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    signal = np.zeros_like(t)
+    syllables = int(rng.integers(3, 7))
+    length = len(t) // syllables
+    for i in range(syllables):
+        f0, f1, f2 = rng.uniform(100, 220), rng.uniform(300, 900), rng.uniform(900, 2500)
+        part = t[i * length:(i + 1) * length]
+        envelope = np.sin(np.pi * np.arange(len(part)) / len(part))
+        for harmonic in np.arange(f0, 4000, f0):
+            amplitude = np.exp(-((harmonic - f1) / 150) ** 2) + 0.6 * np.exp(-((harmonic - f2) / 250) ** 2) + 0.02
+            signal[i * length:(i + 1) * length] += amplitude * np.sin(2 * np.pi * harmonic * part) * envelope
+    return signal / np.abs(signal).max()
+
+
+def shared_prefix_utterance(carrier, ending):
+    """A 1.2 s carrier phrase followed by a 0.5 s ending"""
+    return np.concatenate([synthetic_utterance(500 + carrier, 1.2), synthetic_utterance(2000 + ending, 0.5)])
+
+
+def replay(signal, rng, noise=0.01):
+    """The same utterance captured again: new gain, offset and background noise"""
+    lead = np.zeros(int(rng.integers(0, 3000)))
+    out = np.concatenate([lead, signal * rng.uniform(0.5, 1.5), np.zeros(2000)])
+    out += rng.normal(0, noise, len(out))
+    return np.clip(out * 8000, -32768, 32767).astype(np.int16)
+
+
+def main(argv):
+    rng = np.random.default_rng(7)
+    if len(argv) > 1:
+        fixtures = load_fixtures(argv[1])
+        one_offs = []
+        print(f"{len(fixtures)} recorded fixtures from {argv[1]}")
+    else:
+        fixtures = [(f"command {i}", synthetic_utterance(i)) for i in range(12)]
+        fixtures += [(f"carrier {c} ending {e}", shared_prefix_utterance(c, e)) for c in range(3) for e in range(3)]
+        count = int(REQUESTS * ONE_OFF_SHARE)
+        one_offs = [synthetic_utterance(1000 + i) for i in range(count // 2)]
+        one_offs += [shared_prefix_utterance(i % 3, 100 + i) for i in range(count - count // 2)]
+        print(f"{len(fixtures)} synthetic commands, {len(one_offs)} one-off utterances")
+
+    weights = 1.0 / np.arange(1, len(fixtures) + 1)
+    # Keep the carrier families in the mix rather than in the long tail
+    rng.shuffle(weights)
+    weights /= weights.sum()
+    draws = [("repeat", int(i)) for i in rng.choice(len(fixtures), REQUESTS - len(one_offs), p=weights)]
+    draws += [("one-off", i) for i in range(len(one_offs))]
+    rng.shuffle(draws)
+
+    cache = RecognitionCache()
+    correct = wrong = false_hits = recognitions = 0
+    elapsed = 0.0
+    for kind, index in draws:
+        samples = replay(fixtures[index][1] if kind == "repeat" else one_offs[index], rng)
+        expected = fixtures[index][0] if kind == "repeat" else f"one-off {index}"
+        started = time.perf_counter()
+        fp = fingerprint_pcm(samples)
+        transcript = cache.lookup(fp)
+        elapsed += time.perf_counter() - started
+        if transcript is None:
+            recognitions += 1
+            cache.store(fp, expected)
+        elif transcript == expected:
+            correct += 1
+        elif kind == "one-off":
+            false_hits += 1
+        else:
+            wrong += 1
+
+    print(f"requests:           {len(draws)}")
+    print(f"cache hits:         {correct} ({correct / len(draws):.1%})")
+    print(f"wrong transcripts:  {wrong + false_hits} ({false_hits} on one-off speech)")
+    print(f"recognizer calls:   {recognitions}")
+    print(f"fingerprint+lookup: {elapsed / len(draws) * 1000:.2f} ms per utterance")
+    print(f"estimated saving:   {correct * ASSUMED_RECOGNITION_SECONDS:.0f} s of recognition round trips")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
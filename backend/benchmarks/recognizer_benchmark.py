@@ -0,0 +1,76 @@
+"""
+Word error rate and real-time factor of the speech recognizer backends.
+
+Runs every backend that can be loaded over a recorded test set: a
+directory of 16-bit mono WAV files with a transcripts.tsv (file name, tab,
+reference transcript), the same layout as the recognition cache
+benchmark. The Google backend needs a network connection and the Vosk
+backend a model at VOSK_MODEL_PATH. Run from the backend directory:
+
+    python -m benchmarks.recognizer_benchmark fixtures_dir [backend ...]
+"""
+import sys
+
+import numpy as np
+import speech_recognition as sr
+
+from app.core.recognizers import BACKENDS, SAMPLE_RATE
+from benchmarks.recognition_cache_benchmark import load_fixtures
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance"""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, guess in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (word != guess))
+    return row[-1]
+
+
+def run(backend, fixtures):
+    errors = words = failures = 0
+    rtfs = []
+    for reference, samples in fixtures:
+        audio = sr.AudioData((samples * 32767).astype(np.int16).tobytes(), SAMPLE_RATE, 2)
+        try:
+            result = backend.transcribe(audio)
+            text = result.text
+            rtfs.append(result.rtf)
+        except sr.UnknownValueError:
+            text = ""
+            rtfs.append(backend.last.rtf)
+        except sr.RequestError:
+            failures += 1
+            continue
+        errors += word_errors(reference, text)
+        words += len(reference.split())
+    return errors / max(words, 1), rtfs, failures
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+    fixtures = load_fixtures(argv[1])
+    names = argv[2:] or list(BACKENDS)
+    print(f"{len(fixtures)} utterances, {sum(len(s) for _, s in fixtures) / SAMPLE_RATE:.1f}s of audio\n")
+    print(f"{'backend':<10}{'WER':>8}{'mean RTF':>10}{'p95 RTF':>10}{'failed':>8}")
+    for name in names:
+        backend = BACKENDS[name]()
+        try:
+            backend.warm_up()
+        except Exception as e:
+            print(f"{name:<10}unavailable: {str(e)}")
+            continue
+        wer, rtfs, failures = run(backend, fixtures)
+        if not rtfs:
+            print(f"{name:<10}{'-':>8}{'-':>10}{'-':>10}{failures:>8}")
+            continue
+        print(f"{name:<10}{wer:>8.1%}{np.mean(rtfs):>10.3f}{np.percentile(rtfs, 95):>10.3f}{failures:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
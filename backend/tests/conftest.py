@@ -0,0 +1,86 @@
+import socketserver
+import threading
+
+import pytest
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: greeting, EHLO, MAIL, RCPT, DATA, NOOP, RSET, QUIT"""
+    def send(self, reply):
+        self.wfile.write(f"{reply}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.send("220 localhost SMTP stand-in")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.send("250 localhost")
+            elif verb == "MAIL":
+                recipients = []
+                self.send("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address in server.refused:
+                    self.send("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.send("250 OK")
+            elif verb == "DATA":
+                self.send("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line == b".\r\n":
+                        break
+                    data.append(line)
+                reply = server.data_replies.pop(0) if server.data_replies else "250 OK"
+                if reply.startswith("250"):
+                    server.messages.append((recipients, b"".join(data).decode()))
+                self.send(reply)
+                if reply.startswith("421"):
+                    return
+            elif verb in ("NOOP", "RSET"):
+                self.send("250 OK")
+            elif verb == "QUIT":
+                self.send("221 Bye")
+                return
+            else:
+                self.send("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """
+    Local SMTP server for mail queue tests. data_replies are answered to
+    DATA in order (e.g. "451 Try again later"; a 421 also drops the
+    connection), refused recipients get 550, accepted mail is in messages.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.messages = []
+        self.data_replies = []
+        self.refused = set()
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.admission import DeviceSlot, MemoryStore, RateLimited, SQLiteStore, TokenBucketLimiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStore(str(tmp_path / "limits.sqlite3"))
+    return MemoryStore()
+
+
+def test_burst_then_rate_limited(store):
+    limiter = TokenBucketLimiter(store, rate=1, capacity=3, prefix="ip")
+    for _ in range(3):
+        limiter.check("10.0.0.1")
+
+    with pytest.raises(RateLimited) as raised:
+        limiter.check("10.0.0.1")
+    assert raised.value.retry_after == 1
+
+
+def test_keys_have_separate_buckets(store):
+    limiter = TokenBucketLimiter(store, rate=1, capacity=1, prefix="ip")
+    limiter.check("10.0.0.1")
+    limiter.check("10.0.0.2")
+    with pytest.raises(RateLimited):
+        limiter.check("10.0.0.1")
+
+
+def test_tokens_refill_over_time(store):
+    limiter = TokenBucketLimiter(store, rate=20, capacity=1, prefix="route:/speak")
+    limiter.check()
+    with pytest.raises(RateLimited):
+        limiter.check()
+    time.sleep(0.06)
+    limiter.check()
+
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first = TokenBucketLimiter(SQLiteStore(path), rate=0.01, capacity=2, prefix="ip")
+    second = TokenBucketLimiter(SQLiteStore(path), rate=0.01, capacity=2, prefix="ip")
+    first.check("10.0.0.1")
+    second.check("10.0.0.1")
+    with pytest.raises(RateLimited):
+        first.check("10.0.0.1")
+
+
+def test_device_slot_serializes_holders():
+    slot = DeviceSlot("microphone", max_waiting=2, wait_timeout=5)
+    order = []
+
+    async def use(name):
+        async with slot.hold():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.02)
+            order.append(f"{name} end")
+
+    async def main():
+        await asyncio.gather(use("a"), use("b"))
+        assert not slot.busy
+
+    asyncio.run(main())
+    assert order == ["a start", "a end", "b start", "b end"]
+
+
+def test_device_slot_rejects_when_queue_is_full():
+    slot = DeviceSlot("microphone", max_waiting=0, wait_timeout=5)
+
+    async def main():
+        await slot.acquire()
+        with pytest.raises(RateLimited) as raised:
+            await slot.acquire()
+        assert "busy" in str(raised.value)
+        slot.release()
+        await slot.acquire()
+        slot.release()
+
+    asyncio.run(main())
+
+
+def test_device_slot_wait_times_out():
+    slot = DeviceSlot("microphone", max_waiting=2, wait_timeout=0.05)
+
+    async def main():
+        await slot.acquire()
+        started = time.monotonic()
+        with pytest.raises(RateLimited):
+            await slot.acquire()
+        assert time.monotonic() - started >= 0.05
+        # The timed-out waiter no longer counts as queued
+        assert slot._queued == 1
+        slot.release()
+        assert not slot.busy
+
+    asyncio.run(main())
+
+
+def test_device_slot_released_from_done_callback():
+    slot = DeviceSlot("microphone", max_waiting=2, wait_timeout=1)
+
+    async def main():
+        await slot.acquire()
+        task = asyncio.ensure_future(asyncio.sleep(0.02))
+        task.add_done_callback(lambda _: slot.release())
+        assert slot.busy
+        async with slot.hold():
+            assert task.done()
+
+    asyncio.run(main())
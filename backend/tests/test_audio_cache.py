@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from app.core.audio_cache import SAMPLE_RATE, RecognitionCache, fingerprint_pcm
+
+
+def utterance(seed, seconds=1.2):
+    """Vowel-like syllables: harmonics of a random pitch shaped by two formants"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    signal = np.zeros_like(t)
+    length = len(t) // 4
+    for i in range(4):
+        f0, f1, f2 = rng.uniform(100, 220), rng.uniform(300, 900), rng.uniform(900, 2500)
+        part = t[i * length:(i + 1) * length]
+        envelope = np.sin(np.pi * np.arange(len(part)) / len(part))
+        for harmonic in np.arange(f0, 4000, f0):
+            amplitude = np.exp(-((harmonic - f1) / 150) ** 2) + 0.6 * np.exp(-((harmonic - f2) / 250) ** 2) + 0.02
+            signal[i * length:(i + 1) * length] += amplitude * np.sin(2 * np.pi * harmonic * part) * envelope
+    return signal / np.abs(signal).max()
+
+
+def capture(signal, seed, gain=1.0, lead=0):
+    """The utterance as recorded: gain, leading silence and background noise"""
+    rng = np.random.default_rng(seed)
+    out = np.concatenate([np.zeros(lead), signal * gain, np.zeros(2000)])
+    out += rng.normal(0, 0.01, len(out))
+    return np.clip(out * 8000, -32768, 32767).astype(np.int16)
+
+
+class Audio:
+    """Stand-in for speech_recognition.AudioData"""
+    def __init__(self, samples):
+        self.samples = samples
+
+    def get_raw_data(self, convert_rate=None, convert_width=None):
+        return self.samples.tobytes()
+
+
+def test_repeat_with_new_gain_and_offset_is_a_hit():
+    cache = RecognitionCache()
+    signal = utterance(1)
+    cache.store(fingerprint_pcm(capture(signal, 10)), "what time is it")
+
+    assert cache.lookup(fingerprint_pcm(capture(signal, 11, gain=1.4, lead=1234))) == "what time is it"
+    assert cache.hits == 1
+
+
+def test_different_utterance_is_a_miss():
+    cache = RecognitionCache()
+    cache.store(fingerprint_pcm(capture(utterance(1), 10)), "what time is it")
+
+    assert cache.lookup(fingerprint_pcm(capture(utterance(2), 11))) is None
+    assert cache.misses == 1
+
+
+def test_shared_carrier_phrase_with_new_ending_is_a_miss():
+    carrier = utterance(3)
+    cache = RecognitionCache()
+    cache.store(fingerprint_pcm(capture(np.concatenate([carrier, utterance(4, 0.5)]), 10)), "weather in paris")
+
+    other = capture(np.concatenate([carrier, utterance(5, 0.5)]), 11)
+    assert cache.lookup(fingerprint_pcm(other)) is None
+
+
+def test_much_longer_utterance_is_a_miss():
+    signal = utterance(1)
+    cache = RecognitionCache()
+    cache.store(fingerprint_pcm(capture(signal, 10)), "hello")
+
+    assert cache.lookup(fingerprint_pcm(capture(np.concatenate([signal, signal]), 11))) is None
+
+
+def test_too_short_audio_has_no_fingerprint():
+    assert fingerprint_pcm(np.zeros(100, dtype=np.int16)) is None
+    assert RecognitionCache().lookup(None) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RecognitionCache(max_entries=2)
+    signals = [utterance(seed) for seed in (1, 2, 6)]
+    for i, signal in enumerate(signals[:2]):
+        cache.store(fingerprint_pcm(capture(signal, i)), f"command {i}")
+    cache.lookup(fingerprint_pcm(capture(signals[0], 20)))
+    cache.store(fingerprint_pcm(capture(signals[2], 2)), "command 2")
+
+    assert len(cache) == 2
+    assert cache.lookup(fingerprint_pcm(capture(signals[0], 21))) == "command 0"
+    assert cache.lookup(fingerprint_pcm(capture(signals[1], 22))) is None
+
+
+@pytest.mark.parametrize("transcript, cached", [("open notepad", True), ("", False)])
+def test_recognize_calls_the_recognizer_once(transcript, cached):
+    cache = RecognitionCache()
+    signal = utterance(1)
+    calls = []
+
+    def recognize(audio):
+        calls.append(audio)
+        return transcript
+
+    cache.recognize(Audio(capture(signal, 10)), recognize)
+    assert cache.recognize(Audio(capture(signal, 11)), recognize) == transcript
+    assert len(calls) == (1 if cached else 2)
+
+
+def test_uncacheable_transcripts_are_not_stored():
+    cache = RecognitionCache()
+    cache.recognize(Audio(capture(utterance(1), 10)), lambda audio: "send an email", cacheable=lambda t: False)
+
+    assert len(cache) == 0
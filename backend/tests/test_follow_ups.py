@@ -0,0 +1,97 @@
+import pytest
+
+from app.core.follow_ups import remember_weather, remember_wikipedia, resolve_follow_up
+from app.core.intents import match_intent
+from app.core.sessions import Session
+
+PARIS = ("clear sky", "21°C", "20°C")
+
+
+@pytest.fixture
+def weather_session():
+    session = Session("test")
+    session.add_turn("weather in paris", "The current temperature in Paris is 21°C", "weather")
+    remember_weather(session, "Paris", PARIS)
+    return session
+
+
+class FetchWeather:
+    def __init__(self, report=("light rain", "12°C", "10°C"), error=None):
+        self.report = report
+        self.error = error
+        self.cities = []
+
+    def __call__(self, city):
+        self.cities.append(city)
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.report
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("how about a joke", "joke"),
+    ("and the news?", "news"),
+    ("and open notepad", "open_notepad"),
+])
+def test_other_commands_are_not_taken_for_cities(weather_session, query, intent):
+    fetch = FetchWeather()
+
+    assert resolve_follow_up(weather_session, query, fetch_weather=fetch) is None
+    assert fetch.cities == []
+    assert match_intent(query)[0] == intent
+
+
+@pytest.mark.parametrize("query, city", [
+    ("what about london", "London"),
+    ("and in new york?", "New York"),
+    # Not in the gazetteer, but not any other command either
+    ("how about springfield", "Springfield"),
+])
+def test_other_city_is_looked_up_and_remembered(weather_session, query, city):
+    fetch = FetchWeather()
+
+    intent, reply = resolve_follow_up(weather_session, query, fetch_weather=fetch)
+
+    assert intent == "weather"
+    assert fetch.cities == [city]
+    assert "12°C" in reply
+    assert weather_session.slots["last_city"] == city
+
+
+def test_failed_lookup_keeps_the_last_report(weather_session):
+    fetch = FetchWeather(error="Error getting weather data: HTTP 404")
+
+    intent, reply = resolve_follow_up(weather_session, "what about atlantis", fetch_weather=fetch)
+
+    assert intent == "weather"
+    assert reply.success is False
+    assert weather_session.slots["last_city"] == "Paris"
+    _, again = resolve_follow_up(weather_session, "and how does it feel outside")
+    assert "Paris" in again and "20°C" in again
+
+
+def test_later_questions_only_get_current_conditions(weather_session):
+    _, reply = resolve_follow_up(weather_session, "and tomorrow?")
+
+    assert reply.startswith("I only have current conditions for Paris.")
+
+
+def test_repeat_returns_the_last_response(weather_session):
+    assert resolve_follow_up(weather_session, "say that again") == (
+        "weather", "The current temperature in Paris is 21°C"
+    )
+
+
+def test_tell_me_more_continues_the_summary():
+    session = Session("test")
+    summary = "One. Two. Three. Four. Five."
+    remember_wikipedia(session, "numbers", summary, shown=2)
+    session.add_turn("numbers on wikipedia", "One. Two.", "wikipedia")
+
+    _, reply = resolve_follow_up(session, "tell me more")
+
+    assert reply.startswith("Three. Four.")
+
+
+def test_not_a_follow_up_without_session_state():
+    assert resolve_follow_up(Session("test"), "what about london", fetch_weather=FetchWeather()) is None
@@ -0,0 +1,36 @@
+import pytest
+
+from app.core.intent_classifier import INTENTS_YAML_PATH, load_classifier
+from app.core.intents import INTENT_CLASSIFIER_THRESHOLD, match_keywords, match_rules
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("what time is it", "time"),
+    ("do you know what time it is", "time"),
+    ("tell me the time", "time"),
+    ("time", "time"),
+    ("tell me a joke", "joke"),
+    ("what's the weather in paris", "weather"),
+    ("stop", "exit"),
+])
+def test_keyword_rules(query, intent):
+    assert match_keywords(query) == intent
+
+
+@pytest.mark.parametrize("query", [
+    "what time does the store close",
+    "how do i stop the kettle",
+    "i had a great time yesterday",
+])
+def test_sentences_that_merely_contain_a_keyword(query):
+    assert match_keywords(query) is None
+    assert match_rules(query)[0] is None
+
+
+def test_classifier_does_not_read_other_time_questions_as_the_time(tmp_path):
+    classifier = load_classifier(model_path=str(tmp_path / "model.npz"), yaml_path=INTENTS_YAML_PATH)
+
+    intent, probability = classifier.classify("what time does the store close")
+    assert intent != "time" or probability < INTENT_CLASSIFIER_THRESHOLD
+    intent, probability = classifier.classify("what time is it")
+    assert intent == "time" and probability >= INTENT_CLASSIFIER_THRESHOLD
@@ -0,0 +1,60 @@
+import pytest
+
+from app.core import ip_service as ip_service_module
+from app.core.ip_service import IPService
+
+
+class Response:
+    def __init__(self, ip):
+        self.ip = ip
+
+    def json(self):
+        return {"ip": self.ip}
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    answers = []
+
+    def get(url, **kwargs):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return Response(answer)
+
+    monkeypatch.setattr(ip_service_module, "IP_LOOKUP_OFFLINE", False)
+    monkeypatch.setattr(ip_service_module.http, "get", get)
+    monkeypatch.setattr(ip_service_module, "local_ip", lambda: "192.168.1.2")
+    return answers
+
+
+def test_fresh_address_is_served_from_the_cache(lookups):
+    lookups.append("203.0.113.1")
+    service = IPService(ttl=60)
+
+    assert service.get() == "203.0.113.1"
+    assert service.get() == "203.0.113.1"
+    assert lookups == []
+
+
+def test_stale_address_is_looked_up_again(lookups):
+    lookups.extend(["203.0.113.1", "203.0.113.2"])
+    service = IPService(ttl=0)
+
+    assert service.get() == "203.0.113.1"
+    assert service.get() == "203.0.113.2"
+
+
+def test_failed_lookup_falls_back_to_the_last_known_address(lookups):
+    lookups.extend(["203.0.113.1", OSError("offline")])
+    service = IPService(ttl=0)
+    service.get()
+
+    assert service.get() == "203.0.113.1"
+    assert service.last_error == "offline"
+
+
+def test_local_address_without_any_lookup(lookups):
+    lookups.append(OSError("offline"))
+
+    assert IPService(ttl=60).get() == "192.168.1.2"
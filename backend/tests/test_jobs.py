@@ -0,0 +1,115 @@
+import time
+
+from app.core.jobs import JobQueue
+from app.core.tracing import tracer
+
+
+def wait_for(queue, job_id, statuses=("succeeded", "failed"), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id)['status']}")
+
+
+def test_repeated_idempotency_key_returns_the_first_job(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    queue.register("echo", lambda payload: payload)
+
+    first = queue.submit("echo", {"n": 1}, idempotency_key="abc")
+    again = queue.submit("echo", {"n": 2}, idempotency_key="abc")
+    other = queue.submit("echo", {"n": 3}, idempotency_key="def")
+
+    assert again["id"] == first["id"]
+    assert again["payload"] == {"n": 1}
+    assert other["id"] != first["id"]
+    count = queue._connect().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+    assert count == 2
+
+
+def test_jobs_without_a_key_are_never_merged(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    queue.register("echo", lambda payload: payload)
+
+    assert queue.submit("echo", {})["id"] != queue.submit("echo", {})["id"]
+
+
+def test_idempotent_job_runs_once(tmp_path):
+    runs = []
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=2)
+    queue.register("count", lambda payload: runs.append(payload) or len(runs))
+    queue.start()
+
+    job = queue.submit("count", {}, idempotency_key="once")
+    wait_for(queue, job["id"])
+    queue.submit("count", {}, idempotency_key="once")
+
+    assert wait_for(queue, job["id"])["result"] == 1
+    assert len(runs) == 1
+
+
+def test_interrupted_jobs_are_requeued_on_start(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    crashed = JobQueue(db_path=path)
+    crashed.register("echo", lambda payload: payload)
+    job = crashed.submit("echo", {"text": "hello"})
+    # A worker claimed it, then the process died before it finished
+    assert crashed._claim()["id"] == job["id"]
+    assert crashed.get(job["id"])["status"] == "running"
+
+    restarted = JobQueue(db_path=path, workers=1)
+    restarted.register("echo", lambda payload: payload)
+    restarted.start()
+
+    finished = wait_for(restarted, job["id"])
+    assert finished["status"] == "succeeded"
+    assert finished["result"] == {"text": "hello"}
+
+
+def test_failing_job_is_marked_failed(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    queue.register("boom", lambda payload: 1 / 0)
+    queue.start()
+
+    job = wait_for(queue, queue.submit("boom", {})["id"])
+    assert job["status"] == "failed"
+    assert "division by zero" in job["error"]
+
+
+def test_job_trace_links_to_the_submitting_request(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    queue.register("echo", lambda payload: payload)
+    queue.start()
+
+    with tracer.trace("request", trace_id="req123"):
+        job = queue.submit("echo", {"text": "hello"})
+    wait_for(queue, job["id"])
+
+    # The job's trace is recorded just after the job is marked finished
+    deadline = time.monotonic() + 5
+    traces = []
+    while not traces and time.monotonic() < deadline:
+        traces = [t for t in tracer.slowest(limit=tracer.recent) if t.get("job_id") == job["id"]]
+        time.sleep(0.02)
+    assert traces[0]["request_trace_id"] == "req123"
+
+
+def test_old_finished_jobs_are_pruned(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), workers=1, retention=60)
+    queue.register("echo", lambda payload: payload)
+    old = queue.submit("echo", {}, idempotency_key="old")
+    recent = queue.submit("echo", {})
+    waiting = queue.submit("echo", {})
+    db = queue._connect()
+    db.execute("UPDATE jobs SET status = 'succeeded', updated_at = ? WHERE id = ?", (time.time() - 120, old["id"]))
+    db.execute("UPDATE jobs SET status = 'failed' WHERE id = ?", (recent["id"],))
+    db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - 120, waiting["id"]))
+
+    assert queue.prune() == 1
+    assert queue.get(old["id"]) is None
+    assert queue.get(recent["id"])["status"] == "failed"
+    assert queue.get(waiting["id"])["status"] == "queued"
+    # The key is free again
+    assert queue.submit("echo", {}, idempotency_key="old")["id"] != old["id"]
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from app.core import launcher as launcher_module
+from app.core.launcher import LauncherIndex
+
+pytestmark = pytest.mark.skipif(launcher_module.IS_WINDOWS, reason="desktop entries are not used on Windows")
+
+
+def executable(directory, name):
+    path = directory / name
+    path.write_text("#!/bin/sh\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+def desktop_entry(directory, filename, body):
+    (directory / filename).write_text("[Desktop Entry]\n" + body)
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    dirs = {name: tmp_path / name for name in ("bin", "data", "apps")}
+    for directory in dirs.values():
+        directory.mkdir()
+    (dirs["data"] / "applications").mkdir()
+    monkeypatch.setenv("PATH", str(dirs["bin"]))
+    monkeypatch.setenv("XDG_DATA_HOME", str(dirs["data"]))
+    monkeypatch.setenv("XDG_DATA_DIRS", str(tmp_path / "none"))
+    return dirs
+
+
+def index(dirs, allowed_commands=()):
+    return LauncherIndex(extra_dirs=[str(dirs["apps"])], allowed_commands=set(allowed_commands))
+
+
+def test_desktop_entries_resolve_by_name_and_file(dirs):
+    applications = dirs["data"] / "applications"
+    desktop_entry(applications, "org.gnome.Maps.desktop", "Name=Maps\nExec=gnome-maps %U\n")
+    desktop_entry(applications, "secret.desktop", "Name=Secret\nExec=secret\nNoDisplay=true\n")
+    apps = index(dirs)
+
+    assert apps.resolve("Maps") == ("command", ["gnome-maps"])
+    assert apps.resolve("org.gnome.maps") == ("command", ["gnome-maps"])
+    assert apps.resolve("secret") is None
+
+
+def test_path_programs_need_an_alias_or_allow_list(dirs):
+    gedit = executable(dirs["bin"], "gedit")
+    htop = executable(dirs["bin"], "htop")
+    executable(dirs["bin"], "shutdown")
+    player = executable(dirs["apps"], "player")
+
+    assert index(dirs).resolve("shutdown") is None
+    assert index(dirs).resolve("notepad") == ("command", [gedit])
+    assert index(dirs).resolve("player") == ("command", [player])
+    assert index(dirs, allowed_commands={"htop"}).resolve("htop") == ("command", [htop])
+
+
+def test_index_is_rebuilt_only_when_a_directory_changes(dirs, monkeypatch):
+    apps = index(dirs)
+    apps.refresh()
+    scans = []
+    scan = apps._scan
+    monkeypatch.setattr(apps, "_scan", lambda: scans.append(1) or scan())
+
+    apps.refresh_if_changed()
+    assert scans == []
+
+    player = executable(dirs["apps"], "player")
+    os.utime(dirs["apps"], (1, 1))
+    apps.refresh_if_changed()
+    assert scans == [1]
+    assert apps.resolve("player") == ("command", [player])
+
+
+def test_launch_starts_the_program_without_waiting(dirs, monkeypatch):
+    player = executable(dirs["apps"], "player")
+    started = []
+    monkeypatch.setattr(launcher_module.subprocess, "Popen", lambda argv, **kwargs: started.append((argv, kwargs)))
+    apps = index(dirs)
+
+    assert apps.launch("player")
+    assert not apps.launch("missing")
+    argv, kwargs = started[0]
+    assert argv == [player]
+    assert kwargs["start_new_session"]
@@ -0,0 +1,135 @@
+import os
+import time
+
+import pytest
+
+from app.core.mail_queue import MailQueue, SMTPConnectionPool
+
+
+@pytest.fixture
+def make_queue(smtp_server, tmp_path):
+    def make(**options):
+        pool = SMTPConnectionPool("127.0.0.1", smtp_server.port, starttls=False, timeout=5)
+        options.setdefault("retry_base", 0.05)
+        return MailQueue(pool, "talksy@example.com", spool_dir=str(tmp_path / "spool"), workers=1, **options)
+    return make
+
+
+def wait_for(queue, job_id, statuses=("sent", "failed"), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = queue.status(job_id)
+        if status is not None and status["status"] in statuses:
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"email {job_id} is {queue.status(job_id)}")
+
+
+def test_sends_and_forgets_delivered_mail(smtp_server, make_queue):
+    queue = make_queue()
+    queue.start()
+    job_ids = [queue.enqueue(f"user{i}@example.com", "Hi", f"Message {i}") for i in range(3)]
+
+    for job_id in job_ids:
+        assert wait_for(queue, job_id) == {
+            "id": job_id, "to": queue.status(job_id)["to"], "subject": "Hi",
+            "status": "sent", "attempts": 1, "error": None,
+        }
+    assert sorted(recipients[0] for recipients, _ in smtp_server.messages) == [
+        "user0@example.com", "user1@example.com", "user2@example.com"
+    ]
+    # Sent mail leaves neither a spool file nor a pending job behind
+    assert os.listdir(queue.spool_dir) == []
+    assert queue._jobs == {}
+
+
+def test_transient_failure_is_retried_after_backoff(smtp_server, make_queue):
+    smtp_server.data_replies = ["451 Try again later"]
+    queue = make_queue(retry_base=0.3)
+    queue.start()
+
+    started = time.monotonic()
+    status = wait_for(queue, queue.enqueue("bob@example.com", "Lunch", "Noon?"))
+
+    assert status["status"] == "sent"
+    assert status["attempts"] == 2
+    assert time.monotonic() - started >= 0.3
+    assert len(smtp_server.messages) == 1
+
+
+def test_gives_up_after_max_attempts(smtp_server, make_queue):
+    smtp_server.data_replies = ["451 Try again later"] * 10
+    queue = make_queue(max_attempts=3)
+    queue.start()
+
+    job_id = queue.enqueue("bob@example.com", "Lunch", "Noon?")
+    status = wait_for(queue, job_id)
+
+    assert status["status"] == "failed"
+    assert status["attempts"] == 3
+    assert "451" in status["error"]
+    # Failed mail stays in the spool
+    assert os.path.exists(os.path.join(queue.spool_dir, f"{job_id}.json"))
+
+
+def test_refused_recipient_is_not_retried(smtp_server, make_queue):
+    smtp_server.refused.add("nobody@example.com")
+    queue = make_queue()
+    queue.start()
+
+    status = wait_for(queue, queue.enqueue("nobody@example.com", "Hi", "Hello"))
+
+    assert status["status"] == "failed"
+    assert status["attempts"] == 1
+    assert smtp_server.messages == []
+
+
+def test_dropped_connection_is_replaced(smtp_server, make_queue):
+    smtp_server.data_replies = ["421 Closing connection"]
+    queue = make_queue()
+    queue.start()
+
+    status = wait_for(queue, queue.enqueue("bob@example.com", "Hi", "Hello"))
+
+    assert status["status"] == "sent"
+    assert status["attempts"] == 2
+    assert smtp_server.connections == 2
+
+
+def test_idempotency_key_queues_one_email(smtp_server, make_queue):
+    queue = make_queue()
+    queue.start()
+
+    first = queue.enqueue("bob@example.com", "Hi", "Hello", idempotency_key="k1")
+    wait_for(queue, first)
+    again = queue.enqueue("bob@example.com", "Hi", "Hello", idempotency_key="k1")
+
+    assert again == first
+    assert queue.status(again)["status"] == "sent"
+    assert len(smtp_server.messages) == 1
+
+
+def test_finished_history_is_bounded(smtp_server, make_queue):
+    queue = make_queue(history=2)
+    queue.start()
+
+    job_ids = [queue.enqueue("bob@example.com", "Hi", f"Hello {i}", idempotency_key=f"k{i}") for i in range(4)]
+    wait_for(queue, job_ids[-1])
+
+    assert len(smtp_server.messages) == 4
+    assert queue._jobs == {}
+    assert list(queue._finished) == job_ids[2:]
+    assert sorted(queue._keys) == ["k2", "k3"]
+    # The oldest sent email is forgotten entirely
+    assert queue.status(job_ids[0]) is None
+
+
+def test_recovers_spooled_mail_on_start(smtp_server, make_queue):
+    stopped = make_queue()
+    job_id = stopped.enqueue("bob@example.com", "Hi", "Sent after a restart")
+
+    restarted = make_queue()
+    restarted.start()
+
+    assert wait_for(restarted, job_id)["status"] == "sent"
+    assert len(smtp_server.messages) == 1
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from app.core import news_feed
+from app.core.news_feed import HeadlinePrefetcher
+
+
+class Response:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode() if payload is not None else b""
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+def article(title, published_at, source="Wire"):
+    return {"title": title, "publishedAt": published_at, "source": {"name": source}, "url": "https://example.com"}
+
+
+class NewsAPI:
+    """Stand-in for http.get that serves queued responses per country"""
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+
+    def __call__(self, url, params=None, headers=None):
+        self.requests.append((params["country"], dict(headers or {})))
+        return self.responses[params["country"]].pop(0)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = NewsAPI()
+    monkeypatch.setattr(news_feed.http, "get", api)
+    return api
+
+
+def test_headlines_are_deduplicated_and_newest_first(api):
+    api.responses["us"] = [Response(200, {"articles": [
+        article("Markets rally", "2026-01-01T08:00:00Z"),
+        article("Storm hits coast", "2026-01-01T10:00:00Z"),
+    ]})]
+    api.responses["gb"] = [Response(200, {"articles": [
+        article("markets  RALLY", "2026-01-01T09:00:00Z"),
+        article("[Removed]", "2026-01-01T11:00:00Z"),
+        article("Election called", "2026-01-01T07:00:00Z"),
+    ]})]
+    news = HeadlinePrefetcher("key", countries=["us", "gb"], categories=["general"], interval=60)
+    news.poll()
+
+    items, total = news.headlines()
+    assert total == 3
+    assert [h["title"] for h in items] == ["Storm hits coast", "Markets rally", "Election called"]
+    assert news.headlines(country="gb")[1] == 1
+    assert news.last_error is None
+
+
+def test_unchanged_feed_is_not_merged_again(api):
+    payload = {"articles": [article("Markets rally", "2026-01-01T08:00:00Z")]}
+    api.responses["us"] = [
+        Response(200, payload, headers={"ETag": '"v1"'}),
+        Response(304),
+        Response(200, payload),
+    ]
+    news = HeadlinePrefetcher("key", countries=["us"], categories=["general"], interval=60)
+    news.poll()
+
+    # Nothing new: the store must not be re-parsed or reordered
+    news._merge = lambda *args: pytest.fail("unchanged feed was merged")
+    news.poll()
+    news.poll()
+
+    assert api.requests[1][1] == {"If-None-Match": '"v1"'}
+    assert news.headlines()[1] == 1
+
+
+def test_store_keeps_only_the_newest_entries(api):
+    api.responses["us"] = [Response(200, {"articles": [
+        article(f"Story {i}", f"2026-01-01T0{i}:00:00Z") for i in range(5)]})]
+    news = HeadlinePrefetcher("key", countries=["us"], categories=["general"], interval=60, max_size=3)
+    news.poll()
+
+    items, total = news.headlines(limit=10)
+    assert total == 3
+    assert [h["title"] for h in items] == ["Story 4", "Story 3", "Story 2"]
+
+
+def test_failed_feed_is_reported_without_dropping_others(api):
+    api.responses["us"] = [Response(401, {"message": "Invalid key"})]
+    api.responses["gb"] = [Response(200, {"articles": [article("Election called", "2026-01-01T07:00:00Z")]})]
+    news = HeadlinePrefetcher("key", countries=["us", "gb"], categories=["general"], interval=60)
+    news.poll()
+
+    assert news.last_error == "us/general: Invalid key"
+    assert news.headlines()[1] == 1
+    assert news.wait_until_polled(0)
+
+
+def test_missing_key_is_reported(api):
+    news = HeadlinePrefetcher("", countries=["us"], categories=["general"], interval=60)
+    news.poll()
+
+    assert news.last_error == "News API key is not configured."
+    assert api.requests == []
@@ -0,0 +1,133 @@
+import sys
+import threading
+
+import pytest
+
+from app.core import plugins as plugins_module
+from app.core.plugins import CachePolicy, ConfigOption, PluginError, PluginManager, PluginManifest
+
+PLUGIN_SOURCE = '''
+import threading
+
+imported = True
+context = None
+release = threading.Event()
+entered = threading.Event()
+
+
+def setup(plugin_context):
+    global context
+    context = plugin_context
+
+
+def echo(query, slots, session):
+    return context.config["greeting"] + " " + query
+
+
+def block(query, slots, session):
+    entered.set()
+    release.wait(5)
+    return "done"
+
+
+def job(payload):
+    return payload["value"]
+
+
+HANDLERS = {"echo": echo, "block": block}
+JOBS = {"job": job}
+'''
+
+
+@pytest.fixture
+def plugin_module(tmp_path, monkeypatch):
+    (tmp_path / "talksy_test_plugin.py").write_text(PLUGIN_SOURCE)
+    (tmp_path / "talksy_broken_plugin.py").write_text("raise ImportError('no such library')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "talksy_test_plugin"
+    sys.modules.pop("talksy_test_plugin", None)
+    sys.modules.pop("talksy_broken_plugin", None)
+
+
+def manifest(name="test", module="talksy_test_plugin", **kwargs):
+    kwargs.setdefault("config", [ConfigOption("greeting", "TALKSY_TEST_GREETING", default="hello")])
+    return PluginManifest(name, module, intents=["echo", "block"], jobs=["job"], **kwargs)
+
+
+def manager(*manifests, enabled="all"):
+    plugins = PluginManager(enabled=enabled)
+    plugins.discover(builtins=list(manifests))
+    return plugins
+
+
+def test_module_is_imported_on_first_use(plugin_module, monkeypatch):
+    monkeypatch.setenv("TALKSY_TEST_GREETING", "hi")
+    plugins = manager(manifest())
+
+    assert plugins.handles("echo")
+    assert plugins.health("test") == (True, "not loaded")
+    assert plugin_module not in sys.modules
+
+    assert plugins.handle("echo", "there", {}, None) == "hi there"
+    assert plugins.run_job("job", {"value": 3}) == 3
+    assert plugins.status()["test"]["loaded"]
+
+
+def test_disabled_plugins_are_not_registered(plugin_module):
+    plugins = manager(manifest(), enabled="weather,news")
+
+    assert not plugins.handles("echo")
+    with pytest.raises(PluginError, match="not enabled"):
+        plugins.load("test")
+
+
+def test_missing_config_is_reported(plugin_module, monkeypatch):
+    monkeypatch.delenv("TALKSY_TEST_KEY", raising=False)
+    plugins = manager(manifest(config=[ConfigOption("key", "TALKSY_TEST_KEY", required=True, secret=True)]))
+
+    with pytest.raises(PluginError, match="set TALKSY_TEST_KEY"):
+        plugins.handle("echo", "there", {}, None)
+    assert plugins.health("test") == (False, "test is not configured: set TALKSY_TEST_KEY")
+    assert plugin_module not in sys.modules
+
+
+def test_import_failure_is_reported(plugin_module):
+    plugins = manager(manifest(module="talksy_broken_plugin"))
+
+    with pytest.raises(PluginError, match="test failed to load: no such library"):
+        plugins.load("test")
+    assert plugins.status()["test"]["error"] == "test failed to load: no such library"
+
+
+def test_busy_plugin_refuses_extra_calls(plugin_module, monkeypatch):
+    monkeypatch.setattr(plugins_module, "PLUGIN_BUSY_TIMEOUT", 0.05)
+    plugins = manager(manifest(concurrency=1))
+    module = plugins.module("test")
+    worker = threading.Thread(target=plugins.handle, args=("block", "", {}, None))
+    worker.start()
+    try:
+        assert module.entered.wait(5)
+        with pytest.raises(PluginError, match="test is busy"):
+            plugins.handle("echo", "there", {}, None)
+        # Jobs have their own slots
+        assert plugins.run_job("job", {"value": 1}) == 1
+    finally:
+        module.release.set()
+        worker.join()
+    assert plugins.handle("echo", "there", {}, None) == "hello there"
+
+
+def test_cache_policy_reuses_results(plugin_module):
+    plugins = manager(manifest(cache=CachePolicy(ttl=60, max_entries=1)))
+    context = plugins.module("test").context
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert context.cached("a", lambda: compute(1)) == 1
+    assert context.cached("a", lambda: compute(2)) == 1
+    context.cached("b", lambda: compute(3))
+    assert context.cached("a", lambda: compute(4)) == 4
+    assert calls == [1, 3, 4]
@@ -0,0 +1,42 @@
+import time
+
+from app.core.sessions import SessionStore
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(max_sessions=2, ttl=60)
+    a = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    assert len(store) == 2
+    assert list(store._sessions) == ["a", "c"]
+    assert store.get("a") is a
+
+
+def test_evicted_session_loses_its_state():
+    store = SessionStore(max_sessions=1, ttl=60)
+    store.get("a").add_turn("hello", "hi", "greeting")
+    store.get("b")
+
+    assert store.get("a").last_response() is None
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(max_sessions=10, ttl=0.05)
+    store.get("a").add_turn("hello", "hi")
+    store.get("b")
+    time.sleep(0.1)
+
+    assert store.get("a").last_response() is None
+    # Expired sessions are swept when another one is used
+    assert len(store) == 1
+
+
+def test_new_session_gets_an_id():
+    store = SessionStore()
+    session = store.get()
+
+    assert session.id
+    assert store.get(session.id) is session
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core import slots
+from app.core.slots import Gazetteer, extract_slots, missing_slots, slot_value
+
+
+@pytest.mark.parametrize("text, city", [
+    ("what's the weather in new york", "New York"),
+    ("what is the weather like in london today?", "London"),
+    ("how cold is it in san francisco", "San Francisco"),
+    ("weather in springfield", "Springfield"),
+])
+def test_weather_city(text, city):
+    assert extract_slots("weather", text) == {"city": city}
+
+
+@pytest.mark.parametrize("text, query", [
+    ("search for black holes on wikipedia", "black holes"),
+    ("what does wikipedia say about alan turing?", "alan turing"),
+    ("tell me about the moon from wikipedia", "the moon"),
+    ("wikipedia python programming language", "python programming language"),
+])
+def test_wikipedia_query(text, query):
+    assert extract_slots("wikipedia", text) == {"query": query}
+
+
+def test_email_slots():
+    text = "email bob@example.com about lunch saying see you at noon"
+    assert extract_slots("email", text) == {
+        "recipient": "bob@example.com", "subject": "lunch", "message": "see you at noon"}
+
+
+def test_contact_name_resolves_to_address(monkeypatch):
+    monkeypatch.setattr(slots, "contacts", {"mom": {"email": "mom@example.com", "phone": "+15550100"}})
+
+    assert extract_slots("email", "email mom saying hi")["recipient"] == "mom@example.com"
+    assert extract_slots("whatsapp", "message mom saying hi")["recipient"] == "+15550100"
+
+
+def test_phone_number_is_normalised():
+    assert extract_slots("whatsapp", "whatsapp +1 555 010 0199 saying hello") == {
+        "recipient": "+15550100199", "message": "hello"}
+
+
+@pytest.mark.parametrize("intent, text", [
+    ("whatsapp", "send a whatsapp message"),
+    ("email", "send an email"),
+])
+def test_filler_words_are_not_recipients(intent, text):
+    found = extract_slots(intent, text)
+    assert "recipient" not in found
+    assert missing_slots(intent, found) == ["recipient", "message"]
+
+
+def test_missing_slots():
+    assert missing_slots("weather", {}) == ["city"]
+    assert missing_slots("weather", {"city": "Paris"}) == []
+    assert missing_slots("email", {"recipient": "bob@example.com"}) == ["message"]
+    assert missing_slots("joke", {}) == []
+
+
+def test_slot_value_from_bare_answer():
+    assert slot_value("weather", "city", "in new york please") == "New York"
+    assert slot_value("weather", "city", "Gotham.") == "Gotham"
+    assert slot_value("email", "recipient", "it's bob@example.com") == "bob@example.com"
+    assert slot_value("whatsapp", "recipient", "555-010-0199") == "5550100199"
+    assert slot_value("email", "message", "See you soon!") == "see you soon"
+
+
+def test_gazetteer_prefers_longest_name():
+    places = Gazetteer(["York", "New York", "New York City"])
+
+    assert places.find("flights to new york city tomorrow") == "new york city"
+    assert places.find("old york") == "york"
+    assert places.find("nowhere") is None
@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useEffect, useRef } from 'react';
-import { api, checkBackendConnection } from '../lib/api';
+import { api, subscribeToBackendStatus } from '../lib/api';
 import VoiceIndicator from './VoiceIndicator';
 
 interface Message {
@@ -32,14 +32,15 @@ export default function VoiceAssistant() {
   }, []);
 
   useEffect(() => {
-    // Get initial greeting and check backend status
+    // Track backend readiness from the server-sent health stream
+    return subscribeToBackendStatus(setBackendStatus);
+  }, []);
+
+  useEffect(() => {
+    // Get initial greeting
     const fetchGreeting = async () => {
       setIsLoading(true);
       
-      // Check backend connection
-      const isConnected = await checkBackendConnection();
-      setBackendStatus(isConnected ? 'connected' : 'disconnected');
-      
       try {
         const response = await api.getGreeting();
         
@@ -91,7 +92,10 @@ export default function VoiceAssistant() {
     
     try {
       const response = await api.processTextCommand(command);
-      setBackendStatus(response.success === false ? 'disconnected' : 'connected');
+      // A failed lookup is still an answer; only an unreachable backend is disconnected
+      if (response.offline) {
+        setBackendStatus('disconnected');
+      }
       
       // Add assistant response
       if (response.response) {
@@ -139,25 +143,28 @@ export default function VoiceAssistant() {
     setIsLoading(true);
     
     try {
+      // The server stops whatever it is still saying before it listens
       const response = await api.listenForCommand();
-      setBackendStatus(response.success === false ? 'disconnected' : 'connected');
+      if (response.offline) {
+        setBackendStatus('disconnected');
+      }
       
-      if (response.success && response.command) {
+      if (response.response) {
         // Add user's spoken command
-        addMessage({
-          text: response.command,
-          isUser: true,
-          timestamp: new Date()
-        });
-        
-        // Add assistant's response
-        if (response.response) {
+        if (response.command) {
           addMessage({
-            text: response.response,
-            isUser: false,
+            text: response.command,
+            isUser: true,
             timestamp: new Date()
           });
         }
+        
+        // Add assistant's response, which may report a failed lookup
+        addMessage({
+          text: response.response,
+          isUser: false,
+          timestamp: new Date()
+        });
       } else {
         // If there was an error or no command detected
         addMessage({
@@ -7,10 +7,36 @@ export interface ApiResponse {
   command?: string;
   spoken?: string;
   text?: string;
+  intent?: string | null;
+  data?: Record<string, unknown> | null;
+  display_text?: string;
+  speech_text?: string;
+  audio_url?: string | null;
+  session_id?: string | null;
+  // Set only when the backend could not be reached at all
+  offline?: boolean;
 }
 
+// How the backend should voice a reply: not at all, on its own speakers,
+// or as audio the client fetches from audio_url
+export type AudioMode = 'none' | 'server' | 'stream';
+
 const API_URL = 'http://localhost:8000';
 
+// Conversation session on the backend. Sent with every command so that
+// follow-ups ("and in London?") and answers to prompts reach the same session.
+let sessionId: string | null = null;
+
+function sessionHeaders(): Record<string, string> {
+  return sessionId ? { 'X-Session-Id': sessionId } : {};
+}
+
+function rememberSession(data: ApiResponse) {
+  if (data.session_id) {
+    sessionId = data.session_id;
+  }
+}
+
 // Default fallback responses when backend is unavailable
 const FALLBACK_RESPONSES = {
   greeting: "Welcome to Talksy! I'm your offline voice assistant. The backend server is not connected, so I'm working in limited mode.",
@@ -36,24 +62,29 @@ async function fetchApi(endpoint: string, options?: RequestInit): Promise<Respon
   }
 }
 
+export type BackendStatus = 'connecting' | 'connected' | 'disconnected';
+
 /**
- * Checks if the backend is accessible
+ * Subscribes once to the backend readiness stream (server-sent events).
+ * The browser reconnects on its own after errors. Returns an unsubscribe function.
  */
-export async function checkBackendConnection(): Promise<boolean> {
-  try {
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), 3000);
-    
-    const response = await fetch(`${API_URL}`, { 
-      signal: controller.signal 
-    });
-    
-    clearTimeout(timeoutId);
-    return response.ok;
-  } catch (error) {
-    console.error('Backend connection error:', error);
-    return false;
-  }
+export function subscribeToBackendStatus(onChange: (status: BackendStatus) => void): () => void {
+  const source = new EventSource(`${API_URL}/health/stream`);
+  
+  source.addEventListener('health', (event) => {
+    try {
+      const data = JSON.parse((event as MessageEvent).data);
+      onChange(data.ready ? 'connected' : 'disconnected');
+    } catch (error) {
+      console.error('Invalid health event:', error);
+    }
+  });
+  
+  source.onerror = () => {
+    onChange('disconnected');
+  };
+  
+  return () => source.close();
 }
 
 export const api = {
@@ -62,15 +93,6 @@ export const api = {
    */
   async getGreeting(): Promise<ApiResponse> {
     try {
-      // Check if backend is available
-      const isConnected = await checkBackendConnection();
-      if (!isConnected) {
-        return { 
-          success: false, 
-          message: FALLBACK_RESPONSES.greeting 
-        };
-      }
-      
       const response = await fetchApi('/greet');
       const data = await response.json();
       return data;
@@ -84,31 +106,26 @@ export const api = {
   },
 
   /**
-   * Processes a text command
+   * Processes a text command. Typed commands are shown, not spoken, so no
+   * speech is rendered unless asked for.
    */
-  async processTextCommand(command: string): Promise<ApiResponse> {
+  async processTextCommand(command: string, audio: AudioMode = 'none'): Promise<ApiResponse> {
     try {
-      // Check if backend is available
-      const isConnected = await checkBackendConnection();
-      if (!isConnected) {
-        return { 
-          success: false, 
-          response: `${FALLBACK_RESPONSES.unknown} I received: "${command}"` 
-        };
-      }
-      
-      const response = await fetchApi('/process-text', {
+      const response = await fetchApi(`/process-text?audio=${audio}`, {
         method: 'POST',
+        headers: sessionHeaders(),
         body: JSON.stringify({ command }),
       });
       
       const data = await response.json();
+      rememberSession(data);
       return data;
     } catch (error) {
       console.error('Error processing command:', error);
       return { 
         success: false, 
-        response: 'Failed to process your command. Is the backend server running?' 
+        offline: true,
+        response: `${FALLBACK_RESPONSES.unknown} I received: "${command}"` 
       };
     }
   },
@@ -118,25 +135,19 @@ export const api = {
    */
   async listenForCommand(): Promise<ApiResponse> {
     try {
-      // Check if backend is available
-      const isConnected = await checkBackendConnection();
-      if (!isConnected) {
-        return { 
-          success: false, 
-          command: "Voice recognition requires the backend server to be running."
-        };
-      }
-      
       const response = await fetchApi('/listen', {
         method: 'POST',
+        headers: sessionHeaders(),
       });
       
       const data = await response.json();
+      rememberSession(data);
       return data;
     } catch (error) {
       console.error('Error listening for command:', error);
       return { 
         success: false, 
+        offline: true,
         command: 'Failed to listen for command. Is the backend server running?' 
       };
     }
@@ -147,15 +158,6 @@ export const api = {
    */
   async speak(text: string): Promise<ApiResponse> {
     try {
-      // Check if backend is available
-      const isConnected = await checkBackendConnection();
-      if (!isConnected) {
-        return { 
-          success: false, 
-          text: 'Text-to-speech requires the backend server to be running.' 
-        };
-      }
-      
       const response = await fetchApi('/speak', {
         method: 'POST',
         body: JSON.stringify({ text }),